@@ -0,0 +1,22 @@
+"""add column profile to product imports
+
+Revision ID: 20261017100000
+Revises: e1a9ab6e667e
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '20261017100000'
+down_revision = 'e1a9ab6e667e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('product_imports', sa.Column('column_profile', postgresql.JSON(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade():
+    op.drop_column('product_imports', 'column_profile')
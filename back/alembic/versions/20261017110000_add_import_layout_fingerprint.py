@@ -0,0 +1,27 @@
+"""add header layout fingerprint to product imports
+
+Revision ID: 20261017110000
+Revises: 20261017100000
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '20261017110000'
+down_revision = '20261017100000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('product_imports', sa.Column('header_fingerprint', sa.String(length=64), nullable=True))
+    op.add_column('product_imports', sa.Column('header_row', sa.Integer(), nullable=True))
+    op.add_column('product_imports', sa.Column('sheet_name', sa.String(length=255), nullable=True))
+    op.create_index('ix_product_imports_header_fingerprint', 'product_imports', ['header_fingerprint'])
+
+
+def downgrade():
+    op.drop_index('ix_product_imports_header_fingerprint', table_name='product_imports')
+    op.drop_column('product_imports', 'sheet_name')
+    op.drop_column('product_imports', 'header_row')
+    op.drop_column('product_imports', 'header_fingerprint')
@@ -0,0 +1,26 @@
+"""add uploaded file content hash to product imports and supplier requests
+
+Revision ID: 20261017120000
+Revises: 20261017110000
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '20261017120000'
+down_revision = '20261017110000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('product_imports', sa.Column('file_hash', sa.String(length=64), nullable=True))
+    op.create_index('ix_product_imports_file_hash', 'product_imports', ['file_hash'])
+    op.add_column('supplier_requests', sa.Column('pricelist_hashes', postgresql.ARRAY(sa.String()), nullable=True))
+
+
+def downgrade():
+    op.drop_column('supplier_requests', 'pricelist_hashes')
+    op.drop_index('ix_product_imports_file_hash', table_name='product_imports')
+    op.drop_column('product_imports', 'file_hash')
@@ -0,0 +1,29 @@
+"""add differential import counters and product content hash
+
+Revision ID: 20261017130000
+Revises: 20261017120000
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '20261017130000'
+down_revision = '20261017120000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('products', sa.Column('content_hash', sa.String(length=40), nullable=True))
+    op.add_column('product_imports', sa.Column('import_mode', sa.String(length=20), nullable=True))
+    op.add_column('product_imports', sa.Column('added_products', sa.Integer(), nullable=True))
+    op.add_column('product_imports', sa.Column('changed_products', sa.Integer(), nullable=True))
+    op.add_column('product_imports', sa.Column('removed_products', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('product_imports', 'removed_products')
+    op.drop_column('product_imports', 'changed_products')
+    op.drop_column('product_imports', 'added_products')
+    op.drop_column('product_imports', 'import_mode')
+    op.drop_column('products', 'content_hash')
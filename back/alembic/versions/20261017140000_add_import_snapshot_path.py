@@ -0,0 +1,21 @@
+"""add product import snapshot path
+
+Revision ID: 20261017140000
+Revises: 20261017130000
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '20261017140000'
+down_revision = '20261017130000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('product_imports', sa.Column('snapshot_path', sa.String(length=1000), nullable=True))
+
+
+def downgrade():
+    op.drop_column('product_imports', 'snapshot_path')
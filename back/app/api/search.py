@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from app.core.elasticsearch import es_manager
 from app.core.database import get_read_db
-from app.schemas.search import SearchRequest, SearchResponse
+from app.schemas.search import SearchRequest, SearchResponse, SuggestResponse
 from app.models.supplier import Supplier
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from typing import List, Optional
+from uuid import UUID
 import time
 
 router = APIRouter()
@@ -24,7 +26,8 @@ async def search_suppliers(search_req: SearchRequest, db: AsyncSession = Depends
     es_response = await es_manager.search_products(
         query=search_req.query,
         filters=filters,
-        size=search_req.limit
+        size=search_req.limit,
+        strategy=search_req.strategy
     )
     
     suppliers_data = []
@@ -60,5 +63,30 @@ async def search_suppliers(search_req: SearchRequest, db: AsyncSession = Depends
         "total_products": total_products,
         "suppliers": suppliers_data[:search_req.limit],
         "query": search_req.query,
-        "search_time_ms": search_time
+        "search_time_ms": search_time,
+        "search_tier": es_response.get("search_tier")
     }
+
+
+@router.get("/suggest", response_model=SuggestResponse)
+async def suggest(
+    q: str = Query(..., min_length=1, max_length=100, description="Набранный префикс"),
+    supplier_ids: Optional[List[UUID]] = Query(None),
+    size: Optional[int] = Query(None, ge=1, le=50, description="По умолчанию ES_SUGGEST_SIZE"),
+):
+    """
+    Подсказки при наборе: названия товаров, бренды и артикулы по префиксу.
+
+    Лёгкая замена полному поиску на каждое нажатие клавиши: completion
+    suggester и prefix-запросы, без БД и без документов в ответе.
+    """
+    prefix = q.strip()
+    if not prefix:
+        return {"query": q, "names": [], "brands": [], "skus": [], "took_ms": 0}
+
+    suggestions = await es_manager.suggest_products(
+        prefix=prefix,
+        supplier_ids=supplier_ids,
+        size=size
+    )
+    return {"query": q, **suggestions}
@@ -6,9 +6,12 @@ from app.schemas.supplier_request import SupplierRequestCreate, SupplierRequestR
 from app.models.supplier_request import SupplierRequest
 from app.models.supplier import Supplier
 from app.tasks.parsing_tasks import parse_pricelist_task
+from app.utils.file_upload import save_upload
 from sqlalchemy import select, func
 from typing import Optional, Dict, Any
 from uuid import UUID
+from contextlib import suppress
+import hashlib
 import json
 import os
 from datetime import datetime
@@ -34,28 +37,42 @@ async def create_supplier_request(
     
     pricelist_filenames = []
     pricelist_urls = []
+    pricelist_hashes = []
     
     # Обрабатываем все загруженные файлы
     if pricelists and len(pricelists) > 0:
         upload_dir = "/app/uploads/requests"
         os.makedirs(upload_dir, exist_ok=True)
         
-        for pricelist in pricelists:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        for index, pricelist in enumerate(pricelists):
             filename = pricelist.filename
-            filepath = os.path.join(upload_dir, f"{timestamp}_{filename}")
+            # Номер файла в заявке - одноимённые файлы не перезаписывают друг друга
+            filepath = os.path.join(upload_dir, f"{timestamp}_{index}_{filename}")
             
-            content = await pricelist.read()
-            with open(filepath, "wb") as f:
-                f.write(content)
+            try:
+                file_hash, _ = await save_upload(pricelist, filepath)
+            except HTTPException:
+                # Заявка отклоняется целиком - уже сохранённые файлы не нужны
+                for saved_path in pricelist_urls:
+                    with suppress(FileNotFoundError):
+                        os.unlink(saved_path)
+                raise
+            # Один и тот же файл, приложенный дважды, сохраняем один раз
+            if file_hash in pricelist_hashes:
+                with suppress(FileNotFoundError):
+                    os.unlink(filepath)
+                continue
             
             pricelist_filenames.append(filename)
             pricelist_urls.append(filepath)
+            pricelist_hashes.append(file_hash)
     
     request = SupplierRequest(
         data=supplier_data,
         pricelist_filenames=pricelist_filenames if pricelist_filenames else None,
         pricelist_urls=pricelist_urls if pricelist_urls else None,
+        pricelist_hashes=pricelist_hashes if pricelist_hashes else None,
         contact_email=contact_email,
         contact_phone=contact_phone,
         contact_telegram=contact_telegram,
@@ -158,18 +175,25 @@ async def approve_supplier_request(
         for idx, pricelist_url in enumerate(request.pricelist_urls):
             if os.path.exists(pricelist_url):
                 try:
-                    with open(pricelist_url, "rb") as f:
-                        content = f.read()
-                    
                     from app.models.product_import import ProductImport
                     
                     filename = request.pricelist_filenames[idx] if request.pricelist_filenames else f"file_{idx}"
+                    # Заявки, созданные до появления хешей, хешируем здесь
+                    if request.pricelist_hashes:
+                        file_hash = request.pricelist_hashes[idx]
+                    else:
+                        file_hash = hashlib.sha256()
+                        with open(pricelist_url, "rb") as f:
+                            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                                file_hash.update(chunk)
+                        file_hash = file_hash.hexdigest()
                     
                     import_record = ProductImport(
                         supplier_id=supplier.id,
                         file_name=filename,
                         file_url=pricelist_url,
-                        file_size=len(content),
+                        file_size=os.path.getsize(pricelist_url),
+                        file_hash=file_hash,
                         status="pending",
                         total_products=0,
                         parsed_products=0
@@ -179,7 +203,12 @@ async def approve_supplier_request(
                     await db.commit()
                     await db.refresh(import_record)
                     
-                    task = parse_pricelist_task.delay(str(supplier.id), filename, content)
+                    # Несколько прайсов нового поставщика дополняют друг друга;
+                    # дифференциальный импорт удалил бы товары соседних файлов
+                    import_mode = "full" if len(request.pricelist_urls) > 1 else None
+                    task = parse_pricelist_task.delay(
+                        str(supplier.id), filename, pricelist_url, import_mode=import_mode
+                    )
                     import_record.task_id = task.id
                     await db.commit()
                 except Exception as e:
@@ -6,17 +6,36 @@ from app.core.elasticsearch import es_manager
 from app.core.config import settings
 from app.schemas.supplier import SupplierCreate, SupplierUpdate, SupplierResponse, SupplierListResponse
 from app.models.supplier import Supplier
+from app.models.product import Product
 from app.tasks.parsing_tasks import parse_pricelist_task
+from app.utils.file_upload import save_upload
 from sqlalchemy import select, func, or_
-from typing import List, Optional
+from typing import List, Literal, Optional
 from uuid import UUID
 
 router = APIRouter()
 
+
+def _supplier_match(query_pattern: str):
+    """
+    Условие поиска поставщика в БД: название, теги или артикул товара.
+
+    Артикулы не попадают в теги поставщика, поэтому ищутся по products.sku.
+    """
+    return or_(
+        Supplier.name.ilike(query_pattern),
+        func.array_to_string(Supplier.tags_array, ',').ilike(query_pattern),
+        Supplier.id.in_(select(Product.supplier_id).where(Product.sku.ilike(query_pattern)))
+    )
+
+
 @router.get("/search")
 async def search_suppliers_intelligent(
     q: str = Query(..., min_length=2, description="Поисковый запрос"),
     limit: int = Query(50, le=200),
+    strategy: Optional[Literal["tiered", "exact", "full"]] = Query(
+        None, description="Стратегия поиска товаров, по умолчанию ES_SEARCH_STRATEGY"
+    ),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -28,12 +47,7 @@ async def search_suppliers_intelligent(
     if not settings.SEARCH_ELASTICSEARCH_ENABLED:
         query_pattern = f"%{q.lower()}%"
         result = await db.execute(
-            select(Supplier).where(
-                or_(
-                    Supplier.name.ilike(query_pattern),
-                    func.array_to_string(Supplier.tags_array, ',').ilike(query_pattern)
-                )
-            ).limit(limit)
+            select(Supplier).where(_supplier_match(query_pattern)).limit(limit)
         )
         suppliers = result.scalars().all()
 
@@ -63,7 +77,8 @@ async def search_suppliers_intelligent(
     es_response = await es_manager.search_products(
         query=q,
         filters={},
-        size=1000
+        size=1000,
+        strategy=strategy
     )
 
     supplier_stats = {}
@@ -97,12 +112,7 @@ async def search_suppliers_intelligent(
     if not supplier_stats:
         query_pattern = f"%{q.lower()}%"
         result = await db.execute(
-            select(Supplier).where(
-                or_(
-                    Supplier.name.ilike(query_pattern),
-                    func.array_to_string(Supplier.tags_array, ',').ilike(query_pattern)
-                )
-            ).limit(limit)
+            select(Supplier).where(_supplier_match(query_pattern)).limit(limit)
         )
         suppliers = result.scalars().all()
 
@@ -158,6 +168,7 @@ async def search_suppliers_intelligent(
         "total": len(results),
         "query": q,
         "search_mode": "elasticsearch",
+        "search_tier": es_response.get("search_tier"),
         "results": results[:limit]
     }
 
@@ -287,7 +298,11 @@ async def get_supplier_imports(supplier_id: UUID, db: AsyncSession = Depends(get
                 "total_products": imp.total_products or 0,
                 "parsed_products": imp.parsed_products or 0,
                 "created_at": imp.created_at.isoformat() if imp.created_at else None,
-                "error_message": imp.error_message
+                "error_message": imp.error_message,
+                "import_mode": imp.import_mode,
+                "added_products": imp.added_products or 0,
+                "changed_products": imp.changed_products or 0,
+                "removed_products": imp.removed_products or 0
             }
             for imp in imports
         ]
@@ -295,7 +310,13 @@ async def get_supplier_imports(supplier_id: UUID, db: AsyncSession = Depends(get
 
 @router.post("/{supplier_id}/upload-pricelist-new")
 async def upload_pricelist_new(supplier_id: UUID, file: UploadFile = File(...), db: AsyncSession = Depends(get_db)):
-    """Загрузить прайс-лист (новая версия)"""
+    """
+    Загрузить прайс-лист (новая версия)
+
+    Если файл побайтно совпадает с последним импортом поставщика, он не
+    сохраняется и не парсится повторно: возвращается прежний импорт со
+    статусом "unchanged".
+    """
     import os
     from datetime import datetime
 
@@ -311,15 +332,41 @@ async def upload_pricelist_new(supplier_id: UUID, file: UploadFile = File(...),
     filename = f"{timestamp}_{file.filename}"
     filepath = os.path.join(upload_dir, filename)
 
-    content = await file.read()
-    with open(filepath, "wb") as f:
-        f.write(content)
+    # Хеш считается по ходу записи; до проверки на дубликат файл лежит под
+    # временным именем
+    partial_path = f"{filepath}.part"
+    file_hash, file_size = await save_upload(file, partial_path)
+
+    # Сравниваем с последним неупавшим импортом: повторная загрузка старого
+    # файла после более нового - это откат, его нужно разобрать
+    result = await db.execute(
+        select(ProductImport)
+        .where(
+            ProductImport.supplier_id == supplier_id,
+            ProductImport.status != "failed"
+        )
+        .order_by(ProductImport.created_at.desc())
+        .limit(1)
+    )
+    last_import = result.scalar_one_or_none()
+    if last_import and last_import.file_hash == file_hash:
+        os.unlink(partial_path)
+        return {
+            "import_id": str(last_import.id),
+            "task_id": last_import.task_id,
+            "status": "unchanged",
+            "import_status": last_import.status,
+            "file_url": last_import.file_url
+        }
+
+    os.replace(partial_path, filepath)
 
     import_record = ProductImport(
         supplier_id=supplier_id,
         file_name=file.filename,
         file_url=filepath,
-        file_size=len(content),
+        file_size=file_size,
+        file_hash=file_hash,
         status="pending",
         total_products=0,
         parsed_products=0
@@ -329,7 +376,7 @@ async def upload_pricelist_new(supplier_id: UUID, file: UploadFile = File(...),
     await db.commit()
     await db.refresh(import_record)
 
-    task = parse_pricelist_task.delay(str(supplier_id), file.filename, content)
+    task = parse_pricelist_task.delay(str(supplier_id), file.filename, filepath)
     import_record.task_id = task.id
     await db.commit()
 
@@ -41,6 +41,7 @@ class Settings(BaseSettings):
     POSTGRES_MAX_OVERFLOW: int = Field(env="POSTGRES_MAX_OVERFLOW")
     POSTGRES_POOL_TIMEOUT: int = Field(env="POSTGRES_POOL_TIMEOUT")
     POSTGRES_POOL_RECYCLE: int = Field(env="POSTGRES_POOL_RECYCLE")
+    POSTGRES_COPY_BATCH_SIZE: int = Field(default=10000, env="POSTGRES_COPY_BATCH_SIZE")
     POSTGRES_REPLICA_ENABLED: bool = Field(env="POSTGRES_REPLICA_ENABLED")
     POSTGRES_REPLICA_HOST: Optional[str] = Field(env="POSTGRES_REPLICA_HOST")
     POSTGRES_REPLICA_PORT: int = Field(env="POSTGRES_REPLICA_PORT")
@@ -59,6 +60,7 @@ class Settings(BaseSettings):
     ES_SEARCH_STRATEGY: str = Field(env="ES_SEARCH_STRATEGY")
     ES_SEARCH_FUZZINESS: str = Field(env="ES_SEARCH_FUZZINESS")
     ES_SEARCH_MIN_SCORE: float = Field(env="ES_SEARCH_MIN_SCORE")
+    ES_SEARCH_TIER_MIN_HITS: int = Field(default=10, env="ES_SEARCH_TIER_MIN_HITS")
     ES_SEARCH_BOOST_EXACT_SKU: float = Field(env="ES_SEARCH_BOOST_EXACT_SKU")
     ES_SEARCH_BOOST_BRAND: float = Field(env="ES_SEARCH_BOOST_BRAND")
     ES_SEARCH_BOOST_SKU_PARTIAL: float = Field(env="ES_SEARCH_BOOST_SKU_PARTIAL")
@@ -66,6 +68,7 @@ class Settings(BaseSettings):
     ES_SEARCH_BOOST_NAME: float = Field(env="ES_SEARCH_BOOST_NAME")
     ES_SEARCH_MAX_RESULTS: int = Field(env="ES_SEARCH_MAX_RESULTS")
     ES_SEARCH_AGGREGATION_SIZE: int = Field(env="ES_SEARCH_AGGREGATION_SIZE")
+    ES_SUGGEST_SIZE: int = Field(default=10, env="ES_SUGGEST_SIZE")
     ES_BULK_SIZE: int = Field(env="ES_BULK_SIZE")
     ES_BULK_TIMEOUT: int = Field(env="ES_BULK_TIMEOUT")
     ES_REQUEST_TIMEOUT: int = Field(env="ES_REQUEST_TIMEOUT")
@@ -112,6 +115,7 @@ class Settings(BaseSettings):
     STORAGE_AUTO_CLEANUP_ENABLED: bool = Field(env="STORAGE_AUTO_CLEANUP_ENABLED")
     STORAGE_MAX_FILE_SIZE: int = Field(env="STORAGE_MAX_FILE_SIZE")
     STORAGE_MAX_EMAIL_ATTACHMENT_SIZE: int = Field(env="STORAGE_MAX_EMAIL_ATTACHMENT_SIZE")
+    STORAGE_MAX_REQUEST_SIZE: int = Field(default=209715200, env="STORAGE_MAX_REQUEST_SIZE")
 
     # Email IMAP
     EMAIL_IMAP_ENABLED: bool = Field(env="EMAIL_IMAP_ENABLED")
@@ -221,6 +225,9 @@ class Settings(BaseSettings):
     PARSING_DEFAULT_ENCODING: str = Field(env="PARSING_DEFAULT_ENCODING")
     PARSING_PDF_USE_OCR: bool = Field(env="PARSING_PDF_USE_OCR")
     PARSING_PDF_OCR_LANGUAGE: str = Field(env="PARSING_PDF_OCR_LANGUAGE")
+    PARSING_PDF_DPI: int = Field(default=300, env="PARSING_PDF_DPI")
+    PARSING_PDF_MAX_PAGES: int = Field(default=500, env="PARSING_PDF_MAX_PAGES")
+    PARSING_PDF_PAGE_TIMEOUT: int = Field(default=60, env="PARSING_PDF_PAGE_TIMEOUT")
     PARSING_COLUMN_DETECTION_MODE: str = Field(env="PARSING_COLUMN_DETECTION_MODE")
     PARSING_REQUIRED_COLUMNS: str = Field(env="PARSING_REQUIRED_COLUMNS")
     PARSING_NORMALIZE_BRANDS: bool = Field(env="PARSING_NORMALIZE_BRANDS")
@@ -237,6 +244,15 @@ class Settings(BaseSettings):
     PARSING_COLUMN_FUZZY_MATCHING: bool = Field(env="PARSING_COLUMN_FUZZY_MATCHING")
     PARSING_COLUMN_MIN_CONFIDENCE: float = Field(env="PARSING_COLUMN_MIN_CONFIDENCE")
     PARSING_COLUMN_USE_POSITION_HINTS: bool = Field(env="PARSING_COLUMN_USE_POSITION_HINTS")
+    PARSING_STREAMING_ENABLED: bool = Field(default=False, env="PARSING_STREAMING_ENABLED")
+    PARSING_STREAMING_CHUNK_SIZE: int = Field(default=5000, env="PARSING_STREAMING_CHUNK_SIZE")
+    PARSING_PIPELINE_QUEUE_SIZE: int = Field(default=2, env="PARSING_PIPELINE_QUEUE_SIZE")
+    PARSING_SHARD_ROWS: int = Field(default=50000, env="PARSING_SHARD_ROWS")
+    PARSING_LAYOUT_CACHE_ENABLED: bool = Field(default=True, env="PARSING_LAYOUT_CACHE_ENABLED")
+    PARSING_IMPORT_MODE: str = Field(default="differential", env="PARSING_IMPORT_MODE")
+    PARSING_SNAPSHOTS_ENABLED: bool = Field(default=True, env="PARSING_SNAPSHOTS_ENABLED")
+    PARSING_SNAPSHOT_COMPRESSION: str = Field(default="zstd", env="PARSING_SNAPSHOT_COMPRESSION")
+    PARSING_ARROW_STRINGS: bool = Field(default=True, env="PARSING_ARROW_STRINGS")
 
     # Search
     SEARCH_MODE: str = Field(env="SEARCH_MODE")
@@ -2,10 +2,32 @@ from elasticsearch import AsyncElasticsearch
 from elasticsearch.helpers import async_bulk
 from app.core.config import settings
 from typing import Dict, List, Any, Optional
+import asyncio
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
+# Версия маппинга индекса товаров. Индекс создаётся как
+# <ES_INDEX_PRODUCTS>_v<версия> за алиасом ES_INDEX_PRODUCTS, поиск и запись
+# идут через алиас. Если маппинг меняется несовместимо, версия повышается, а
+# данные переносятся в новый индекс migrate_products_index.
+# 1 - индекс без алиаса; 2 - контекст поставщика у name.suggest;
+# 3 - триграммы name.infix для поиска по части слова
+PRODUCTS_MAPPING_VERSION = 3
+
+# Длина n-грамм name.infix: запросы из более коротких слов токенов не дают
+INFIX_GRAM = 3
+
+# Стратегии search_products (ES_SEARCH_STRATEGY)
+SEARCH_STRATEGIES = ("tiered", "exact", "full")
+DEFAULT_SEARCH_STRATEGY = "tiered"
+# precise - прежнее значение по умолчанию в .env.example, до уровней поиска
+LEGACY_SEARCH_STRATEGIES = {"precise": "tiered"}
+
+# Опрос задачи _reindex при миграции индекса, секунды
+REINDEX_POLL_INTERVAL = 5
+
 
 class ElasticsearchManager:
     def __init__(self):
@@ -26,10 +48,13 @@ class ElasticsearchManager:
         
         self.client = AsyncElasticsearch(**es_config)
     
-    async def create_products_index(self):
-        """Create products index with mappings."""
-        index_name = settings.ES_INDEX_PRODUCTS
-        
+    @staticmethod
+    def versioned_index_name(version: int = PRODUCTS_MAPPING_VERSION) -> str:
+        """Concrete index behind the ES_INDEX_PRODUCTS alias."""
+        return f"{settings.ES_INDEX_PRODUCTS}_v{version}"
+
+    def _products_index_body(self) -> Dict[str, Any]:
+        """Mappings and settings of the products index."""
         mappings = {
             "properties": {
                 "supplier_id": {"type": "keyword"},
@@ -52,11 +77,22 @@ class ElasticsearchManager:
                     "analyzer": "russian_analyzer",
                     "fields": {
                         "exact": {"type": "keyword"},
-                        "suggest": {"type": "completion"},
+                        "suggest": {
+                            "type": "completion",
+                            "analyzer": "suggest_analyzer",
+                            # Подсказки фильтруются по поставщику
+                            "contexts": [
+                                {"name": "supplier", "type": "category", "path": "supplier_id"}
+                            ],
+                        },
                         "transliterated": {
                             "type": "text",
                             "analyzer": "transliteration_analyzer"
-                        }
+                        },
+                        "infix": {
+                            "type": "text",
+                            "analyzer": "infix_analyzer",
+                        },
                     },
                 },
                 "brand": {
@@ -121,7 +157,22 @@ class ElasticsearchManager:
                         ]
                     }
                 },
+                "tokenizer": {
+                    # Триграммы внутри слов: подстрока названия - это
+                    # совпадение всех триграмм запроса
+                    "infix_tokenizer": {
+                        "type": "ngram",
+                        "min_gram": INFIX_GRAM,
+                        "max_gram": INFIX_GRAM,
+                        "token_chars": ["letter", "digit"],
+                    },
+                },
                 "analyzer": {
+                    "infix_analyzer": {
+                        "type": "custom",
+                        "tokenizer": "infix_tokenizer",
+                        "filter": ["lowercase"],
+                    },
                     "russian_analyzer": {
                         "type": "custom",
                         "tokenizer": "standard",
@@ -136,6 +187,11 @@ class ElasticsearchManager:
                         "tokenizer": "standard",
                         "filter": ["lowercase", "sku_ngram"],
                     },
+                    "suggest_analyzer": {
+                        "type": "custom",
+                        "tokenizer": "standard",
+                        "filter": ["lowercase"],
+                    },
                     "transliteration_analyzer": {
                         "type": "custom",
                         "char_filter": ["transliteration_map"],
@@ -171,28 +227,144 @@ class ElasticsearchManager:
             },
         }
         
-        if await self.client.indices.exists(index=index_name):
-            logger.info(f"Index {index_name} already exists")
+        return {"mappings": mappings, "settings": settings_config}
+
+    async def products_index_version(self) -> Optional[int]:
+        """Mapping version of the index behind the alias, None if there is no index."""
+        alias = settings.ES_INDEX_PRODUCTS
+        if await self.client.indices.exists_alias(name=alias):
+            response = await self.client.indices.get_alias(name=alias)
+            index_name = next(iter(response.body))
+            _, _, version = index_name.rpartition("_v")
+            return int(version) if version.isdigit() else 1
+        if await self.client.indices.exists(index=alias):
+            # Индекс, созданный до версионирования: имя совпадает с алиасом
+            return 1
+        return None
+
+    async def create_products_index(self):
+        """Create products index with mappings."""
+        alias = settings.ES_INDEX_PRODUCTS
+
+        version = await self.products_index_version()
+        if version is not None:
+            if version < PRODUCTS_MAPPING_VERSION:
+                logger.warning(
+                    f"Index {alias} has mapping version {version}, current is "
+                    f"{PRODUCTS_MAPPING_VERSION}: run search_tasks.migrate_products_index"
+                )
+            else:
+                logger.info(f"Index {alias} already exists")
             return
-        
+
+        index_name = self.versioned_index_name()
         await self.client.indices.create(
             index=index_name,
-            mappings=mappings,
-            settings=settings_config,
+            aliases={alias: {}},
+            **self._products_index_body(),
+        )
+        logger.info(f"Created index {index_name} with alias {alias}")
+
+    async def migrate_products_index(self) -> Dict[str, Any]:
+        """
+        Переносит товары в индекс текущей версии маппинга.
+
+        Новый индекс заполняется серверным _reindex из текущего, затем алиас
+        атомарно переключается на него, а старый индекс удаляется. Индекс
+        первой версии называется так же, как алиас, поэтому его удаление и
+        создание алиаса - два запроса, между которыми поиск недоступен.
+        Документы, записанные в старый индекс во время переноса, теряются:
+        миграцию запускают без активных импортов (или после неё -
+        search_tasks.full_reindex).
+        """
+        alias = settings.ES_INDEX_PRODUCTS
+        version = await self.products_index_version()
+        if version is None:
+            await self.create_products_index()
+            return {"status": "created", "version": PRODUCTS_MAPPING_VERSION}
+        if version >= PRODUCTS_MAPPING_VERSION:
+            return {"status": "up_to_date", "version": version}
+
+        old_index = alias if version == 1 else self.versioned_index_name(version)
+        new_index = self.versioned_index_name()
+        if await self.client.indices.exists(index=new_index):
+            # Остаток прерванной миграции
+            await self.client.indices.delete(index=new_index)
+
+        body = self._products_index_body()
+        index_settings = body["settings"]
+        # На время переноса - без реплик и обновлений поиска
+        await self.client.indices.create(
+            index=new_index,
+            mappings=body["mappings"],
+            settings={**index_settings, "number_of_replicas": 0, "refresh_interval": "-1"},
         )
-        logger.info(f"Created index {index_name}")
+
+        response = await self.client.reindex(
+            source={"index": old_index},
+            dest={"index": new_index},
+            wait_for_completion=False,
+        )
+        task_id = response["task"]
+        while True:
+            task = await self.client.tasks.get(task_id=task_id)
+            if task.get("completed"):
+                break
+            status = task["task"]["status"]
+            logger.info(f"Reindex {old_index} -> {new_index}: {status.get('created', 0)}/{status.get('total', 0)}")
+            await asyncio.sleep(REINDEX_POLL_INTERVAL)
+
+        result = task.get("response", {})
+        if task.get("error") or result.get("failures"):
+            await self.client.indices.delete(index=new_index)
+            raise RuntimeError(f"Reindex {old_index} -> {new_index} failed: {task.get('error') or result['failures'][:3]}")
+
+        await self.client.indices.put_settings(
+            index=new_index,
+            settings={
+                "number_of_replicas": index_settings["number_of_replicas"],
+                "refresh_interval": index_settings["refresh_interval"],
+            },
+        )
+        await self.client.indices.refresh(index=new_index)
+
+        if version == 1:
+            await self.client.indices.delete(index=old_index)
+            await self.client.indices.put_alias(index=new_index, name=alias)
+        else:
+            await self.client.indices.update_aliases(actions=[
+                {"remove": {"index": old_index, "alias": alias}},
+                {"add": {"index": new_index, "alias": alias}},
+            ])
+            await self.client.indices.delete(index=old_index)
+
+        logger.info(f"Migrated {result.get('created', 0)} products from {old_index} to {new_index}")
+        return {
+            "status": "migrated",
+            "from_version": version,
+            "version": PRODUCTS_MAPPING_VERSION,
+            "documents": result.get("created", 0),
+        }
     
+    @staticmethod
+    def product_document_id(supplier_id: str, product: Dict[str, Any], index: int) -> str:
+        """Document id of a product indexed by bulk_index_products (full imports)."""
+        return f"{supplier_id}_{product.get('sku', '')}_{index}"
+
     async def bulk_index_products(
-        self, products: List[Dict[str, Any]], supplier_id: str
+        self, products: List[Dict[str, Any]], supplier_id: str, start_index: int = 0
     ) -> Dict[str, int]:
-        """Bulk index products to Elasticsearch."""
+        """Bulk index products to Elasticsearch.
+
+        start_index keeps document ids unique when a file is indexed in batches.
+        """
         actions = [
             {
                 "_index": settings.ES_INDEX_PRODUCTS,
-                "_id": f"{supplier_id}_{product.get('sku', '')}_{i}",
+                "_id": self.product_document_id(supplier_id, product, i),
                 "_source": product,
             }
-            for i, product in enumerate(products)
+            for i, product in enumerate(products, start=start_index)
         ]
         
         success, failed = await async_bulk(
@@ -208,6 +380,54 @@ class ElasticsearchManager:
         
         return {"success": success, "failed": failed}
     
+    async def index_products_by_id(self, documents: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
+        """Index products under explicit ids (PostgreSQL product ids).
+
+        Existing documents with the same id are overwritten, so the same call
+        serves both new and changed products of a differential import.
+        """
+        actions = [
+            {
+                "_index": settings.ES_INDEX_PRODUCTS,
+                "_id": doc_id,
+                "_source": document,
+            }
+            for doc_id, document in documents.items()
+        ]
+        if not actions:
+            return {"success": 0, "failed": 0}
+
+        success, failed = await async_bulk(
+            self.client,
+            actions,
+            chunk_size=settings.ES_BULK_SIZE,
+            request_timeout=settings.ES_BULK_TIMEOUT,
+        )
+        return {"success": success, "failed": failed}
+
+    async def delete_products_by_id(self, ids: List[str]) -> int:
+        """Delete products by document id, ignoring ids that are not indexed."""
+        actions = [
+            {
+                "_op_type": "delete",
+                "_index": settings.ES_INDEX_PRODUCTS,
+                "_id": doc_id,
+            }
+            for doc_id in ids
+        ]
+        if not actions:
+            return 0
+
+        success, _ = await async_bulk(
+            self.client,
+            actions,
+            chunk_size=settings.ES_BULK_SIZE,
+            request_timeout=settings.ES_BULK_TIMEOUT,
+            raise_on_error=False,
+        )
+        logger.info(f"Deleted {success} products by id")
+        return success
+
     async def delete_supplier_products(self, supplier_id: str) -> int:
         """Delete all products for a supplier."""
         response = await self.client.delete_by_query(
@@ -224,6 +444,7 @@ class ElasticsearchManager:
         query: str,
         filters: Optional[Dict[str, Any]] = None,
         size: int = 1000,
+        strategy: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         ИНТЕЛЛЕКТУАЛЬНЫЙ ПОИСК с максимальными возможностями:
@@ -231,11 +452,95 @@ class ElasticsearchManager:
         - Стемминг (склонения и окончания)
         - Транслитерация (английская раскладка)
         - N-gram поиск по SKU
-        - Wildcard для частичного совпадения
+        - Триграммы названия для частичного совпадения
         - Phrase matching для точных фраз
+
+        strategy (по умолчанию ES_SEARCH_STRATEGY):
+        - tiered - сначала точный уровень (_exact_clauses); если он нашёл
+          меньше ES_SEARCH_TIER_MIN_HITS товаров со score не ниже
+          ES_SEARCH_MIN_SCORE, запрос повторяется полным набором условий;
+        - exact - только точный уровень;
+        - full - сразу полный набор условий (_full_clauses).
+
+        В ответе search_tier - уровень, который дал результат: exact или full.
         """
-        
-        should_clauses = [
+        strategy = self._resolve_strategy(strategy or settings.ES_SEARCH_STRATEGY)
+
+        filter_clauses = self._filter_clauses(filters)
+
+        if strategy != "full":
+            response = await self._search(self._exact_clauses(query), filter_clauses, size)
+            found = response["hits"]["total"]["value"]
+            if strategy == "exact" or found >= settings.ES_SEARCH_TIER_MIN_HITS:
+                return {**response.body, "search_tier": "exact"}
+            logger.debug(f"Exact tier found {found} products for {query!r}, escalating to full search")
+
+        response = await self._search(self._full_clauses(query), filter_clauses, size)
+        return {**response.body, "search_tier": "full"}
+
+    @staticmethod
+    def _resolve_strategy(strategy: str) -> str:
+        """Стратегия поиска с учётом прежних имён; неизвестная - по умолчанию."""
+        strategy = LEGACY_SEARCH_STRATEGIES.get(strategy, strategy)
+        if strategy not in SEARCH_STRATEGIES:
+            logger.warning(f"Unknown search strategy {strategy!r}, using {DEFAULT_SEARCH_STRATEGY}")
+            return DEFAULT_SEARCH_STRATEGY
+        return strategy
+
+    def _exact_clauses(self, query: str) -> List[Dict[str, Any]]:
+        """
+        Точный уровень поиска: только поиск терминов, без fuzzy-расширений.
+
+        Точный SKU, точный бренд, фраза в названии и префиксы SKU и
+        названия - покрывают поиск по артикулу и по началу названия.
+        """
+        return [
+            {
+                "term": {
+                    "sku": {
+                        "value": query.upper(),
+                        "boost": settings.ES_SEARCH_BOOST_EXACT_SKU,
+                    }
+                }
+            },
+            {
+                "prefix": {
+                    "sku": {
+                        "value": query,
+                        "case_insensitive": True,
+                        "boost": settings.ES_SEARCH_BOOST_SKU_PARTIAL,
+                    }
+                }
+            },
+            {
+                "term": {
+                    "brand": {
+                        "value": query.lower(),
+                        "boost": settings.ES_SEARCH_BOOST_BRAND,
+                    }
+                }
+            },
+            {
+                "match_phrase": {
+                    "name": {
+                        "query": query,
+                        "boost": settings.ES_SEARCH_BOOST_NAME * 2,
+                    }
+                }
+            },
+            {
+                "match_phrase_prefix": {
+                    "name": {
+                        "query": query,
+                        "boost": settings.ES_SEARCH_BOOST_NAME,
+                    }
+                }
+            },
+        ]
+
+    def _full_clauses(self, query: str) -> List[Dict[str, Any]]:
+        """Полный набор условий поиска, включая fuzzy, транслитерацию и raw_text."""
+        return [
             # 1. ТОЧНОЕ совпадение SKU (максимальный приоритет)
             {
                 "term": {
@@ -271,7 +576,7 @@ class ElasticsearchManager:
                 "match": {
                     "brand.text": {
                         "query": query,
-                        "fuzziness": "AUTO",
+                        "fuzziness": settings.ES_SEARCH_FUZZINESS,
                         "boost": settings.ES_SEARCH_BOOST_BRAND * 0.8,
                     }
                 }
@@ -282,7 +587,7 @@ class ElasticsearchManager:
                 "match": {
                     "name": {
                         "query": query,
-                        "fuzziness": "AUTO",
+                        "fuzziness": settings.ES_SEARCH_FUZZINESS,
                         "operator": "or",
                         "boost": settings.ES_SEARCH_BOOST_NAME,
                     }
@@ -304,7 +609,7 @@ class ElasticsearchManager:
                 "match": {
                     "name.transliterated": {
                         "query": query,
-                        "fuzziness": "AUTO",
+                        "fuzziness": settings.ES_SEARCH_FUZZINESS,
                         "boost": settings.ES_SEARCH_BOOST_NAME * 0.9,
                     }
                 }
@@ -315,7 +620,7 @@ class ElasticsearchManager:
                 "match": {
                     "tags": {
                         "query": query,
-                        "fuzziness": "AUTO",
+                        "fuzziness": settings.ES_SEARCH_FUZZINESS,
                         "boost": settings.ES_SEARCH_BOOST_TAGS,
                     }
                 }
@@ -326,34 +631,58 @@ class ElasticsearchManager:
                 "match": {
                     "category.text": {
                         "query": query,
-                        "fuzziness": "AUTO",
+                        "fuzziness": settings.ES_SEARCH_FUZZINESS,
                         "boost": 2.0,
                     }
                 }
             },
             
-            # 10. WILDCARD поиск для частичного совпадения
-            {
-                "wildcard": {
-                    "name": {
-                        "value": f"*{query.lower()}*",
-                        "boost": 1.0,
-                    }
-                }
-            },
+            # 10. ЧАСТЬ СЛОВА - все триграммы запроса в названии
+            self._infix_clause(query),
             
             # 11. RAW TEXT - полнотекстовый поиск
             {
                 "match": {
                     "raw_text": {
                         "query": query,
-                        "fuzziness": "AUTO",
+                        "fuzziness": settings.ES_SEARCH_FUZZINESS,
                         "boost": 1.5,
                     }
                 }
             },
         ]
-        
+
+    @staticmethod
+    def _infix_clause(query: str) -> Dict[str, Any]:
+        """
+        Поиск по части слова в названии.
+
+        Обычно - совпадение всех триграмм запроса в name.infix (wildcard
+        *query* обходит весь словарь терминов). Запрос без слов длиной от
+        INFIX_GRAM символов ("M8", "ш") триграмм не даёт - для него
+        остаётся wildcard.
+        """
+        if any(len(word) >= INFIX_GRAM for word in re.findall(r"\w+", query)):
+            return {
+                "match": {
+                    "name.infix": {
+                        "query": query,
+                        "operator": "and",
+                        "boost": 1.0,
+                    }
+                }
+            }
+        return {
+            "wildcard": {
+                "name": {
+                    "value": f"*{query.lower()}*",
+                    "boost": 1.0,
+                }
+            }
+        }
+
+    def _filter_clauses(self, filters: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Фильтры поиска: поставщики, бренды, категории, цена."""
         filter_clauses = []
         if filters:
             if filters.get("supplier_ids"):
@@ -375,25 +704,116 @@ class ElasticsearchManager:
                 if filters.get("max_price"):
                     price_range["lte"] = filters["max_price"]
                 filter_clauses.append({"range": {"price": price_range}})
-        
+        return filter_clauses
+
+    async def _search(
+        self,
+        should_clauses: List[Dict[str, Any]],
+        filter_clauses: List[Dict[str, Any]],
+        size: int,
+    ):
         search_body = {
             "query": {
                 "bool": {
                     "should": should_clauses,
                     "minimum_should_match": 1,
-                    "filter": filter_clauses if filter_clauses else [],
+                    "filter": filter_clauses,
                 }
             },
             "min_score": settings.ES_SEARCH_MIN_SCORE,
             "size": size,
         }
-        
+
+        return await self.client.search(
+            index=settings.ES_INDEX_PRODUCTS, body=search_body
+        )
+
+    async def suggest_products(
+        self,
+        prefix: str,
+        supplier_ids: Optional[List[str]] = None,
+        size: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Подсказки при наборе: названия, бренды и артикулы по префиксу.
+
+        Названия - completion suggester по name.suggest (FST в памяти, без
+        поиска по индексу), с фильтром по контексту поставщика. Бренды и
+        артикулы - prefix-запросы по keyword-полям в том же запросе, их
+        значения собираются агрегациями. Документы целиком не читаются.
+        """
+        size = size or settings.ES_SUGGEST_SIZE
+        brand_prefix = {"prefix": {"brand": {"value": prefix.lower()}}}
+        sku_prefix = {"prefix": {"sku": {"value": prefix, "case_insensitive": True}}}
+
+        completion = {
+            "field": "name.suggest",
+            "size": size,
+            "skip_duplicates": True,
+        }
+        filter_clauses = []
+        if supplier_ids:
+            supplier_ids = [str(supplier_id) for supplier_id in supplier_ids]
+            completion["contexts"] = {"supplier": supplier_ids}
+            filter_clauses.append({"terms": {"supplier_id": supplier_ids}})
+
+        search_body = {
+            "size": 0,
+            "_source": False,
+            "track_total_hits": False,
+            "query": {
+                "bool": {
+                    "should": [brand_prefix, sku_prefix],
+                    "minimum_should_match": 1,
+                    "filter": filter_clauses,
+                }
+            },
+            "aggs": {
+                "brands": {
+                    "filter": brand_prefix,
+                    "aggs": {"values": {"terms": {"field": "brand", "size": size}}},
+                },
+                "skus": {
+                    "filter": sku_prefix,
+                    "aggs": {
+                        "values": {
+                            "terms": {"field": "sku", "size": size},
+                            "aggs": {
+                                "product": {"top_hits": {"size": 1, "_source": ["name"]}}
+                            },
+                        }
+                    },
+                },
+            },
+            "suggest": {
+                "names": {"prefix": prefix, "completion": completion}
+            },
+        }
+
         response = await self.client.search(
             index=settings.ES_INDEX_PRODUCTS, body=search_body
         )
-        
-        return response
-    
+
+        aggregations = response.get("aggregations", {})
+        options = response.get("suggest", {}).get("names", [{}])[0].get("options", [])
+        skus = []
+        for bucket in aggregations.get("skus", {}).get("values", {}).get("buckets", []):
+            hits = bucket["product"]["hits"]["hits"]
+            skus.append({
+                "sku": bucket["key"],
+                "name": hits[0]["_source"].get("name") if hits else None,
+            })
+
+        return {
+            "names": [option["text"] for option in options],
+            "brands": [
+                bucket["key"]
+                for bucket in aggregations.get("brands", {}).get("values", {}).get("buckets", [])
+            ],
+            "skus": skus,
+            "took_ms": response.get("took", 0),
+        }
+
     async def close(self):
         """Close Elasticsearch connection."""
         if self.client:
@@ -12,6 +12,7 @@ from app.api import auth, suppliers, search, admin, campaigns, managers, supplie
 from app.api import price_requests
 from app.middleware.audit import AuditMiddleware
 from app.middleware.rate_limit import RateLimitMiddleware
+from app.middleware.upload_limit import UploadSizeLimitMiddleware
 
 logging.basicConfig(
     level=getattr(logging, settings.LOG_LEVEL),
@@ -46,6 +47,11 @@ app = FastAPI(
     debug=settings.DEBUG,
 )
 
+# Размер загрузок проверяется до приёма тела запроса. Добавляется раньше CORS:
+# middleware, добавленный позже, оборачивает предыдущие, и ответ 413 проходит
+# через CORSMiddleware с его заголовками
+app.add_middleware(UploadSizeLimitMiddleware)
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
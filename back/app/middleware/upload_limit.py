@@ -0,0 +1,60 @@
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Ограничивает размер тела multipart-запросов (загрузка файлов).
+
+    Starlette сохраняет файлы формы целиком до вызова обработчика, поэтому
+    проверка в save_upload срабатывает уже после приёма всего тела. Здесь
+    запрос с Content-Length больше max_size (по умолчанию
+    STORAGE_MAX_REQUEST_SIZE) отклоняется с HTTP 413 до чтения тела, а тело
+    без Content-Length считается по мере приёма и обрывается на первой
+    лишней порции.
+    """
+
+    def __init__(self, app: ASGIApp, max_size: int = None):
+        self.app = app
+        self.max_size = max_size or settings.STORAGE_MAX_REQUEST_SIZE
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        if not headers.get("content-type", "").startswith("multipart/form-data"):
+            await self.app(scope, receive, send)
+            return
+
+        content_length = headers.get("content-length", "")
+        if content_length.isdigit() and int(content_length) > self.max_size:
+            logger.warning(f"Rejected {scope['path']}: Content-Length {content_length} > {self.max_size}")
+            response = JSONResponse(status_code=413, content={"detail": self._detail()})
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_size:
+                    logger.warning(f"Rejected {scope['path']}: body larger than {self.max_size}")
+                    # FastAPI пробрасывает HTTPException из разбора формы как есть
+                    raise HTTPException(status_code=413, detail=self._detail())
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    def _detail(self) -> str:
+        return f"Запрос больше допустимых {self.max_size // (1024 * 1024)} МБ"
@@ -49,6 +49,7 @@ class Product(BaseModel):
     vendor_code = Column(String(100))
     raw_text = Column(Text)
     row_number = Column(Integer)
+    content_hash = Column(String(40))
     
     # Relationships
     supplier = relationship("Supplier", back_populates="products")
@@ -23,6 +23,7 @@ class ProductImport(BaseModel):
     file_name = Column(String(500))
     file_size = Column(Integer)
     file_format = Column(String(20))
+    file_hash = Column(String(64), index=True)
     
     # Статус
     status = Column(String(50), default='pending', index=True)
@@ -34,6 +35,10 @@ class ProductImport(BaseModel):
     # НОВЫЕ ПОЛЯ
     task_id = Column(String(255))
     detected_columns = Column(JSON)
+    column_profile = Column(JSON)
+    header_fingerprint = Column(String(64), index=True)
+    header_row = Column(Integer)
+    sheet_name = Column(String(255))
     generated_tags = Column(JSON)
     total_rows = Column(Integer, default=0)
     processed_rows = Column(Integer, default=0)
@@ -41,6 +46,12 @@ class ProductImport(BaseModel):
     failed_rows = Column(Integer, default=0)
     indexed_to_es = Column(Integer, default=0)
     es_indexed_count = Column(Integer, default=0)
+    import_mode = Column(String(20))
+    added_products = Column(Integer, default=0)
+    changed_products = Column(Integer, default=0)
+    removed_products = Column(Integer, default=0)
+    # Каталог Parquet-снимка нормализованных товаров импорта
+    snapshot_path = Column(String(1000))
 
     # Relationships
     supplier = relationship("Supplier", back_populates="product_imports")
@@ -13,6 +13,7 @@ class SupplierRequest(BaseModel):
     
     pricelist_filenames = Column(ARRAY(String), nullable=True)
     pricelist_urls = Column(ARRAY(String), nullable=True)
+    pricelist_hashes = Column(ARRAY(String), nullable=True)
     
     contact_email = Column(String(255), nullable=True)
     contact_phone = Column(String(50), nullable=True)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Literal, Optional, List
 from uuid import UUID
 
 
@@ -12,6 +12,8 @@ class SearchRequest(BaseModel):
     max_price: Optional[float] = None
     status_filter: Optional[List[str]] = None
     limit: int = Field(default=100, ge=1, le=1000)
+    # None - ES_SEARCH_STRATEGY
+    strategy: Optional[Literal["tiered", "exact", "full"]] = None
 
 
 class SearchResponse(BaseModel):
@@ -20,3 +22,17 @@ class SearchResponse(BaseModel):
     suppliers: List[dict]
     query: str
     search_time_ms: float
+    search_tier: Optional[str] = None
+
+
+class SkuSuggestion(BaseModel):
+    sku: str
+    name: Optional[str] = None
+
+
+class SuggestResponse(BaseModel):
+    query: str
+    names: List[str]
+    brands: List[str]
+    skus: List[SkuSuggestion]
+    took_ms: int
@@ -18,6 +18,7 @@ class SupplierRequestResponse(BaseModel):
     data: dict
     pricelist_filenames: Optional[List[str]] = None
     pricelist_urls: Optional[List[str]] = None
+    pricelist_hashes: Optional[List[str]] = None
     contact_email: Optional[str] = None
     contact_phone: Optional[str] = None
     contact_telegram: Optional[str] = None
@@ -0,0 +1,90 @@
+"""
+Catalog Diff Service
+Сравнение разобранного прайс-листа с текущим каталогом поставщика
+"""
+from collections import defaultdict, deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+import hashlib
+import json
+
+# Поля товара, изменение которых означает изменение строки каталога
+HASHED_FIELDS = ("sku", "name", "brand", "category", "price", "unit", "stock", "raw_text")
+
+
+def product_key(sku: Optional[str], name: Optional[str]) -> str:
+    """Ключ сопоставления: артикул, а для товаров без артикула - наименование."""
+    if sku:
+        return f"sku:{sku}"
+    return f"name:{name or ''}"
+
+
+def product_hash(product: Dict) -> str:
+    """Хеш нормализованных полей товара."""
+    payload = json.dumps(
+        [product.get(field) for field in HASHED_FIELDS],
+        ensure_ascii=False,
+        default=str
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class CatalogDiff:
+    """
+    Сопоставляет товары нового файла с каталогом поставщика по ключу.
+
+    Товары можно подавать порциями (потоковый разбор). Повторяющиеся ключи
+    (один артикул в нескольких строках) сопоставляются по порядку. После
+    последней порции removed_ids() возвращает товары каталога, которых в
+    файле не оказалось.
+    """
+
+    def __init__(self, existing: Iterable[Tuple[UUID, str, Optional[str]]]):
+        """existing - (id, ключ, хеш) товаров текущего каталога."""
+        self._existing: Dict[str, Deque[Tuple[UUID, Optional[str]]]] = defaultdict(deque)
+        for product_id, key, content_hash in existing:
+            self._existing[key].append((product_id, content_hash))
+
+        self.added = 0
+        self.changed = 0
+        self.unchanged = 0
+
+    def classify(
+        self,
+        products: List[Dict]
+    ) -> Tuple[List[Tuple[int, Dict, str]], List[Tuple[int, UUID, Dict, str]], List[Tuple[int, UUID, str]]]:
+        """
+        Делит порцию на новые, изменённые и неизменённые товары.
+
+        Возвращает (added, changed, unchanged): added - [(позиция в порции,
+        товар, хеш)], changed - [(позиция, id в каталоге, товар, хеш)],
+        unchanged - [(позиция, id в каталоге, хеш)].
+        """
+        added = []
+        changed = []
+        unchanged = []
+        for position, product in enumerate(products):
+            content_hash = product_hash(product)
+            candidates = self._existing.get(product_key(product.get("sku"), product.get("name")))
+            if not candidates:
+                added.append((position, product, content_hash))
+                continue
+
+            product_id, existing_hash = candidates.popleft()
+            if existing_hash == content_hash:
+                unchanged.append((position, product_id, content_hash))
+            else:
+                changed.append((position, product_id, product, content_hash))
+
+        self.added += len(added)
+        self.changed += len(changed)
+        self.unchanged += len(unchanged)
+        return added, changed, unchanged
+
+    def removed_ids(self) -> List[UUID]:
+        """Товары каталога, не встретившиеся в файле."""
+        return [
+            product_id
+            for candidates in self._existing.values()
+            for product_id, _ in candidates
+        ]
@@ -0,0 +1,202 @@
+"""
+Catalog Snapshot Service
+Снимки нормализованных товаров импорта в Parquet
+"""
+from typing import Dict, Iterator, List, Optional, Sequence
+import logging
+import os
+import shutil
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.models.product_import import ProductImport, ImportStatus
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DIR_NAME = "snapshots"
+
+# doc_id - id документа в ES: id товара в PostgreSQL для дифференциального
+# импорта, {supplier_id}_{sku}_{i} для полного
+SNAPSHOT_SCHEMA = pa.schema([
+    ("row_number", pa.int64()),
+    ("doc_id", pa.string()),
+    ("sku", pa.string()),
+    ("name", pa.string()),
+    ("brand", pa.string()),
+    ("category", pa.string()),
+    ("price", pa.float64()),
+    ("unit", pa.string()),
+    ("stock", pa.int64()),
+    ("raw_text", pa.string()),
+    ("content_hash", pa.string()),
+])
+
+# Поля товара, которые хранятся в снимке и уходят в документ ES
+SNAPSHOT_PRODUCT_FIELDS = ("sku", "name", "brand", "category", "price", "unit", "stock", "raw_text")
+
+SNAPSHOT_READ_BATCH_SIZE = 10000
+
+
+def snapshot_dir(file_path: str, import_id) -> str:
+    """Каталог снимка импорта рядом с загруженным файлом: <dir>/snapshots/<import_id>."""
+    return os.path.join(os.path.dirname(os.path.abspath(file_path)), SNAPSHOT_DIR_NAME, str(import_id))
+
+
+class SnapshotWriter:
+    """
+    Пишет часть снимка импорта: один Parquet-файл, порция товаров - группа строк.
+
+    Части лежат в каталоге снимка как part-<первая строка>.parquet: обычный
+    импорт пишет одну часть, шарды - каждый свою. Пока часть пишется, файл
+    называется с точки и не виден при чтении каталога; close() переименовывает
+    его атомарно, abort() удаляет.
+    """
+
+    def __init__(self, directory: str, part: int = 0, compression: Optional[str] = None):
+        self.directory = directory
+        self.path = os.path.join(directory, f"part-{part:010d}.parquet")
+        self._partial_path = os.path.join(directory, f".part-{part:010d}.parquet")
+        self.compression = compression or settings.PARSING_SNAPSHOT_COMPRESSION
+        self._writer: Optional[pq.ParquetWriter] = None
+        self.rows = 0
+
+    def write(
+        self,
+        products: Sequence[Dict],
+        first_row: int,
+        doc_ids: Sequence[str],
+        content_hashes: Optional[Sequence[Optional[str]]] = None
+    ):
+        """Добавляет порцию товаров; first_row - номер строки первого товара."""
+        if not products:
+            return
+
+        columns = {
+            "row_number": range(first_row, first_row + len(products)),
+            "doc_id": doc_ids,
+        }
+        for field in SNAPSHOT_PRODUCT_FIELDS:
+            columns[field] = [product.get(field) for product in products]
+        columns["content_hash"] = content_hashes or [None] * len(products)
+        table = pa.Table.from_pydict(
+            {name: list(values) for name, values in columns.items()}, schema=SNAPSHOT_SCHEMA
+        )
+
+        if self._writer is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._writer = pq.ParquetWriter(self._partial_path, SNAPSHOT_SCHEMA, compression=self.compression)
+        self._writer.write_table(table)
+        self.rows += len(products)
+
+    def close(self) -> Optional[str]:
+        """Завершает часть; возвращает путь или None, если товаров не было."""
+        if self._writer is None:
+            return None
+        self._writer.close()
+        self._writer = None
+        os.replace(self._partial_path, self.path)
+        logger.info(f"Snapshot part {self.path}: {self.rows} products")
+        return self.path
+
+    def abort(self):
+        """Удаляет недописанную часть."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        try:
+            os.unlink(self._partial_path)
+        except OSError:
+            pass
+
+
+def open_snapshot(path: str) -> ds.Dataset:
+    """Снимок импорта как Arrow Dataset (все готовые части каталога)."""
+    return ds.dataset(path, format="parquet", schema=SNAPSHOT_SCHEMA)
+
+
+def read_columns(path: str, columns: Optional[List[str]] = None) -> pa.Table:
+    """
+    Колонки снимка в порядке строк файла.
+
+    Читаются только запрошенные колонки; результат - таблица Arrow, колонки
+    которой используются напрямую, без DataFrame и ORM-объектов.
+    """
+    table = open_snapshot(path).to_table(columns=columns)
+    if "row_number" in table.column_names:
+        table = table.sort_by("row_number")
+    return table
+
+
+def iter_products(
+    path: str,
+    columns: Optional[List[str]] = None,
+    batch_size: int = SNAPSHOT_READ_BATCH_SIZE
+) -> Iterator[List[Dict]]:
+    """Товары снимка порциями словарей (пустые поля опущены, как при разборе)."""
+    scanner = open_snapshot(path).scanner(columns=columns, batch_size=batch_size)
+    for batch in scanner.to_batches():
+        if batch.num_rows:
+            yield [
+                {key: value for key, value in row.items() if value is not None}
+                for row in batch.to_pylist()
+            ]
+
+
+def remove_snapshot(path: Optional[str]):
+    """Удаляет каталог снимка, если он есть."""
+    if path and os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+        logger.info(f"Removed snapshot {path}")
+
+
+async def supplier_snapshot_chain(
+    session,
+    supplier_id,
+    exclude_import_id=None
+) -> Optional[List[ProductImport]]:
+    """
+    Импорты, снимки которых вместе составляют текущий каталог поставщика.
+
+    Дифференциальный импорт приводит каталог к содержимому файла, полный -
+    добавляет товары к каталогу. Поэтому каталог - это последний
+    дифференциальный импорт и все полные после него (или все полные, если
+    дифференциальных не было). Возвращает их от старых к новым либо None,
+    если у какого-то из них нет снимка - тогда каталог читается из PostgreSQL.
+
+    Импорт, упавший или ещё идущий после начала цепочки, мог записать часть
+    товаров в PostgreSQL и ES, которых нет в снимках, - тогда тоже None.
+    exclude_import_id - текущий импорт, который запрашивает каталог.
+    """
+    result = await session.execute(
+        select(ProductImport)
+        .where(
+            ProductImport.supplier_id == supplier_id,
+            ProductImport.status != ImportStatus.PENDING
+        )
+        .order_by(ProductImport.created_at.desc())
+    )
+
+    chain = []
+    for import_record in result.scalars():
+        if import_record.id == exclude_import_id:
+            continue
+        if import_record.status != ImportStatus.COMPLETED:
+            logger.info(
+                f"Import {import_record.id} of supplier {supplier_id} is {import_record.status}, "
+                f"catalog is not covered by snapshots"
+            )
+            return None
+        if not import_record.snapshot_path or not os.path.isdir(import_record.snapshot_path):
+            return None
+        chain.append(import_record)
+        if import_record.import_mode == "differential":
+            break
+
+    if not chain:
+        return None
+    chain.reverse()
+    return chain
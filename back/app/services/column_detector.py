@@ -4,7 +4,8 @@ Column Detection Service
 """
 from typing import Dict, List, Optional, Tuple
 import re
-from difflib import SequenceMatcher
+from collections import Counter, deque
+import numpy as np
 import pandas as pd
 from app.core.config import settings
 import logging
@@ -15,18 +16,61 @@ logger = logging.getLogger(__name__)
 class ColumnDetector:
     """Детектор колонок с поддержкой синонимов и нечеткого поиска."""
     
+    # Максимальный бонус за позицию колонки (см. _get_position_bonus)
+    MAX_POSITION_BONUS = 0.1
+    SUBSTRING_SCORE = 0.9
+    MATCH_CACHE_SIZE = 10000
+    SKU_PATTERN = r'^[A-Za-z0-9\-_]+$'
+    
     def __init__(self):
         self.synonyms_map = settings.COLUMN_SYNONYMS_MAP
         self.fuzzy_matching = settings.PARSING_COLUMN_FUZZY_MATCHING
         self.min_confidence = settings.PARSING_COLUMN_MIN_CONFIDENCE
         self.use_position_hints = settings.PARSING_COLUMN_USE_POSITION_HINTS
+        self._build_synonym_index()
+        self._match_cache: Dict[str, Dict[str, Tuple[bool, bool, float]]] = {}
+    
+    def _build_synonym_index(self):
+        """
+        Предкомпилирует синонимы один раз при создании детектора.
+    
+        - exact_index: нормализованный синоним -> типы колонок
+        - substring_automaton: Aho-Corasick по всем синонимам (синоним внутри названия)
+        - infix_index: все подстроки синонимов -> типы (название внутри синонима)
+        - length_buckets: синонимы по длине (с частотами символов) для нечеткого поиска
+        """
+        self.exact_index: Dict[str, set] = {}
+        self.infix_index: Dict[str, set] = {}
+        self.length_buckets: Dict[int, List[Tuple[str, str, Counter]]] = {}
+        self.substring_automaton = _SubstringAutomaton()
+    
+        for column_type, synonyms in self.synonyms_map.items():
+            for synonym in synonyms:
+                normalized = self._normalize_column_name(synonym)
+                if not normalized:
+                    continue
+                self.exact_index.setdefault(normalized, set()).add(column_type)
+                self.substring_automaton.add(normalized, column_type)
+                for start in range(len(normalized)):
+                    for end in range(start + 1, len(normalized) + 1):
+                        self.infix_index.setdefault(normalized[start:end], set()).add(column_type)
+                self.length_buckets.setdefault(len(normalized), []).append(
+                    (normalized, column_type, Counter(normalized))
+                )
+    
+        self.substring_automaton.build()
     
-    def detect_columns(self, df: pd.DataFrame) -> Dict[str, str]:
+    def detect_columns(
+        self,
+        df: pd.DataFrame,
+        profile: Optional[Dict[str, Dict[str, float]]] = None
+    ) -> Dict[str, str]:
         """
         Определяет колонки в DataFrame.
         
         Args:
             df: pandas DataFrame с данными
+            profile: Готовый профиль содержимого (profile_columns), если уже посчитан
             
         Returns:
             Dict[column_type, column_name] - маппинг типов на названия колонок
@@ -36,9 +80,12 @@ class ColumnDetector:
         
         logger.info(f"Detecting columns from: {columns}")
         
+        # Каждое название нормализуется и сопоставляется с индексом один раз
+        matches = [self._match_column_name(col) for col in columns]
+        
         # Проходим по каждому типу колонки
-        for column_type, synonyms in self.synonyms_map.items():
-            best_match = self._find_best_match(columns, synonyms, column_type)
+        for column_type in self.synonyms_map:
+            best_match = self._find_best_match(columns, matches, column_type)
             
             if best_match:
                 detected[column_type] = best_match
@@ -51,14 +98,16 @@ class ColumnDetector:
         if missing_columns:
             logger.warning(f"Missing required columns: {missing_columns}")
             # Попытка определить по содержимому
-            detected.update(self._detect_by_content(df, missing_columns))
+            if profile is None:
+                profile = self.profile_columns(df)
+            detected.update(self._detect_by_content(df, missing_columns, profile))
         
         return detected
     
     def _find_best_match(
         self, 
         columns: List[str], 
-        synonyms: List[str],
+        matches: List[Dict[str, Tuple[bool, bool, float]]],
         column_type: str
     ) -> Optional[str]:
         """
@@ -66,7 +115,7 @@ class ColumnDetector:
         
         Args:
             columns: Список названий колонок
-            synonyms: Список синонимов для искомой колонки
+            matches: Результаты _match_column_name для каждой колонки
             column_type: Тип колонки (для position hints)
             
         Returns:
@@ -75,41 +124,105 @@ class ColumnDetector:
         best_column = None
         best_score = 0.0
         
-        for col in columns:
-            col_normalized = self._normalize_column_name(col)
+        for position, (col, match) in enumerate(zip(columns, matches)):
+            if column_type not in match:
+                continue
+            exact, substring, similarity = match[column_type]
             
             # Точное совпадение
-            if col_normalized in synonyms:
+            if exact:
                 return col
             
             # Частичное совпадение (содержит синоним)
-            for synonym in synonyms:
-                if synonym in col_normalized or col_normalized in synonym:
-                    score = 0.9
-                    if score > best_score:
-                        best_score = score
-                        best_column = col
+            if substring and self.SUBSTRING_SCORE > best_score:
+                best_score = self.SUBSTRING_SCORE
+                best_column = col
             
             # Нечеткое совпадение (если включено)
-            if self.fuzzy_matching:
-                for synonym in synonyms:
-                    similarity = SequenceMatcher(None, col_normalized, synonym).ratio()
-                    
-                    # Бонус за позицию колонки (если включено)
-                    if self.use_position_hints:
-                        position_bonus = self._get_position_bonus(
-                            columns.index(col), 
-                            len(columns),
-                            column_type
-                        )
-                        similarity += position_bonus
-                    
-                    if similarity > best_score and similarity >= self.min_confidence:
-                        best_score = similarity
-                        best_column = col
+            if similarity > 0:
+                # Бонус за позицию колонки (если включено)
+                if self.use_position_hints:
+                    similarity += self._get_position_bonus(
+                        position,
+                        len(columns),
+                        column_type
+                    )
+                
+                if similarity > best_score and similarity >= self.min_confidence:
+                    best_score = similarity
+                    best_column = col
         
         return best_column if best_score >= self.min_confidence else None
     
+    def _match_column_name(self, name: str) -> Dict[str, Tuple[bool, bool, float]]:
+        """
+        Сопоставляет название колонки с предкомпилированным индексом синонимов.
+        
+        Args:
+            name: Исходное название колонки
+            
+        Returns:
+            Dict[column_type, (exact, substring, fuzzy_similarity)]
+        """
+        normalized = self._normalize_column_name(name)
+        cached = self._match_cache.get(normalized)
+        if cached is not None:
+            return cached
+        
+        result: Dict[str, Tuple[bool, bool, float]] = {}
+        # Пустое название (NaN, "-") содержится в любом синониме - не сопоставляем
+        if normalized:
+            exact_types = self.exact_index.get(normalized, set())
+            substring_types = self.substring_automaton.find(normalized)
+            substring_types |= self.infix_index.get(normalized, set())
+            fuzzy = self._fuzzy_scores(normalized) if self.fuzzy_matching else {}
+            
+            for column_type in exact_types | substring_types | set(fuzzy):
+                result[column_type] = (
+                    column_type in exact_types,
+                    column_type in substring_types,
+                    fuzzy.get(column_type, 0.0),
+                )
+        
+        if len(self._match_cache) < self.MATCH_CACHE_SIZE:
+            self._match_cache[normalized] = result
+        return result
+    
+    def _fuzzy_scores(self, normalized: str) -> Dict[str, float]:
+        """
+        Лучшая нечеткая похожесть названия на синонимы каждого типа.
+        
+        Похожесть = 1 - levenshtein / max(len). Синонимы, которые не могут
+        набрать min_confidence даже с бонусом за позицию, отсекаются по длине,
+        по частотам символов и ранним выходом из расчета расстояния.
+        """
+        threshold = self.min_confidence - (
+            self.MAX_POSITION_BONUS if self.use_position_hints else 0.0
+        )
+        max_ratio = max(0.0, 1.0 - threshold)
+        length = len(normalized)
+        chars = Counter(normalized)
+        scores: Dict[str, float] = {}
+        
+        for synonym_length, bucket in self.length_buckets.items():
+            longest = max(length, synonym_length)
+            max_distance = int(max_ratio * longest)
+            if abs(length - synonym_length) > max_distance:
+                continue
+            for synonym, column_type, synonym_chars in bucket:
+                # Нижняя оценка расстояния по несовпадающим символам
+                common = sum((chars & synonym_chars).values())
+                if longest - common > max_distance:
+                    continue
+                distance = _bounded_levenshtein(normalized, synonym, max_distance)
+                if distance is None:
+                    continue
+                similarity = 1.0 - distance / longest
+                if similarity > scores.get(column_type, 0.0):
+                    scores[column_type] = similarity
+        
+        return scores
+    
     def _normalize_column_name(self, name: str) -> str:
         """
         Нормализует название колонки.
@@ -172,10 +285,65 @@ class ColumnDetector:
         
         return 0.0
     
+    def profile_columns(self, df: pd.DataFrame) -> Dict[str, Dict[str, float]]:
+        """
+        Профилирует содержимое всех колонок за один проход.
+        
+        Каждая колонка выборки (первые 100 строк) разбирается один раз;
+        правила _check_content_match потом работают только с профилем.
+        Профиль сериализуется в JSON и сохраняется в записи импорта.
+        
+        Args:
+            df: DataFrame
+            
+        Returns:
+            Dict[str(column_name), metrics]
+        """
+        profile = {}
+        
+        # Берем первые 100 строк для анализа
+        sample = df.head(100)
+        
+        for i, col in enumerate(sample.columns):
+            key = str(col)
+            if key in profile:
+                continue
+            
+            series = sample.iloc[:, i].dropna()
+            non_null = len(series)
+            if non_null == 0:
+                profile[key] = {
+                    "non_null": 0,
+                    "numeric_ratio": 0.0,
+                    "integer_ratio": 0.0,
+                    "mean_length": 0.0,
+                    "sku_pattern_ratio": 0.0,
+                    "distinct_ratio": 0.0,
+                }
+                continue
+            
+            text = series.astype(str)
+            numeric = pd.to_numeric(series, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+            finite = numeric[np.isfinite(numeric)]
+            
+            profile[key] = {
+                "non_null": non_null,
+                "numeric_ratio": round(len(finite) / non_null, 4),
+                "integer_ratio": (
+                    round(float((finite == np.trunc(finite)).mean()), 4) if len(finite) else 0.0
+                ),
+                "mean_length": round(float(text.str.len().mean()), 2),
+                "sku_pattern_ratio": round(float(text.str.match(self.SKU_PATTERN).mean()), 4),
+                "distinct_ratio": round(text.nunique() / non_null, 4),
+            }
+        
+        return profile
+    
     def _detect_by_content(
         self, 
         df: pd.DataFrame, 
-        missing_columns: List[str]
+        missing_columns: List[str],
+        profile: Dict[str, Dict[str, float]]
     ) -> Dict[str, str]:
         """
         Определяет колонки по содержимому (fallback метод).
@@ -183,21 +351,20 @@ class ColumnDetector:
         Args:
             df: DataFrame
             missing_columns: Список недостающих типов колонок
+            profile: Профиль содержимого колонок (profile_columns)
             
         Returns:
             Dict[column_type, column_name]
         """
         detected = {}
         
-        # Берем первые 100 строк для анализа
-        sample = df.head(100)
-        
         for column_type in missing_columns:
             for col in df.columns:
                 if col in detected.values():
                     continue
                 
-                if str(col) in df.columns and self._check_content_match(sample[str(col)], column_type):
+                column_profile = profile.get(str(col))
+                if str(col) in df.columns and column_profile and self._check_content_match(column_profile, column_type):
                     detected[column_type] = col
                     logger.info(
                         f"Detected '{column_type}' as '{col}' by content analysis"
@@ -206,55 +373,39 @@ class ColumnDetector:
         
         return detected
     
-    def _check_content_match(self, series: pd.Series, column_type: str) -> bool:
+    def _check_content_match(self, column_profile: Dict[str, float], column_type: str) -> bool:
         """
         Проверяет соответствие содержимого колонки типу.
         
         Args:
-            series: pandas Series
+            column_profile: Метрики колонки из profile_columns
             column_type: Тип колонки
             
         Returns:
             True если содержимое соответствует типу
         """
-        # Убираем NaN значения
-        series = series.dropna()
-        if len(series) == 0:
+        if column_profile["non_null"] == 0:
             return False
         
         if column_type == "sku":
             # Артикулы обычно содержат буквы и цифры, часто дефисы
-            pattern = r'^[A-Za-z0-9\-_]+$'
-            matches = series.astype(str).str.match(pattern).sum()
-            return matches / len(series) > 0.7
+            return column_profile["sku_pattern_ratio"] > 0.7
         
         elif column_type == "name":
             # Наименования - длинный текст (>10 символов в среднем)
-            avg_length = series.astype(str).str.len().mean()
-            return avg_length > 10
+            return column_profile["mean_length"] > 10
         
         # PRICE ОТКЛЮЧЁН - не используем
         elif False and column_type == "price":
             # Цены - числа (возможно с валютой)
-            try:
-                # Попытка преобразовать в float
-                numeric = pd.to_numeric(series, errors='coerce')
-                valid_nums = numeric.notna().sum()
-                return valid_nums / len(series) > 0.7
-            except:
-                return False
+            return column_profile["numeric_ratio"] > 0.7
         
         elif column_type == "stock":
-            # Остатки - целые числа
-            try:
-                numeric = pd.to_numeric(series, errors='coerce')
-                valid_nums = numeric.notna().sum()
-                if valid_nums / len(series) > 0.7:
-                    # Проверяем что в основном целые числа
-                    integers = (numeric == numeric.astype(int)).sum()
-                    return integers / valid_nums > 0.9
-            except:
-                return False
+            # Остатки - в основном целые числа
+            return (
+                column_profile["numeric_ratio"] > 0.7
+                and column_profile["integer_ratio"] > 0.9
+            )
         
         return False
     
@@ -287,5 +438,89 @@ class ColumnDetector:
         return "\n".join(report)
 
 
+class _SubstringAutomaton:
+    """Автомат Aho-Corasick: все синонимы, входящие в строку, за один проход."""
+    
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[set] = [set()]
+    
+    def add(self, pattern: str, label: str):
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(set())
+            node = next_node
+        self._output[node].add(label)
+    
+    def build(self):
+        """Строит failure-ссылки обходом в ширину."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._output[child] |= self._output[self._fail[child]]
+    
+    def find(self, text: str) -> set:
+        """Метки всех шаблонов, встречающихся в text."""
+        found = set()
+        node = 0
+        for char in text:
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            found |= self._output[node]
+        return found
+
+
+def _bounded_levenshtein(a: str, b: str, max_distance: int) -> Optional[int]:
+    """
+    Расстояние Левенштейна с ранним выходом.
+    
+    Считается только полоса шириной 2 * max_distance + 1 вокруг диагонали;
+    возвращает None, как только становится ясно, что расстояние больше max_distance.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+    if a == b:
+        return 0
+    
+    limit = max_distance + 1
+    length_b = len(b)
+    previous = [j if j <= max_distance else limit for j in range(length_b + 1)]
+    for i, char_a in enumerate(a, start=1):
+        low = max(1, i - max_distance)
+        high = min(length_b, i + max_distance)
+        current = [limit] * (length_b + 1)
+        if i <= max_distance:
+            current[0] = i
+        row_min = current[0]
+        for j in range(low, high + 1):
+            cost = 0 if char_a == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if value > limit:
+                value = limit
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > max_distance:
+            return None
+        previous = current
+    
+    distance = previous[length_b]
+    return distance if distance <= max_distance else None
+
+
 # Singleton instance
 column_detector = ColumnDetector()
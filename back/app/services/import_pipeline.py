@@ -0,0 +1,114 @@
+"""
+Import Pipeline Service
+Конвейер импорта: разбор → PostgreSQL → Elasticsearch
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import logging
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class ImportPipeline:
+    """
+    Передаёт порции товаров от разбора в PostgreSQL и дальше в Elasticsearch.
+
+    Запись в PostgreSQL и индексация в ES работают параллельно с разбором,
+    каждая в своей задаче; между стадиями - очереди на queue_size порций.
+    Когда очередь заполнена, submit() ждёт (backpressure), так что в памяти
+    держится не больше нескольких порций, а время импорта определяется
+    самой медленной стадией, а не суммой всех.
+
+        async with ImportPipeline(write_batch, index_batch) as pipeline:
+            await pipeline.submit(products)
+
+    write_batch(batch, offset) пишет порцию в PostgreSQL и возвращает то,
+    что нужно индексировать; index_batch(payload, offset) индексирует это в
+    ES и возвращает число документов. offset - номер первого товара порции
+    в файле. Порции обрабатываются строго по порядку.
+    """
+
+    def __init__(
+        self,
+        write_batch: Callable[[List[Dict], int], Awaitable[Any]],
+        index_batch: Callable[[Any, int], Awaitable[int]],
+        queue_size: Optional[int] = None
+    ):
+        self.write_batch = write_batch
+        self.index_batch = index_batch
+        queue_size = queue_size or settings.PARSING_PIPELINE_QUEUE_SIZE
+        self._write_queue = asyncio.Queue(maxsize=queue_size)
+        self._index_queue = asyncio.Queue(maxsize=queue_size)
+        self._tasks: List[asyncio.Task] = []
+        self._error: Optional[BaseException] = None
+
+        self.submitted = 0
+        self.saved = 0
+        self.indexed = 0
+
+    async def __aenter__(self) -> "ImportPipeline":
+        self._tasks = [
+            asyncio.create_task(self._write_stage()),
+            asyncio.create_task(self._index_stage()),
+        ]
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            return False
+
+        await self._write_queue.put(_DONE)
+        await asyncio.gather(*self._tasks)
+        if self._error is not None:
+            raise self._error
+        return False
+
+    async def submit(self, batch: List[Dict]):
+        """Ставит порцию в очередь записи; ждёт, если очередь заполнена."""
+        if self._error is not None:
+            raise self._error
+        if not batch:
+            return
+        offset = self.submitted
+        self.submitted += len(batch)
+        await self._write_queue.put((batch, offset))
+
+    async def _write_stage(self):
+        while True:
+            item = await self._write_queue.get()
+            if item is _DONE:
+                break
+            # После ошибки очередь только вычерпывается, чтобы не блокировать разбор
+            if self._error is not None:
+                continue
+            batch, offset = item
+            try:
+                payload = await self.write_batch(batch, offset)
+                self.saved += len(batch)
+            except Exception as e:
+                logger.error(f"Pipeline: writing batch at {offset} to PostgreSQL failed: {e}")
+                self._error = e
+                continue
+            await self._index_queue.put((payload, offset))
+        await self._index_queue.put(_DONE)
+
+    async def _index_stage(self):
+        while True:
+            item = await self._index_queue.get()
+            if item is _DONE:
+                break
+            if self._error is not None:
+                continue
+            payload, offset = item
+            try:
+                self.indexed += await self.index_batch(payload, offset)
+            except Exception as e:
+                logger.error(f"Pipeline: indexing batch at {offset} to Elasticsearch failed: {e}")
+                self._error = e
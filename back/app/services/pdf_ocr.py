@@ -0,0 +1,162 @@
+"""
+OCR страниц PDF без текстового слоя (сканированные прайс-листы)
+"""
+from typing import Dict, List, Optional
+import hashlib
+import json
+import logging
+import os
+
+import pytesseract
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+OCR_CACHE_PREFIX = "ocr:page:"
+# Разрыв между словами шире стольких высот строки считается границей ячейки
+CELL_GAP_RATIO = 1.5
+
+
+class PdfOcr:
+    """Распознаёт страницу PDF и восстанавливает строки таблицы по раскладке слов."""
+
+    def __init__(self):
+        self.enabled = settings.PARSING_PDF_USE_OCR
+        self.language = settings.PARSING_PDF_OCR_LANGUAGE
+        self.dpi = settings.PARSING_PDF_DPI
+        self.cache_enabled = settings.REDIS_CACHE_ENABLED
+        self.cache_ttl = settings.REDIS_CACHE_TTL_LONG
+
+    def needs_ocr(self, page) -> bool:
+        """Страница без текстового слоя, но с картинкой - скан."""
+        return self.enabled and not page.chars and bool(page.images)
+
+    def page_rows(self, page, timeout: int = None) -> List[List[str]]:
+        """
+        Распознаёт страницу pdfplumber и возвращает строки таблицы.
+
+        Страница растрируется с PARSING_PDF_DPI; результат кешируется в Redis
+        по хешу пикселей, поэтому повторная загрузка того же скана (или
+        неизменная страница в следующем прайсе) не распознаётся заново.
+        Совпадение только точное, см. _image_hash.
+        """
+        image = page.to_image(resolution=self.dpi).original.convert("L")
+        page_hash = self._image_hash(image)
+
+        rows = self._cache_get(page_hash)
+        if rows is not None:
+            logger.info(f"OCR cache hit for PDF page {page.page_number}")
+            return rows
+
+        # tesseract сам распараллеливается через OpenMP; страницы и так
+        # распознаются в пуле процессов, лишние потоки только мешают
+        os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+        data = pytesseract.image_to_data(
+            image,
+            lang=self.language,
+            config="--psm 6",
+            output_type=pytesseract.Output.DICT,
+            timeout=timeout or 0
+        )
+        rows = self._rows_from_layout(data)
+        self._cache_set(page_hash, rows)
+        return rows
+
+    def _rows_from_layout(self, data: Dict[str, List]) -> List[List[str]]:
+        """
+        Собирает таблицу из слов tesseract (image_to_data).
+
+        Слова группируются в строки по вертикали, внутри строки делятся на
+        ячейки по широким разрывам. Границы колонок берутся из строки с
+        наибольшим числом ячеек (обычно это заголовок), остальные ячейки
+        раскладываются по ближайшей колонке.
+        """
+        words = [
+            (data["left"][i], data["top"][i], data["width"][i], data["height"][i], text.strip())
+            for i, text in enumerate(data["text"])
+            if text and text.strip() and float(data["conf"][i]) >= 0
+        ]
+        if not words:
+            return []
+
+        words.sort(key=lambda w: w[1] + w[3] / 2)
+        lines = []
+        line = [words[0]]
+        for word in words[1:]:
+            center = word[1] + word[3] / 2
+            line_center = sum(w[1] + w[3] / 2 for w in line) / len(line)
+            line_height = max(w[3] for w in line)
+            if abs(center - line_center) <= line_height / 2:
+                line.append(word)
+            else:
+                lines.append(line)
+                line = [word]
+        lines.append(line)
+
+        cell_lines = []
+        for line in lines:
+            line.sort(key=lambda w: w[0])
+            gap = CELL_GAP_RATIO * max(w[3] for w in line)
+            cells = []
+            x0, x1, texts = line[0][0], line[0][0] + line[0][2], [line[0][4]]
+            for left, _, width, _, text in line[1:]:
+                if left - x1 > gap:
+                    cells.append((x0, x1, " ".join(texts)))
+                    x0, texts = left, []
+                texts.append(text)
+                x1 = max(x1, left + width)
+            cells.append((x0, x1, " ".join(texts)))
+            cell_lines.append(cells)
+
+        anchors = max(cell_lines, key=len)
+        rows = []
+        for cells in cell_lines:
+            row = [[] for _ in anchors]
+            for x0, x1, text in cells:
+                center = (x0 + x1) / 2
+                column = min(
+                    range(len(anchors)),
+                    key=lambda i: abs(center - (anchors[i][0] + anchors[i][1]) / 2)
+                )
+                row[column].append(text)
+            rows.append([" ".join(parts) if parts else None for parts in row])
+        return rows
+
+    def _image_hash(self, image) -> str:
+        """
+        Хеш растра вместе с параметрами распознавания.
+
+        Ключ намеренно точный: кеш попадает только на тот же растр, а новый
+        скан того же листа распознаётся заново. Перцептивный хеш (dHash
+        уменьшенной страницы) здесь опасен: на странице A4 шум повторного
+        скана меняет сотни бит отпечатка, а другая цифра в цене - десятки,
+        так что похожий скан с изменённой ценой получил бы старые строки.
+        """
+        digest = hashlib.sha1()
+        digest.update(f"{self.language}|{self.dpi}|{image.size}".encode())
+        digest.update(image.tobytes())
+        return digest.hexdigest()
+
+    def _cache_get(self, page_hash: str) -> Optional[List[List[str]]]:
+        if not self.cache_enabled:
+            return None
+        try:
+            from app.core.redis_client import redis_client
+            cached = redis_client.get(OCR_CACHE_PREFIX + page_hash)
+            return json.loads(cached) if cached else None
+        except Exception as e:
+            logger.warning(f"OCR cache unavailable: {e}")
+            return None
+
+    def _cache_set(self, page_hash: str, rows: List[List[str]]):
+        if not self.cache_enabled:
+            return
+        try:
+            from app.core.redis_client import redis_client
+            redis_client.set(OCR_CACHE_PREFIX + page_hash, json.dumps(rows, ensure_ascii=False), ex=self.cache_ttl)
+        except Exception as e:
+            logger.warning(f"OCR cache unavailable: {e}")
+
+
+pdf_ocr = PdfOcr()
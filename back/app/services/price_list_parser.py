@@ -2,20 +2,49 @@
 Price List Parser Service
 Парсинг прайс-листов с автоматическим определением колонок
 """
-from typing import Dict, List, Optional, Tuple
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+import numpy as np
 import pandas as pd
 import pdfplumber
 import pytesseract
 from PIL import Image
+from collections import Counter
+from itertools import islice
+import asyncio
+import codecs
+import csv
+import hashlib
+import importlib.util
 import io
 import logging
+import re
+import resource
+import time
 from pathlib import Path
 
 from app.core.config import settings
 from app.services.column_detector import column_detector
+from app.services.pdf_ocr import pdf_ocr
+from app.services.tag_extractor import tag_extractor
+from app.utils.number_parser import as_text, parse_price_column, parse_stock_column
+from app.utils.process_pool import imap_in_processes, map_in_processes, time_limit
+from app.utils.stage_timer import StageTimer
 
 logger = logging.getLogger(__name__)
 
+# Образец начала CSV/TXT для определения кодировки и разделителя
+TEXT_SAMPLE_SIZE = 64 * 1024
+TEXT_SAMPLE_LINES = 50
+TEXT_DELIMITERS = (';', ',', '\t', '|')
+
+_HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+if _HAS_PYARROW:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+# Строковые ячейки хранятся в буферах Arrow, а не Python-объектом на ячейку
+ARROW_STRING_DTYPE = "string[pyarrow]"
+
 
 class PriceListParser:
     """Парсер прайс-листов с поддержкой различных форматов."""
@@ -24,31 +53,76 @@ class PriceListParser:
         self.max_rows = settings.PARSING_MAX_ROWS_PER_FILE
         self.auto_detect_encoding = settings.PARSING_AUTO_DETECT_ENCODING
         self.default_encoding = settings.PARSING_DEFAULT_ENCODING
+        self.streaming_chunk_size = settings.PARSING_STREAMING_CHUNK_SIZE
+        self.pdf_max_pages = settings.PARSING_PDF_MAX_PAGES
+        self.pdf_page_timeout = settings.PARSING_PDF_PAGE_TIMEOUT
+        self.arrow_strings = settings.PARSING_ARROW_STRINGS and _HAS_PYARROW
+        self.text_dtype = ARROW_STRING_DTYPE if self.arrow_strings else str
+
+    STREAMING_FORMATS = ('.xlsx', '.csv', '.pdf')
+    # xlsx не шардируется: read-only openpyxl разбирает XML всех строк до
+    # начала диапазона, и шарды вместе читали бы файл O(N²)
+    SHARDABLE_FORMATS = ('.csv',)
+
+    def supports_streaming(self, filename: str) -> bool:
+        """Можно ли разобрать файл потоково (порциями)."""
+        return Path(filename).suffix.lower() in self.STREAMING_FORMATS
+
+    async def parse_file(
+        self,
+        file_path: str,
+        filename: str,
+        layout_hints: Optional[List[Dict]] = None
+    ) -> Dict:
+        """
+        Парсит файл прайс-листа.
+
+        layout_hints - раскладки прошлых импортов поставщика
+        (fingerprint, header_row, sheet_name, detected_columns). Если заголовок
+        файла совпал по отпечатку, поиск строки заголовков и определение
+        колонок пропускаются.
 
-    async def parse_file(self, file_path: str, filename: str) -> Dict:
-        """Парсит файл прайс-листа."""
+        В stats["stages"] - время стадий: read, header, columns, extract, tags.
+        """
         logger.info(f"Parsing file: {filename}")
+        started = time.perf_counter()
+        timer = StageTimer()
 
         file_ext = Path(filename).suffix.lower()
 
         try:
             if file_ext in ['.xlsx', '.xls']:
-                df = await self._parse_excel(file_path)
-            elif file_ext == '.csv':
-                df = await self._parse_csv(file_path)
-            elif file_ext == '.pdf':
-                df = await self._parse_pdf(file_path)
-            elif file_ext == '.txt':
-                df = await self._parse_txt(file_path)
-            else:
-                raise ValueError(f"Unsupported file format: {file_ext}")
+                return await self._parse_excel(file_path, layout_hints, started, timer)
 
-            if df is None or df.empty:
+            with timer("read"):
+                if file_ext == '.csv':
+                    raw = await self._parse_csv(file_path)
+                elif file_ext == '.pdf':
+                    raw = await self._parse_pdf(file_path)
+                elif file_ext == '.txt':
+                    raw = await self._parse_txt(file_path)
+                else:
+                    raise ValueError(f"Unsupported file format: {file_ext}")
+
+            if raw is None or raw.empty:
                 return {"success": False, "error": "No data found in file"}
 
+            with timer("header"):
+                if file_ext == '.pdf':
+                    # У таблиц PDF заголовок уже взят из первой строки таблицы
+                    df = raw
+                    header_row = 0
+                    layout_hint = self._match_layout(
+                        layout_hints,
+                        lambda row: df.columns.values if row == 0 else None
+                    )
+                else:
+                    df, header_row, layout_hint = self._locate_header(raw, layout_hints)
+
             logger.info(f"Loaded DataFrame: {len(df)} rows, {len(df.columns)} columns")
 
-            detected_columns = column_detector.detect_columns(df)
+            with timer("columns"):
+                detected_columns, column_profile, cache_hit = self._resolve_columns(df, layout_hint)
 
             if not detected_columns:
                 return {
@@ -69,86 +143,910 @@ class PriceListParser:
                 for col_type in detected_columns
             })
 
-            products = self._extract_products(df_renamed, detected_columns)
-            tags = self._generate_tags(products)
+            counters = {"failed_rows": 0}
+            with timer("extract"):
+                products = self._extract_products(df_renamed, detected_columns, counters)
+            with timer("tags"):
+                tags = self._generate_tags(products)
             report = column_detector.get_mapping_report(detected_columns)
             logger.info(f"\n{report}")
+            stats = self._collect_stats(len(df), started, timer)
 
             return {
                 "success": True,
                 "total_rows": len(df),
                 "detected_columns": detected_columns,
                 "products_count": len(products),
+                "failed_rows": counters["failed_rows"],
                 "products": products,
                 "tags": tags,
-                "column_mapping_report": report
+                "column_mapping_report": report,
+                "column_profile": column_profile,
+                "layout": {
+                    "fingerprint": self._header_fingerprint(df.columns),
+                    "header_row": header_row,
+                    "sheet_name": None
+                },
+                "layout_cache_hit": cache_hit,
+                "stats": stats
             }
 
         except Exception as e:
             logger.error(f"Error parsing file: {e}", exc_info=True)
             return {"success": False, "error": str(e)}
 
-    async def _parse_excel(self, file_path: str) -> pd.DataFrame:
-        """Парсит Excel файл БЕЗ предустановленных заголовков."""
-        df = pd.read_excel(file_path, header=None, nrows=self.max_rows)
-        df = df.dropna(how='all')
-        header_row = self._find_header_row(df)
-        df.columns = df.iloc[header_row].values
-        df = df.iloc[header_row + 1:].reset_index(drop=True)
-        return df
+    async def parse_file_streaming(
+        self,
+        file_path: str,
+        filename: str,
+        on_batch: Callable[[List[Dict]], Awaitable[None]],
+        chunk_size: Optional[int] = None,
+        layout_hints: Optional[List[Dict]] = None
+    ) -> Dict:
+        """
+        Потоково парсит большой прайс-лист порциями фиксированного размера.
 
-    async def _parse_csv(self, file_path: str) -> pd.DataFrame:
-        """Парсит CSV файл."""
-        with open(file_path, 'r', encoding=self.default_encoding, errors='ignore') as f:
-            first_line = f.readline()
-            delimiter = ',' if ',' in first_line else ';' if ';' in first_line else '\t'
+        Заголовок ищется по первой порции, дальше файл читается по chunk_size
+        строк, и каждая порция товаров сразу передаётся в on_batch. Порции
+        читаются в отдельном потоке, поэтому, пока разбирается следующая
+        порция, event loop записывает предыдущие (см. ImportPipeline).
 
-        df = pd.read_csv(
+        Результат совпадает с parse_file, только без ключа "products".
+        """
+        logger.info(f"Streaming parse of file: {filename}")
+        started = time.perf_counter()
+        chunk_size = chunk_size or self.streaming_chunk_size
+        file_ext = Path(filename).suffix.lower()
+
+        try:
+            sheet_name = None
+            if file_ext == '.xlsx':
+                sheet_names = self._excel_sheet_names(file_path)
+                if len(sheet_names) > 1:
+                    # У листов свои заголовки и колонки, имя листа становится
+                    # категорией - такие книги разбираются целиком, как в parse_file
+                    logger.info(f"Workbook has {len(sheet_names)} sheets, parsing without streaming")
+                    return await self._parse_file_in_batches(
+                        file_path, filename, on_batch, chunk_size, layout_hints
+                    )
+                sheet_name = sheet_names[0]
+                chunks = self._iter_excel_chunks(file_path, chunk_size)
+            elif file_ext == '.csv':
+                chunks = self._iter_csv_chunks(file_path, chunk_size)
+            elif file_ext == '.pdf':
+                chunks = self._iter_pdf_chunks(file_path, chunk_size)
+            else:
+                raise ValueError(f"Streaming is not supported for format: {file_ext}")
+
+            header = None
+            header_row = 0
+            layout_hint = None
+            cache_hit = False
+            detected_columns = None
+            column_profile = None
+            total_rows = 0
+            products_count = 0
+            failed_rows = 0
+            tag_counts = Counter()
+
+            # Чтение порций и извлечение товаров идут в отдельном потоке: event
+            # loop тем временем пишет предыдущие порции (ImportPipeline). PDF
+            # читается в текущем потоке - таймаут страницы работает через SIGALRM
+            read_in_thread = file_ext != '.pdf'
+
+            while True:
+                if read_in_thread:
+                    chunk = await asyncio.to_thread(next, chunks, None)
+                else:
+                    chunk = next(chunks, None)
+                if chunk is None:
+                    break
+
+                chunk = chunk.dropna(how='all')
+                if chunk.empty:
+                    continue
+
+                if header is None:
+                    first = chunk
+                    layout_hint = self._match_layout(
+                        layout_hints,
+                        lambda row: self._row_cells(first, row) if row < len(first) else None
+                    )
+                    if layout_hint:
+                        header_row = layout_hint["header_row"]
+                    else:
+                        header_row = self._find_header_row(chunk)
+                    header = self._row_cells(chunk, header_row)
+                    chunk = chunk.iloc[header_row + 1:]
+                elif chunk.shape[1] != len(header):
+                    # Таблицы на страницах PDF бывают разной ширины
+                    chunk = chunk.reindex(columns=range(len(header)))
+
+                if file_ext == '.pdf':
+                    # Заголовок таблицы повторяется на каждой странице
+                    header_text = np.array(['' if pd.isna(cell) else str(cell) for cell in header], dtype=object)
+                    repeated = (chunk.fillna('').astype(str).to_numpy(dtype=object) == header_text).all(axis=1)
+                    chunk = chunk[~repeated]
+
+                chunk = chunk.reset_index(drop=True)
+                chunk.columns = header
+                total_rows += len(chunk)
+
+                if detected_columns is None:
+                    detected_columns, column_profile, cache_hit = self._resolve_columns(chunk, layout_hint)
+                    if not detected_columns:
+                        return {
+                            "success": False,
+                            "error": "Could not detect any columns",
+                            "columns_found": list(chunk.columns)
+                        }
+
+                chunk = chunk.rename(columns={
+                    detected_columns.get(col_type): col_type
+                    for col_type in detected_columns
+                })
+
+                products, chunk_tags, chunk_failed = await asyncio.to_thread(
+                    self._extract_batch, chunk, detected_columns
+                )
+                failed_rows += chunk_failed
+                if products:
+                    tag_counts.update(chunk_tags)
+                    products_count += len(products)
+                    await on_batch(products)
+
+            if detected_columns is None:
+                return {"success": False, "error": "No data found in file"}
+
+            report = column_detector.get_mapping_report(detected_columns)
+            logger.info(f"\n{report}")
+            stats = self._collect_stats(total_rows, started)
+
+            return {
+                "success": True,
+                "total_rows": total_rows,
+                "detected_columns": detected_columns,
+                "products_count": products_count,
+                "failed_rows": failed_rows,
+                "tags": tag_extractor.top(tag_counts),
+                "column_mapping_report": report,
+                "column_profile": column_profile,
+                "layout": {
+                    "fingerprint": self._header_fingerprint(header),
+                    "header_row": header_row,
+                    "sheet_name": sheet_name
+                },
+                "layout_cache_hit": cache_hit,
+                "stats": stats
+            }
+
+        except Exception as e:
+            logger.error(f"Error parsing file: {e}", exc_info=True)
+            return {"success": False, "error": str(e)}
+
+    async def _parse_file_in_batches(
+        self,
+        file_path: str,
+        filename: str,
+        on_batch: Callable[[List[Dict]], Awaitable[None]],
+        chunk_size: int,
+        layout_hints: Optional[List[Dict]]
+    ) -> Dict:
+        """parse_file с передачей товаров в on_batch порциями по chunk_size."""
+        result = await self.parse_file(file_path, filename, layout_hints=layout_hints)
+        products = result.pop("products", None) or []
+        for start in range(0, len(products), chunk_size):
+            await on_batch(products[start:start + chunk_size])
+        return result
+
+    def supports_sharding(self, filename: str) -> bool:
+        """Можно ли разбирать файл параллельно по диапазонам строк."""
+        return Path(filename).suffix.lower() in self.SHARDABLE_FORMATS
+
+    async def plan_shards(
+        self,
+        file_path: str,
+        filename: str,
+        shard_rows: int,
+        layout_hints: Optional[List[Dict]] = None
+    ) -> Optional[Dict]:
+        """
+        Делит большой CSV на диапазоны строк для параллельного разбора.
+
+        Заголовок и колонки определяются по первой порции, как в
+        parse_file_streaming, и передаются шардам (parse_shard) готовыми.
+        Диапазоны - [start, stop) в номерах строк таблицы (stop последнего -
+        None, до конца файла). Возвращает None, если в файле не больше
+        shard_rows строк или формат не поддерживается. План сериализуется в
+        JSON и передаётся задачам Celery как есть.
+        """
+        file_ext = Path(filename).suffix.lower()
+        if not shard_rows or file_ext not in self.SHARDABLE_FORMATS:
+            return None
+
+        row_count = self._count_lines(file_path) - self._sniff_text_file(file_path)["skip_rows"]
+        chunks = self._iter_csv_chunks(file_path, self.streaming_chunk_size)
+
+        if not row_count or row_count <= shard_rows:
+            return None
+
+        first = next(chunks, None)
+        chunks.close()
+        if first is None:
+            return None
+        first = first.dropna(how='all')
+        if first.empty:
+            return None
+
+        layout_hint = self._match_layout(
+            layout_hints,
+            lambda row: self._row_cells(first, row) if row < len(first) else None
+        )
+        header_row = layout_hint["header_row"] if layout_hint else self._find_header_row(first)
+        # Метки колонок уходят в JSON: NaN и нестроковые значения ячеек приводим заранее
+        header = [
+            None if pd.isna(cell) else cell if isinstance(cell, (str, int, float)) else str(cell)
+            for cell in self._row_cells(first, header_row)
+        ]
+        data_start = int(first.index[header_row]) + 1
+
+        sample = first.iloc[header_row + 1:].reset_index(drop=True)
+        sample.columns = header
+        detected_columns, column_profile, cache_hit = self._resolve_columns(sample, layout_hint)
+        if not detected_columns:
+            return None
+
+        row_count = min(row_count, self.max_rows)
+        starts = list(range(data_start, row_count, shard_rows))
+        shards = [[start, start + shard_rows] for start in starts]
+        shards[-1][1] = None
+
+        logger.info(f"Planned {len(shards)} shards of {shard_rows} rows for {filename} (~{row_count} rows)")
+        return {
+            "header": header,
+            "detected_columns": detected_columns,
+            "column_profile": column_profile,
+            "layout": {
+                "fingerprint": self._header_fingerprint(header),
+                "header_row": header_row,
+                "sheet_name": None
+            },
+            "layout_cache_hit": cache_hit,
+            "shards": shards
+        }
+
+    async def parse_shard(
+        self,
+        file_path: str,
+        filename: str,
+        plan: Dict,
+        start: int,
+        stop: Optional[int],
+        on_batch: Callable[[List[Dict]], Awaitable[None]],
+        chunk_size: Optional[int] = None
+    ) -> Dict:
+        """
+        Разбирает строки [start, stop) файла по плану plan_shards.
+
+        Товары отдаются в on_batch порциями, как в parse_file_streaming.
+        Возвращает счётчики и теги шарда.
+        """
+        started = time.perf_counter()
+        chunk_size = chunk_size or self.streaming_chunk_size
+        header = plan["header"]
+        detected_columns = plan["detected_columns"]
+
+        try:
+            chunks = self._iter_csv_chunks(file_path, chunk_size, start, stop)
+
+            total_rows = 0
+            products_count = 0
+            failed_rows = 0
+            tag_counts = Counter()
+            while True:
+                chunk = await asyncio.to_thread(next, chunks, None)
+                if chunk is None:
+                    break
+
+                chunk = chunk.dropna(how='all')
+                if chunk.empty:
+                    continue
+                if chunk.shape[1] != len(header):
+                    chunk = chunk.reindex(columns=range(len(header)))
+
+                chunk = chunk.reset_index(drop=True)
+                chunk.columns = header
+                total_rows += len(chunk)
+
+                chunk = chunk.rename(columns={
+                    detected_columns.get(col_type): col_type
+                    for col_type in detected_columns
+                })
+
+                products, chunk_tags, chunk_failed = await asyncio.to_thread(
+                    self._extract_batch, chunk, detected_columns
+                )
+                failed_rows += chunk_failed
+                if products:
+                    tag_counts.update(chunk_tags)
+                    products_count += len(products)
+                    await on_batch(products)
+
+            logger.info(
+                f"Shard [{start}, {stop}) of {filename}: {products_count} products "
+                f"in {time.perf_counter() - started:.1f}s"
+            )
+            return {
+                "success": True,
+                "total_rows": total_rows,
+                "products_count": products_count,
+                "failed_rows": failed_rows,
+                "tags": tag_extractor.top(tag_counts),
+                # Частоты для слияния шардов; с запасом, чтобы общий top-K не исказился
+                "tag_counts": tag_extractor.top_counts(tag_counts, tag_extractor.max_tags * 4)
+            }
+
+        except Exception as e:
+            logger.error(f"Error parsing shard [{start}, {stop}) of {filename}: {e}", exc_info=True)
+            return {"success": False, "error": str(e)}
+
+    def _count_lines(self, file_path: str) -> int:
+        """Число строк текстового файла (по переводам строк, без разбора CSV)."""
+        lines = 0
+        last = b""
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                lines += block.count(b"\n")
+                last = block
+        return lines + (1 if last and not last.endswith(b"\n") else 0)
+
+    def _iter_excel_chunks(
+        self,
+        file_path: str,
+        chunk_size: int,
+        start_row: int = 0,
+        stop_row: Optional[int] = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Читает первый лист xlsx в режиме read-only порциями строк (многолистовые
+        книги parse_file_streaming разбирает целиком, см. _parse_file_in_batches).
+
+        start_row/stop_row - диапазон строк [start, stop); индекс
+        порций - номера строк листа с нуля.
+        """
+        from openpyxl import load_workbook
+
+        stop_row = min(stop_row or self.max_rows, self.max_rows)
+        if stop_row <= start_row:
+            return
+
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            sheet = workbook.worksheets[0]
+            rows = []
+            first = start_row
+            read = start_row
+            for row in sheet.iter_rows(min_row=start_row + 1, values_only=True):
+                rows.append(row)
+                read += 1
+                if len(rows) >= chunk_size:
+                    yield self._compact_frame(pd.DataFrame(rows, index=range(first, read)))
+                    rows = []
+                    first = read
+                if read >= stop_row:
+                    break
+            if rows:
+                yield self._compact_frame(pd.DataFrame(rows, index=range(first, read)))
+        finally:
+            workbook.close()
+
+    def _iter_csv_chunks(
+        self,
+        file_path: str,
+        chunk_size: int,
+        start_row: int = 0,
+        stop_row: Optional[int] = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Читает CSV порциями без предустановленных заголовков.
+
+        start_row/stop_row - диапазон строк таблицы [start, stop) для шардов;
+        индекс порций - номера строк таблицы с нуля.
+        """
+        text_format = self._sniff_text_file(file_path)
+        stop_row = min(stop_row or self.max_rows, self.max_rows)
+        if stop_row <= start_row:
+            return
+
+        reader = pd.read_csv(
             file_path,
-            delimiter=delimiter,
-            encoding=self.default_encoding,
-            nrows=self.max_rows,
+            delimiter=text_format["delimiter"],
+            skiprows=text_format["skip_rows"] + start_row,
+            header=None,
+            names=range(text_format["width"]),
+            encoding=text_format["encoding"],
+            encoding_errors='replace',
+            dtype=self.text_dtype,
+            nrows=stop_row - start_row,
+            chunksize=chunk_size,
             on_bad_lines='skip'
         )
-        return df.dropna(how='all')
+        with reader:
+            for chunk in reader:
+                if start_row:
+                    chunk.index += start_row
+                yield chunk
+
+    def _iter_pdf_chunks(self, file_path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+        """Отдаёт строки таблиц PDF порциями по мере разбора страниц."""
+        rows = []
+        for tables in self._iter_pdf_pages(file_path):
+            for table in tables:
+                rows.extend(table)
+            if len(rows) >= chunk_size:
+                yield self._compact_frame(pd.DataFrame(rows))
+                rows = []
+        if rows:
+            yield self._compact_frame(pd.DataFrame(rows))
+
+    def _iter_pdf_pages(self, file_path: str) -> Iterator[List[List[List]]]:
+        """
+        Извлекает таблицы PDF постранично в пуле процессов.
+
+        Страницы отдаются по порядку, как только готовы: разбор первых страниц
+        продолжается, пока остальные ещё извлекаются. Страница, не
+        уложившаяся в PARSING_PDF_PAGE_TIMEOUT, пропускается.
+        """
+        with pdfplumber.open(file_path) as pdf:
+            total_pages = len(pdf.pages)
+
+        page_count = min(total_pages, self.pdf_max_pages)
+        if page_count < total_pages:
+            logger.warning(f"PDF has {total_pages} pages, only first {page_count} will be parsed")
+
+        jobs = [(file_path, page_number, self.pdf_page_timeout) for page_number in range(page_count)]
+        yield from imap_in_processes(_extract_pdf_page_job, jobs)
+
+    def _collect_stats(self, rows: int, started: float, timer: Optional[StageTimer] = None) -> Dict:
+        """Скорость разбора, пиковое потребление памяти процессом и время стадий."""
+        elapsed = time.perf_counter() - started
+        # ru_maxrss в Linux возвращается в килобайтах
+        peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        stats = {
+            "rows": rows,
+            "elapsed_sec": round(elapsed, 3),
+            "rows_per_sec": round(rows / elapsed, 1) if elapsed > 0 else 0.0,
+            "peak_rss_mb": round(peak_rss_mb, 1)
+        }
+        if timer is not None:
+            stats["stages"] = timer.as_dict()
+        logger.info(
+            f"Parsed {rows} rows in {stats['elapsed_sec']}s "
+            f"({stats['rows_per_sec']} rows/sec, peak RSS {stats['peak_rss_mb']} MB)"
+        )
+        return stats
+
+    async def _parse_excel(
+        self,
+        file_path: str,
+        layout_hints: Optional[List[Dict]],
+        started: float,
+        timer: StageTimer
+    ) -> Dict:
+        """
+        Парсит все листы Excel файла БЕЗ предустановленных заголовков.
+
+        Каждый лист разбирается независимо (свой заголовок и маппинг колонок);
+        несколько листов обрабатываются параллельно в пуле процессов
+        (default_workers). Разбор идёт в отдельном потоке, чтобы не занимать
+        event loop. Результаты объединяются в порядке листов.
+        Время стадий листов суммируется, поэтому при параллельном разборе
+        сумма стадий больше elapsed_sec.
+        """
+        with timer("read"), pd.ExcelFile(file_path) as workbook:
+            sheet_names = workbook.sheet_names
+
+        multi_sheet = len(sheet_names) > 1
+        jobs = [(file_path, name, layout_hints, multi_sheet) for name in sheet_names]
+        if multi_sheet:
+            logger.info(f"Parsing {len(sheet_names)} sheets: {sheet_names}")
+            sheets = await asyncio.to_thread(map_in_processes, _parse_sheet_job, jobs)
+        else:
+            sheets = [await asyncio.to_thread(self._parse_sheet, *jobs[0])]
+        sheets = [sheet for sheet in sheets if sheet]
+
+        if not sheets:
+            return {"success": False, "error": "No data found in file"}
+
+        products = []
+        for sheet in sheets:
+            products.extend(sheet["products"])
+        if len(products) > self.max_rows:
+            logger.warning(f"Truncating {len(products)} products to {self.max_rows}")
+            products = products[:self.max_rows]
+
+        primary = sheets[0]
+        total_rows = sum(sheet["total_rows"] for sheet in sheets)
+        for sheet in sheets:
+            timer.merge(sheet["stages"])
+        with timer("tags"):
+            tags = self._generate_tags(products)
+
+        if multi_sheet:
+            report = "\n\n".join(
+                f"[{sheet['sheet_name']}]\n{sheet['column_mapping_report']}" for sheet in sheets
+            )
+        else:
+            report = primary["column_mapping_report"]
+        logger.info(f"\n{report}")
+        stats = self._collect_stats(total_rows, started, timer)
+
+        return {
+            "success": True,
+            "total_rows": total_rows,
+            "detected_columns": primary["detected_columns"],
+            "products_count": len(products),
+            "failed_rows": sum(sheet["failed_rows"] for sheet in sheets),
+            "products": products,
+            "tags": tags,
+            "column_mapping_report": report,
+            "column_profile": primary["column_profile"],
+            "layout": primary["layout"],
+            "layout_cache_hit": all(sheet["layout_cache_hit"] for sheet in sheets),
+            "sheets": [
+                {
+                    "sheet_name": sheet["sheet_name"],
+                    "total_rows": sheet["total_rows"],
+                    "products_count": len(sheet["products"]),
+                    "detected_columns": sheet["detected_columns"],
+                    "layout_cache_hit": sheet["layout_cache_hit"]
+                }
+                for sheet in sheets
+            ],
+            "stats": stats
+        }
+
+    def _parse_sheet(
+        self,
+        file_path: str,
+        sheet_name: str,
+        layout_hints: Optional[List[Dict]],
+        sheet_as_category: bool
+    ) -> Optional[Dict]:
+        """
+        Разбирает один лист: заголовок, колонки, товары.
+
+        Возвращает None, если на листе нет данных или колонки не определились
+        (обложки, оглавления). sheet_as_category - подставлять имя листа
+        в category, если колонки категории нет.
+        """
+        timer = StageTimer()
+        with timer("read"):
+            raw = pd.read_excel(file_path, sheet_name=sheet_name, header=None, nrows=self.max_rows)
+            raw = self._compact_frame(raw.dropna(how='all'))
+        if raw.empty:
+            logger.info(f"Sheet '{sheet_name}' is empty, skipping")
+            return None
+
+        with timer("header"):
+            df, header_row, layout_hint = self._locate_header(raw, layout_hints)
+        if df.empty:
+            return None
+
+        with timer("columns"):
+            detected_columns, column_profile, cache_hit = self._resolve_columns(df, layout_hint)
+        if not detected_columns:
+            logger.warning(f"Sheet '{sheet_name}': could not detect any columns, skipping")
+            return None
+
+        required = settings.PARSING_REQUIRED_COLUMNS_LIST
+        missing = [col for col in required if col not in detected_columns]
+        if missing:
+            logger.warning(f"Sheet '{sheet_name}': missing required columns: {missing}")
+
+        df_renamed = df.rename(columns={
+            detected_columns.get(col_type): col_type
+            for col_type in detected_columns
+        })
+        counters = {"failed_rows": 0}
+        with timer("extract"):
+            products = self._extract_products(df_renamed, detected_columns, counters)
+
+        if sheet_as_category and 'category' not in detected_columns:
+            category = str(sheet_name).strip().lower()
+            for product in products:
+                product['category'] = category
+
+        return {
+            "sheet_name": sheet_name,
+            "total_rows": len(df),
+            "detected_columns": detected_columns,
+            "products": products,
+            "failed_rows": counters["failed_rows"],
+            "column_mapping_report": column_detector.get_mapping_report(detected_columns),
+            "column_profile": column_profile,
+            "layout": {
+                "fingerprint": self._header_fingerprint(df.columns),
+                "header_row": header_row,
+                "sheet_name": sheet_name
+            },
+            "layout_cache_hit": cache_hit,
+            "stages": timer.as_dict()
+        }
+
+    def _excel_sheet_names(self, file_path: str) -> List[str]:
+        """Имена листов xlsx без чтения данных."""
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(file_path, read_only=True)
+        try:
+            return workbook.sheetnames
+        finally:
+            workbook.close()
+
+    def _locate_header(
+        self,
+        raw: pd.DataFrame,
+        layout_hints: Optional[List[Dict]]
+    ) -> Tuple[pd.DataFrame, int, Optional[Dict]]:
+        """
+        Находит строку заголовков в таблице, прочитанной без заголовка.
+
+        Возвращает (таблица с заголовком, номер строки, совпавшая раскладка).
+        """
+        layout_hint = self._match_layout(
+            layout_hints,
+            lambda row: self._row_cells(raw, row) if row < len(raw) else None
+        )
+        if layout_hint:
+            header_row = layout_hint["header_row"]
+        else:
+            header_row = self._find_header_row(raw)
+        return self._apply_header(raw, header_row), header_row, layout_hint
+
+    def _apply_header(self, df: pd.DataFrame, header_row: int) -> pd.DataFrame:
+        """Делает строку header_row заголовком, данные - всё, что ниже."""
+        df = df.copy()
+        df.columns = self._row_cells(df, header_row)
+        return df.iloc[header_row + 1:].reset_index(drop=True)
+
+    def _row_cells(self, df: pd.DataFrame, row: int) -> np.ndarray:
+        """Ячейки строки row как массив объектов; пустые (None, NA) - NaN."""
+        return df.iloc[row].to_numpy(dtype=object, na_value=np.nan)
+
+    def _compact_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Переводит чисто строковые колонки из object в строки Arrow.
+
+        Нужен там, где таблица собирается из значений ячеек (openpyxl,
+        pdfplumber), а не читается reader'ом с dtype. Колонки с числами и
+        датами остаются object: их разбирают number_parser и raw_text.
+        """
+        if not self.arrow_strings:
+            return df
+        for i in range(df.shape[1]):
+            column = df.iloc[:, i]
+            if column.dtype == object and pd.api.types.infer_dtype(column, skipna=True) == 'string':
+                df.isetitem(i, column.astype(self.text_dtype))
+        return df
+
+    def _header_fingerprint(self, header_cells) -> str:
+        """Отпечаток раскладки: хеш нормализованных ячеек строки заголовков."""
+        cells = [
+            '' if pd.isna(cell) else re.sub(r'\s+', ' ', str(cell)).strip().lower()
+            for cell in header_cells
+        ]
+        return hashlib.sha1('\x1f'.join(cells).encode('utf-8')).hexdigest()
+
+    def _match_layout(
+        self,
+        layout_hints: Optional[List[Dict]],
+        header_cells_at: Callable[[int], Optional[object]]
+    ) -> Optional[Dict]:
+        """
+        Ищет сохранённую раскладку, чей заголовок совпадает с файлом.
+
+        header_cells_at(row) возвращает ячейки строки row (или None, если
+        такой строки нет); отпечаток сравнивается ровно в той строке, где
+        заголовок был в прошлый раз. Имя листа не сравнивается: листы-категории
+        одного каталога обычно имеют одинаковую шапку.
+        """
+        for hint in layout_hints or []:
+            header_row = hint.get("header_row")
+            if header_row is None or not hint.get("detected_columns"):
+                continue
+            cells = header_cells_at(header_row)
+            if cells is None:
+                continue
+            if self._header_fingerprint(cells) == hint.get("fingerprint"):
+                logger.info(
+                    f"Layout cache hit: header row {header_row}, fingerprint {hint['fingerprint'][:12]}"
+                )
+                return hint
+        return None
+
+    def _resolve_columns(
+        self,
+        df: pd.DataFrame,
+        layout_hint: Optional[Dict]
+    ) -> Tuple[Dict[str, str], Optional[Dict], bool]:
+        """
+        Маппинг колонок из кеша раскладки или полным определением.
+
+        Returns:
+            (detected_columns, column_profile, cache_hit)
+        """
+        if layout_hint:
+            cached = layout_hint["detected_columns"]
+            columns = set(str(col) for col in df.columns)
+            if all(str(col) in columns for col in cached.values()):
+                # Метки колонок могли прийти из JSON строками - берём реальные из df
+                labels = {str(col): col for col in df.columns}
+                detected_columns = {col_type: labels[str(col)] for col_type, col in cached.items()}
+                return detected_columns, None, True
+            logger.info("Cached layout does not fit the header, running full detection")
+
+        column_profile = column_detector.profile_columns(df)
+        detected_columns = column_detector.detect_columns(df, profile=column_profile)
+        return detected_columns, column_profile, False
+
+    async def _parse_csv(self, file_path: str) -> pd.DataFrame:
+        """Парсит CSV файл."""
+        text_format = self._sniff_text_file(file_path)
+        return self._read_delimited(file_path, text_format)
 
     async def _parse_pdf(self, file_path: str) -> pd.DataFrame:
         """Парсит PDF файл с таблицами."""
         all_tables = []
-        with pdfplumber.open(file_path) as pdf:
-            for page in pdf.pages[:10]:
-                tables = page.extract_tables()
-                if tables:
-                    for table in tables:
-                        if len(table) > 1:
-                            df = pd.DataFrame(table[1:], columns=table[0])
-                            all_tables.append(df)
+        for tables in self._iter_pdf_pages(file_path):
+            for table in tables:
+                if len(table) > 1:
+                    df = pd.DataFrame(table[1:], columns=table[0])
+                    all_tables.append(df)
 
         if all_tables:
             df = pd.concat(all_tables, ignore_index=True)
-            return df
+            return self._compact_frame(df)
         return pd.DataFrame()
 
     async def _parse_txt(self, file_path: str) -> pd.DataFrame:
-        """Парсит TXT файл."""
-        try:
-            df = pd.read_csv(
+        """Парсит TXT файл: с разделителем или выровненный пробелами."""
+        text_format = self._sniff_text_file(file_path, default_delimiter=None)
+        if text_format["delimiter"] is None:
+            df = pd.read_fwf(
                 file_path,
-                delimiter='\t',
-                encoding=self.default_encoding,
+                header=None,
+                encoding=text_format["encoding"],
+                encoding_errors='replace',
                 nrows=self.max_rows,
-                on_bad_lines='skip'
+                dtype=self.text_dtype
             )
             return df.dropna(how='all')
-        except:
-            df = pd.read_csv(
-                file_path,
-                delim_whitespace=True,
-                encoding=self.default_encoding,
-                nrows=self.max_rows,
-                on_bad_lines='skip'
+        return self._read_delimited(file_path, text_format)
+
+    def _sniff_text_file(self, file_path: str, default_delimiter: Optional[str] = ',') -> Dict:
+        """
+        Определяет кодировку и разделитель CSV/TXT по первым байтам файла.
+
+        Разделитель - тот, что даёт самую устойчивую ширину строк образца;
+        если такого нет, берётся default_delimiter (None - колонки выровнены
+        пробелами). Служебные строки над таблицей (название прайса, дата)
+        уже таблицы, их число возвращается в skip_rows.
+        """
+        with open(file_path, 'rb') as f:
+            sample = f.read(TEXT_SAMPLE_SIZE)
+
+        encoding = self._sniff_encoding(sample)
+        text = codecs.getincrementaldecoder(encoding)(errors='replace').decode(sample)
+
+        def sample_rows(delimiter):
+            return csv.reader(io.StringIO(text, newline=''), delimiter=delimiter)
+
+        best_delimiter = default_delimiter
+        best_width = None
+        best_score = (0, 0)
+        for delimiter in TEXT_DELIMITERS:
+            widths = [len(row) for row in islice(sample_rows(delimiter), TEXT_SAMPLE_LINES) if row]
+            if not widths:
+                continue
+            width, frequency = Counter(widths).most_common(1)[0]
+            if width < 2:
+                continue
+            score = (frequency, width)
+            if score > best_score:
+                best_delimiter, best_width, best_score = delimiter, width, score
+
+        skip_rows = 0
+        if best_delimiter and best_width:
+            reader = sample_rows(best_delimiter)
+            for row in islice(reader, TEXT_SAMPLE_LINES):
+                if len(row) == best_width:
+                    skip_rows = reader.line_num - 1
+                    break
+        elif best_delimiter:
+            best_width = max(
+                (len(row) for row in islice(sample_rows(best_delimiter), TEXT_SAMPLE_LINES)),
+                default=1
             )
-            return df.dropna(how='all')
+
+        logger.info(
+            f"Sniffed text file: encoding={encoding}, delimiter={best_delimiter!r}, "
+            f"width={best_width}, skip_rows={skip_rows}"
+        )
+        return {
+            "encoding": encoding,
+            "delimiter": best_delimiter,
+            "width": best_width,
+            "skip_rows": skip_rows
+        }
+
+    def _sniff_encoding(self, sample: bytes) -> str:
+        """Кодировка по образцу: BOM, UTF-16 по нулевым байтам, UTF-8, иначе cp1251."""
+        if sample.startswith(codecs.BOM_UTF8):
+            return 'utf-8-sig'
+        if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+            return 'utf-16'
+        if not self.auto_detect_encoding or not sample:
+            return self.default_encoding
+
+        # В UTF-16 без BOM у цифр, латиницы и разделителей старший байт нулевой
+        even_zeros = sample[0::2].count(0)
+        odd_zeros = sample[1::2].count(0)
+        half = len(sample) // 2
+        if odd_zeros > half * 0.3 and even_zeros < half * 0.05:
+            return 'utf-16-le'
+        if even_zeros > half * 0.3 and odd_zeros < half * 0.05:
+            return 'utf-16-be'
+
+        try:
+            # final=False - хвост образца может обрезать многобайтовый символ
+            codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+            return 'utf-8'
+        except UnicodeDecodeError:
+            return 'cp1251'
+
+    def _read_delimited(self, file_path: str, text_format: Dict) -> pd.DataFrame:
+        """
+        Читает CSV за один проход.
+
+        Таблица читается без заголовка (его ищет _locate_header), шириной
+        text_format["width"] и без служебных строк над ней. Все ячейки читаются строками: артикулы не
+        превращаются в float ("12345.0"), а числа разбираются дальше по
+        колонкам. При установленном pyarrow используется его многопоточный
+        reader.
+        """
+        names = range(text_format["width"])
+        if _HAS_PYARROW:
+            try:
+                df = pd.read_csv(
+                    file_path,
+                    delimiter=text_format["delimiter"],
+                    encoding=text_format["encoding"],
+                    engine='pyarrow',
+                    skiprows=text_format["skip_rows"],
+                    header=None,
+                    names=names,
+                    dtype=self.text_dtype,
+                    on_bad_lines='skip'
+                )
+                return df.head(self.max_rows).dropna(how='all')
+            except Exception as e:
+                # pyarrow строже к битым байтам и кавычкам
+                logger.warning(f"pyarrow CSV reader failed ({e}), using the default engine")
+
+        df = pd.read_csv(
+            file_path,
+            delimiter=text_format["delimiter"],
+            encoding=text_format["encoding"],
+            skiprows=text_format["skip_rows"],
+            header=None,
+            names=names,
+            encoding_errors='replace',
+            dtype=self.text_dtype,
+            nrows=self.max_rows,
+            on_bad_lines='skip'
+        )
+        return df.dropna(how='all')
 
     def _find_header_row(self, df: pd.DataFrame) -> int:
         """Умно находит строку с заголовками."""
@@ -235,88 +1133,200 @@ class PriceListParser:
 
         return text
 
-    def _extract_products(self, df: pd.DataFrame, detected_columns: Dict[str, str]) -> List[Dict]:
-        """Извлекает товары из DataFrame."""
-        products = []
+    def _extract_batch(self, df: pd.DataFrame, detected_columns: Dict[str, str]) -> Tuple[List[Dict], Counter, int]:
+        """
+        Товары, частоты тегов и число строк с неразобранными ценой/остатком
+        одной порции (выполняется в потоке потокового разбора).
+        """
+        counters = {"failed_rows": 0}
+        products = self._extract_products(df, detected_columns, counters)
+        return products, tag_extractor.count(products), counters["failed_rows"]
 
-        for idx, row in df.iterrows():
-            try:
-                product = {}
-
-                if 'sku' in detected_columns:
-                    sku = row.get('sku')
-                    if pd.isna(sku) or str(sku).strip() == '':
-                        continue
-                    product['sku'] = str(sku).strip()
-
-                if 'name' in detected_columns:
-                    name = row.get('name')
-                    if pd.isna(name) or str(name).strip() == '' or str(name).lower() == 'nan':
-                        continue
-                    product['name'] = self._normalize_text(name)
-                else:
-                    continue
+    def _extract_products(
+        self,
+        df: pd.DataFrame,
+        detected_columns: Dict[str, str],
+        counters: Optional[Dict[str, int]] = None
+    ) -> List[Dict]:
+        """
+        Извлекает товары из DataFrame.
 
-                if 'brand' in detected_columns:
-                    brand = row.get('brand')
-                    if not pd.isna(brand):
-                        product['brand'] = str(brand).strip().lower()
+        Работает по колонкам: маски пустых SKU/наименований, нормализация
+        строк, разбор цен и остатков (number_parser) и сборка raw_text
+        выполняются векторно, по строкам собираются только итоговые словари.
+        Строки Arrow нормализуются в pyarrow.compute; бренд, категория и
+        единица нормализуются один раз на уникальное значение, и товары
+        получают общие объекты строк вместо копии на строку.
+        В counters["failed_rows"] добавляется число товаров, у которых цену
+        или остаток не удалось разобрать (товар при этом сохраняется без них).
+        """
+        if 'name' not in detected_columns or df.empty:
+            logger.info("Extracted 0 products")
+            return []
 
-                if 'category' in detected_columns:
-                    category = row.get('category')
-                    if not pd.isna(category):
-                        product['category'] = str(category).strip().lower()
+        keep = np.ones(len(df), dtype=bool)
+        fields = {}
 
-                if 'unit' in detected_columns:
-                    unit = row.get('unit')
-                    if not pd.isna(unit):
-                        product['unit'] = str(unit).strip()
+        if 'sku' in detected_columns:
+            sku = self._get_column(df, 'sku')
+            if sku is None:
+                keep[:] = False
+            else:
+                sku_text = as_text(sku).str.strip()
+                keep &= (sku.notna() & (sku_text != '')).to_numpy(dtype=bool)
+                fields['sku'] = sku_text.to_numpy(dtype=object)
 
-                if 'stock' in detected_columns:
-                    stock = row.get('stock')
-                    try:
-                        product['stock'] = int(float(stock))
-                    except:
-                        pass
+        name = self._get_column(df, 'name')
+        if name is None:
+            keep[:] = False
+        else:
+            name_text = as_text(name)
+            keep &= (
+                name.notna()
+                & (name_text.str.strip() != '')
+                & (name_text.str.lower() != 'nan')
+            ).to_numpy(dtype=bool)
+            normalized = (
+                name_text
+                .str.replace(',', '', regex=False)
+                .str.replace(r'\s+', ' ', regex=True)
+                .str.strip()
+            )
+            if not isinstance(name.dtype, pd.StringDtype):
+                # _normalize_text возвращает "" для ложных значений (0, False)
+                normalized = normalized.where(~name.eq(0), '')
+            fields['name'] = normalized.to_numpy(dtype=object)
 
-                product['raw_text'] = ' '.join([
-                    str(v) for v in row.values if not pd.isna(v) and str(v).lower() != 'nan'
-                ])
+        if not keep.any():
+            logger.info("Extracted 0 products")
+            return []
 
-                products.append(product)
+        for col_type, lower in (('brand', True), ('category', True), ('unit', False)):
+            if col_type not in detected_columns:
+                continue
+            series = self._get_column(df, col_type)
+            if series is None:
+                continue
+            # Колонка как категория: коды строк и уникальные значения (-1 - пусто)
+            codes, categories = pd.factorize(series)
+            text = as_text(pd.Series(categories)).str.strip()
+            if lower:
+                text = text.str.lower()
+            # Код -1 указывает на последний элемент - None
+            values = np.append(text.to_numpy(dtype=object), None)
+            fields[col_type] = values[codes]
 
-            except Exception as e:
-                logger.warning(f"Error processing row {idx}: {e}")
+        failed = np.zeros(len(df), dtype=bool)
+        for col_type, parse_column in (('price', parse_price_column), ('stock', parse_stock_column)):
+            if col_type not in detected_columns:
+                continue
+            series = self._get_column(df, col_type)
+            if series is None:
                 continue
+            fields[col_type], column_failed = parse_column(series)
+            failed |= column_failed
+
+        if counters is not None:
+            counters["failed_rows"] = counters.get("failed_rows", 0) + int((failed & keep).sum())
+
+        fields['raw_text'] = self._build_raw_text(df)
+
+        keys = list(fields.keys())
+        columns = [fields[key][keep] for key in keys]
+
+        products = []
+        for values in zip(*columns):
+            products.append({
+                key: value for key, value in zip(keys, values) if value is not None
+            })
 
         logger.info(f"Extracted {len(products)} products")
         return products
 
-    def _generate_tags(self, products: List[Dict]) -> List[str]:
-        """Генерирует уникальные теги из товаров."""
-        tags = set()
-
-        for product in products:
-            # НОВОЕ: Добавляем SKU (артикулы/коды) в теги
-            if 'sku' in product and product['sku']:
-                tags.add(product['sku'].strip())
+    def _get_column(self, df: pd.DataFrame, column: str) -> Optional[pd.Series]:
+        """Колонка по имени; при дублях заголовков берётся первая."""
+        if column not in df.columns:
+            return None
+        series = df[column]
+        if isinstance(series, pd.DataFrame):
+            series = series.iloc[:, 0]
+        return series
 
-            if 'brand' in product and product['brand']:
-                tags.add(product['brand'])
+    def _build_raw_text(self, df: pd.DataFrame) -> np.ndarray:
+        """Склеивает все непустые ячейки строки через пробел."""
+        if self.arrow_strings:
+            return self._build_raw_text_arrow(df)
 
-            if 'category' in product and product['category']:
-                tags.add(product['category'])
+        raw_text = pd.Series('', index=df.index, dtype=object)
+        for i in range(df.shape[1]):
+            column = df.iloc[:, i]
+            text = column.astype(str)
+            present = column.notna() & (text.str.lower() != 'nan')
+            raw_text = raw_text + (' ' + text).where(present, '')
+        # Отрезаем ведущий разделитель
+        return raw_text.str[1:].to_numpy(dtype=object)
 
-            if 'name' in product and product['name']:
-                words = product['name'].lower().split()
-                for word in words:
-                    if len(word) > 3 and not word.isdigit():
-                        tags.add(word)
+    def _build_raw_text_arrow(self, df: pd.DataFrame) -> np.ndarray:
+        """_build_raw_text на pyarrow.compute: без Python-строк на промежуточных шагах."""
+        null = pa.scalar(None, pa.large_string())
+        separator = pa.scalar(" ", pa.large_string())
+        raw_text = pa.nulls(len(df), pa.large_string())
+        for i in range(df.shape[1]):
+            column = df.iloc[:, i]
+            if not isinstance(column.dtype, pd.StringDtype):
+                column = column.astype(str).where(column.notna())
+            text = pa.array(column, from_pandas=True)
+            if isinstance(text, pa.ChunkedArray):
+                text = text.combine_chunks()
+            text = text.cast(pa.large_string())
+            # Ячейка "nan" (строка из выгрузки) - пустая, как NaN
+            # (replace_with_mask, а не if_else: if_else в pyarrow 15 портит срезы строк)
+            is_nan = pc.fill_null(pc.equal(pc.utf8_lower(text), "nan"), False)
+            text = pc.replace_with_mask(text, is_nan, null)
+            # join даёт null, если пуста одна из частей: тогда берётся непустая
+            raw_text = pc.coalesce(pc.binary_join_element_wise(raw_text, text, separator), raw_text, text)
+        return pc.fill_null(raw_text, "").to_numpy(zero_copy_only=False).astype(object, copy=False)
 
-        tags = sorted(list(tags))
+    def _generate_tags(self, products: List[Dict]) -> List[str]:
+        """Самые частые теги товаров, не больше PARSING_MAX_TAGS_PER_SUPPLIER."""
+        tags = tag_extractor.top(tag_extractor.count(products))
 
-        logger.info(f"Generated {len(tags)} unique tags")
+        logger.info(f"Generated {len(tags)} tags")
         return tags
 
 
 price_list_parser = PriceListParser()
+
+
+def _parse_sheet_job(job: Tuple[str, str, Optional[List[Dict]], bool]) -> Optional[Dict]:
+    """Точка входа для пула процессов: разбор одного листа."""
+    file_path, sheet_name, layout_hints, sheet_as_category = job
+    try:
+        return price_list_parser._parse_sheet(file_path, sheet_name, layout_hints, sheet_as_category)
+    except Exception as e:
+        logger.error(f"Error parsing sheet '{sheet_name}': {e}", exc_info=True)
+        return None
+
+
+def _extract_pdf_page_job(job: Tuple[str, int, int]) -> List[List[List]]:
+    """Точка входа для пула процессов: таблицы одной страницы PDF."""
+    file_path, page_number, timeout = job
+    try:
+        with time_limit(timeout):
+            with pdfplumber.open(file_path, pages=[page_number + 1]) as pdf:
+                page = pdf.pages[0]
+                if pdf_ocr.needs_ocr(page):
+                    rows = pdf_ocr.page_rows(page, timeout)
+                    if not rows:
+                        return []
+                    # Над таблицей скана обычно шапка документа
+                    header_row = price_list_parser._find_header_row(pd.DataFrame(rows))
+                    return [rows[header_row:]]
+                return page.extract_tables() or []
+    except Exception as e:
+        # pdfminer оборачивает исключения разбора, TimeoutError остаётся в цепочке
+        if isinstance(e, TimeoutError) or isinstance(e.__context__, TimeoutError):
+            logger.warning(f"PDF page {page_number + 1} skipped: extraction took longer than {timeout}s")
+            return []
+        logger.error(f"Error parsing PDF page {page_number + 1}: {e}", exc_info=True)
+        return []
@@ -0,0 +1,94 @@
+"""
+Tag Extractor Service
+Теги поставщика из товаров прайс-листа: частотный отбор top-K
+"""
+from collections import Counter
+from typing import Dict, Iterable, List, Mapping, Optional
+import heapq
+import logging
+import re
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Слово наименования: буквы, цифры и дефис, начинается с буквы
+WORD_RE = re.compile(r"[a-zа-яё][a-zа-яё0-9\-]*[a-zа-яё0-9]")
+
+MIN_WORD_LENGTH = 4
+
+# Служебные слова и слова, которые есть почти в любом прайсе и ничего не
+# говорят о поставщике
+TAG_STOPWORDS = frozenset("""
+    более менее также либо этот этого этой того тому чтобы когда если только
+    очень можно нужно будет были было есть всех весь всего через после перед
+    между около кроме среди возле внутри снаружи который которая которые
+    которых свой своя свои
+    цена цены рубль рублей стоимость скидка акция новинка новый новая новое
+    наличие заказ заказа под-заказ поставка доставка склад остаток остатки
+    артикул штук штука штуки упак упаковка упаковке комплект комплекте
+    размер размеры цвет цвета длина ширина высота диаметр объем объём
+    with from this that pack item items size color
+""".split())
+
+
+class TagExtractor:
+    """
+    Отбирает теги поставщика по частоте.
+
+    Кандидаты - бренды, категории и слова наименований длиннее трёх букв без
+    стоп-слов. Артикулы в теги не попадают: они уникальны (частота 1) и
+    ищутся через индекс товаров. Частоты порций складываются (Counter), из
+    итога heapq выбирает PARSING_MAX_TAGS_PER_SUPPLIER самых частых.
+    """
+
+    def __init__(self):
+        self.max_tags = settings.PARSING_MAX_TAGS_PER_SUPPLIER
+
+    def count(self, products: Iterable[Mapping]) -> Counter:
+        """Частоты тегов в товарах (словари или строки с name/brand/category)."""
+        counts = Counter()
+        for product in products:
+            for field in ("brand", "category"):
+                value = product.get(field)
+                if value and isinstance(value, str):
+                    value = value.strip()
+                    if value:
+                        counts[value] += 1
+
+            name = product.get("name")
+            if name and isinstance(name, str):
+                for word in WORD_RE.findall(name.lower()):
+                    if len(word) >= MIN_WORD_LENGTH and word not in TAG_STOPWORDS:
+                        counts[word] += 1
+        return counts
+
+    def top(self, counts: Mapping[str, int], limit: Optional[int] = None) -> List[str]:
+        """limit самых частых тегов (при равной частоте - по алфавиту)."""
+        limit = limit or self.max_tags
+        best = heapq.nsmallest(limit, counts.items(), key=lambda item: (-item[1], item[0]))
+        return [tag for tag, _ in best]
+
+    def top_counts(self, counts: Mapping[str, int], limit: int) -> Dict[str, int]:
+        """Самые частые теги вместе с частотами - для слияния частичных результатов."""
+        return {tag: counts[tag] for tag in self.top(counts, limit)}
+
+    def merge(self, new_tags: Iterable[str], existing: Optional[Iterable[str]], limit: Optional[int] = None) -> List[str]:
+        """
+        Теги поставщика после импорта: сначала теги нового файла (по
+        убыванию частоты), затем прежние, всего не больше limit.
+        """
+        limit = limit or self.max_tags
+        merged = list(dict.fromkeys(new_tags))[:limit]
+        if len(merged) < limit and existing:
+            seen = set(merged)
+            for tag in existing:
+                if tag not in seen:
+                    merged.append(tag)
+                    seen.add(tag)
+                    if len(merged) >= limit:
+                        break
+        return merged
+
+
+tag_extractor = TagExtractor()
@@ -0,0 +1,84 @@
+"""
+Асинхронная среда Celery-воркера: один event loop на процесс
+"""
+from typing import Any, Awaitable
+import asyncio
+import logging
+import os
+
+from celery.signals import worker_process_init, worker_process_shutdown
+
+from app.core.database import db_manager
+from app.core.elasticsearch import es_manager
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRuntime:
+    """
+    Event loop процесса воркера и привязанные к нему клиенты.
+
+    Пул соединений PostgreSQL и клиент Elasticsearch создаются модулями при
+    импорте (до fork в prefork-пуле) и привязываются к loop'у при первом
+    использовании. Поэтому в каждом процессе заводится свой loop, пул
+    сбрасывается, клиент ES пересоздаётся, и все задачи процесса выполняются
+    только в этом loop'е.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._pid = None
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        # Запуск без сигналов воркера (--pool=solo, task_always_eager) или после fork
+        if self._loop is None or self._loop.is_closed() or self._pid != os.getpid():
+            self.start()
+        return self._loop
+
+    def start(self):
+        """Создаёт loop процесса и отвязывает клиентов от унаследованных соединений."""
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._pid = os.getpid()
+
+        # close=False: соединения родителя не закрываем, чтобы не оборвать их у него
+        db_manager.engine_master.sync_engine.dispose(close=False)
+        if db_manager.engine_replica:
+            db_manager.engine_replica.sync_engine.dispose(close=False)
+        es_manager._initialize_client()
+
+        logger.info(f"Async runtime started in process {self._pid}")
+
+    def run(self, coro: Awaitable[Any]) -> Any:
+        """Выполняет корутину в loop'е процесса."""
+        return self.loop.run_until_complete(coro)
+
+    def shutdown(self):
+        """Закрывает соединения и loop процесса."""
+        if self._loop is None or self._loop.is_closed() or self._pid != os.getpid():
+            return
+        try:
+            self._loop.run_until_complete(self._close_clients())
+        except Exception as e:
+            logger.warning(f"Error closing worker connections: {e}")
+        finally:
+            self._loop.close()
+            self._loop = None
+
+    async def _close_clients(self):
+        await db_manager.close()
+        await es_manager.close()
+
+
+async_runtime = AsyncRuntime()
+
+
+@worker_process_init.connect
+def _start_worker_runtime(**kwargs):
+    async_runtime.start()
+
+
+@worker_process_shutdown.connect
+def _stop_worker_runtime(**kwargs):
+    async_runtime.shutdown()
@@ -31,9 +31,9 @@ celery_app.conf.beat_schedule = {
         "task": "app.tasks.email_tasks.check_imap_inbox",
         "schedule": settings.CELERY_BEAT_IMAP_CHECK_INTERVAL,
     },
-    "reindex-elasticsearch": {
-        "task": "app.tasks.search_tasks.full_reindex",
-        "schedule": crontab(hour=2, minute=0),
+    "compact-supplier-tags": {
+        "task": "app.tasks.parsing_tasks.compact_supplier_tags_task",
+        "schedule": crontab(hour=3, minute=0),
     },
     "cleanup-old-files": {
         "task": "app.tasks.cleanup_tasks.cleanup_old_files",
@@ -41,4 +41,12 @@ celery_app.conf.beat_schedule = {
     },
 }
 
+# Ночная переиндексация перезаписывает в ES каталоги всех поставщиков из
+# снимков импортов - только при INDEX_FULL_REINDEX_ENABLED, иначе вручную
+if settings.INDEX_FULL_REINDEX_ENABLED:
+    celery_app.conf.beat_schedule["reindex-elasticsearch"] = {
+        "task": "app.tasks.search_tasks.full_reindex",
+        "schedule": crontab(hour=2, minute=0),
+    }
+
 celery_app.autodiscover_tasks(["app.tasks"])
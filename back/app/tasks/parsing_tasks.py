@@ -1,83 +1,453 @@
+from celery import chord
 from app.tasks.celery_app import celery_app
+from app.tasks.async_runtime import async_runtime
 from app.services.price_list_parser import price_list_parser
 from app.core.elasticsearch import es_manager
 from app.core.database import db_manager
 from app.models.product_import import ProductImport, ImportStatus
 from app.models.supplier import Supplier
 from app.models.product import Product
+from app.services.catalog_diff import CatalogDiff, product_key
+from app.services.catalog_snapshot import (
+    SnapshotWriter, iter_products, read_columns, remove_snapshot, snapshot_dir, supplier_snapshot_chain
+)
+from app.services.import_pipeline import ImportPipeline
+from app.services.product_writer import PRODUCT_FIELDS, product_writer
+from app.services.tag_extractor import TAG_STOPWORDS, tag_extractor
+from app.core.config import settings
+from collections import Counter
+import asyncio
 import json
-from sqlalchemy import select
+from sqlalchemy import delete, func, select, update
 import logging
-import tempfile
 import os
-import asyncio
+import uuid
 
 logger = logging.getLogger(__name__)
 
 
-@celery_app.task(name="app.tasks.parsing_tasks.parse_pricelist_task", bind=True)
-def parse_pricelist_task(self, supplier_id: str, filename: str, file_content: bytes):
-    # ИСПРАВЛЕНИЕ: Получаем или создаём event loop для текущего потока
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+# Размер пачки id в DELETE ... WHERE id IN (...)
+DELETE_BATCH_SIZE = 10000
+
+NO_PRODUCTS_ERROR = "No products found in file"
+
+
+async def _load_catalog_diff(session, supplier_id: str, import_id=None) -> tuple:
+    """
+    Текущий каталог поставщика для дифференциального импорта.
+
+    Возвращает (CatalogDiff, legacy). legacy - id документов ES товаров без
+    content_hash (загружены полным импортом, id вида {supplier_id}_{sku}_{i}).
+    Если они есть, импорт переиндексирует весь каталог под id товаров, а
+    старые документы удаляются после его успешного завершения.
+
+    Если каталог - ровно снимок прошлого дифференциального импорта, id,
+    ключи и хеши берутся из колонок снимка, без выборки товаров из PostgreSQL.
+    import_id - текущий импорт, он не учитывается при поиске снимков.
+    """
+    chain = None
+    if settings.PARSING_SNAPSHOTS_ENABLED:
+        chain = await supplier_snapshot_chain(session, supplier_id, exclude_import_id=import_id)
+    if chain and len(chain) == 1 and chain[0].import_mode == "differential":
+        table = await asyncio.to_thread(
+            read_columns, chain[0].snapshot_path, ["row_number", "doc_id", "sku", "name", "content_hash"]
+        )
+        logger.info(f"Catalog of supplier {supplier_id} loaded from snapshot: {table.num_rows} products")
+        return CatalogDiff(
+            (uuid.UUID(doc_id), product_key(sku, name), content_hash)
+            for doc_id, sku, name, content_hash in zip(
+                table.column("doc_id").to_pylist(),
+                table.column("sku").to_pylist(),
+                table.column("name").to_pylist(),
+                table.column("content_hash").to_pylist()
+            )
+        ), []
+
+    result = await session.execute(
+        select(Product.id, Product.sku, Product.name, Product.content_hash, Product.row_number)
+        .where(Product.supplier_id == supplier_id)
+        .order_by(Product.row_number)
+    )
+    rows = result.all()
+    # Номер строки полного импорта - номер товара в файле с единицы
+    legacy = [
+        es_manager.product_document_id(str(supplier_id), {"sku": row.sku}, row.row_number - 1)
+        for row in rows
+        if row.content_hash is None and row.row_number
+    ]
+    return CatalogDiff(
+        (row.id, product_key(row.sku, row.name), None if legacy else row.content_hash)
+        for row in rows
+    ), legacy
+
+
+async def _write_diff_batch(
+    session,
+    batch: list,
+    diff: CatalogDiff,
+    supplier_id: str,
+    import_id,
+    first_row: int,
+    snapshot: SnapshotWriter = None
+) -> dict:
+    """
+    Записывает в PostgreSQL только новые и изменённые товары порции.
+
+    Возвращает документы для ES по id товара в PostgreSQL. В снимок порция
+    пишется целиком - с id и хешами всех товаров, включая неизменённые.
+    """
+    added, changed, unchanged = diff.classify(batch)
+
+    doc_ids = [None] * len(batch)
+    hashes = [None] * len(batch)
+    for position, product_id, content_hash in unchanged:
+        doc_ids[position] = str(product_id)
+        hashes[position] = content_hash
+
+    documents = {}
+    if added:
+        rows = []
+        for position, product_data, content_hash in added:
+            product_id = uuid.uuid4()
+            rows.append((first_row + position, product_data, product_id, content_hash))
+            documents[str(product_id)] = product_data
+            doc_ids[position] = str(product_id)
+            hashes[position] = content_hash
+        await product_writer.copy_products(
+            rows, supplier_id, import_id, connection=await session.connection()
+        )
+
+    if changed:
+        await session.execute(update(Product), [
+            {
+                "id": product_id,
+                "import_id": import_id,
+                "row_number": first_row + position,
+                "content_hash": content_hash,
+                **{field: product_data.get(field) for field in PRODUCT_FIELDS}
+            }
+            for position, product_id, product_data, content_hash in changed
+        ])
+
+        for position, product_id, product_data, content_hash in changed:
+            documents[str(product_id)] = product_data
+            doc_ids[position] = str(product_id)
+            hashes[position] = content_hash
+
+    if added or changed:
+        await session.commit()
+    if snapshot is not None:
+        await asyncio.to_thread(snapshot.write, batch, first_row, doc_ids, hashes)
+    return documents
+
+
+async def _remove_products(session, product_ids: list) -> int:
+    """Удаляет товары, пропавшие из прайс-листа, из PostgreSQL и ES."""
+    for start in range(0, len(product_ids), DELETE_BATCH_SIZE):
+        chunk = product_ids[start:start + DELETE_BATCH_SIZE]
+        await session.execute(delete(Product).where(Product.id.in_(chunk)))
+    await session.commit()
+
+    await es_manager.delete_products_by_id([str(product_id) for product_id in product_ids])
+    return len(product_ids)
+
+
+async def _write_full_batch(
+    session,
+    batch: list,
+    first_row: int,
+    supplier_id: str,
+    import_id,
+    snapshot: SnapshotWriter = None
+) -> list:
+    """Полный импорт: порция целиком пишется в PostgreSQL через COPY (и в снимок)."""
+    await product_writer.copy_products(
+        ((first_row + idx, product_data) for idx, product_data in enumerate(batch)),
+        supplier_id, import_id, connection=await session.connection()
+    )
+    await session.commit()
+
+    if snapshot is not None:
+        # id документов - как у _index_full_batch: номер товара в файле с нуля
+        doc_ids = [
+            es_manager.product_document_id(supplier_id, product_data, first_row - 1 + idx)
+            for idx, product_data in enumerate(batch)
+        ]
+        await asyncio.to_thread(snapshot.write, batch, first_row, doc_ids)
+    return batch
+
+
+async def _index_full_batch(batch: list, start_index: int, supplier_id: str, supplier_fields: dict) -> int:
+    """Полный импорт: индексирует порцию в ES под id вида {supplier_id}_{sku}_{i}."""
+    for product_data in batch:
+        product_data.update(supplier_fields)
+    result = await es_manager.bulk_index_products(batch, supplier_id, start_index=start_index)
+    return result.get("success", 0)
+
+
+def _supplier_fields(supplier: Supplier) -> dict:
+    """Поля поставщика, которые добавляются в документы ES."""
+    return {
+        "supplier_id": str(supplier.id),
+        "supplier_name": supplier.name,
+        "supplier_inn": supplier.inn,
+    }
+
+
+def _store_layout(import_record: ProductImport, parse_result: dict):
+    """Сохраняет в записи импорта маппинг колонок и раскладку файла."""
+    detected_cols = parse_result.get("detected_columns", {})
+    import_record.detected_columns = json.loads(
+        json.dumps(detected_cols, default=str).replace(': NaN', ': null')
+    )
+
+    import_record.column_profile = parse_result.get("column_profile")
+
+    layout = parse_result.get("layout") or {}
+    import_record.header_fingerprint = layout.get("fingerprint")
+    import_record.header_row = layout.get("header_row")
+    import_record.sheet_name = layout.get("sheet_name")
+
+
+def _merge_supplier_tags(supplier: Supplier, tags):
+    """Теги нового файла вперёд, прежние следом, всего не больше PARSING_MAX_TAGS_PER_SUPPLIER."""
+    supplier.tags_array = tag_extractor.merge(tags, supplier.tags_array)
+
+
+async def _drop_superseded_snapshots(session, supplier_id: str, import_id):
+    """
+    Удаляет снимки прежних импортов поставщика: после дифференциального
+    импорта каталог целиком описывает его собственный снимок.
+    """
+    result = await session.execute(
+        select(ProductImport).where(
+            ProductImport.supplier_id == supplier_id,
+            ProductImport.id != import_id,
+            ProductImport.snapshot_path.isnot(None)
+        )
+    )
+    for import_record in result.scalars():
+        remove_snapshot(import_record.snapshot_path)
+        import_record.snapshot_path = None
+
+
+def _count_snapshot_tags(paths: list) -> Counter:
+    """Частоты тегов по колонкам name/brand/category снимков."""
+    tag_counts = Counter()
+    for path in paths:
+        for products in iter_products(path, columns=["name", "brand", "category"]):
+            tag_counts.update(tag_extractor.count(products))
+    return tag_counts
+
+
+async def _run_in_session(func):
+    """Выполняет func(session) в одной сессии на всю задачу."""
+    async with db_manager.async_session_master() as session:
+        return await func(session)
+
+
+async def _dispatch_shards(
+    session,
+    import_record: ProductImport,
+    plan: dict,
+    filename: str,
+    file_path: str
+) -> dict:
+    """
+    Запускает разбор шардов большого файла группой задач с финализатором.
+
+    Каждый диапазон строк разбирает своя задача parse_pricelist_shard_task
+    на любом свободном parsing-воркере; finalize_pricelist_import_task
+    получает их результаты (chord) и закрывает импорт.
+    """
+    import_id = str(import_record.id)
+    supplier_id = str(import_record.supplier_id)
+
+    _store_layout(import_record, plan)
+    import_record.import_mode = "full"
+    await session.commit()
+
+    shard_plan = {"header": plan["header"], "detected_columns": plan["detected_columns"]}
+    finalizer = chord(
+        parse_pricelist_shard_task.s(import_id, supplier_id, filename, file_path, shard_plan, start, stop)
+        for start, stop in plan["shards"]
+    )(finalize_pricelist_import_task.s(import_id))
+
+    logger.info(f"Import {import_id} split into {len(plan['shards'])} shards, finalizer task {finalizer.id}")
+    return {
+        "status": "sharded",
+        "supplier_id": supplier_id,
+        "import_id": import_id,
+        "shards": len(plan["shards"]),
+        "finalize_task_id": finalizer.id,
+        "import_mode": "full"
+    }
+
+
+async def _load_layout_hints(session, supplier_id: str, limit: int = 5) -> list:
+    """Раскладки последних успешных импортов поставщика (по одной на отпечаток)."""
+    result = await session.execute(
+        select(ProductImport)
+        .where(
+            ProductImport.supplier_id == supplier_id,
+            ProductImport.status == ImportStatus.COMPLETED,
+            ProductImport.header_fingerprint.isnot(None)
+        )
+        .order_by(ProductImport.created_at.desc())
+        .limit(limit * 4)
+    )
+    hints = {}
+    for record in result.scalars().all():
+        if record.header_fingerprint in hints or not record.detected_columns:
+            continue
+        hints[record.header_fingerprint] = {
+            "fingerprint": record.header_fingerprint,
+            "header_row": record.header_row,
+            "sheet_name": record.sheet_name,
+            "detected_columns": record.detected_columns,
+        }
+        if len(hints) >= limit:
+            break
+    return list(hints.values())
 
-    async def async_parse():
-        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(filename)[1]) as tmp_file:
-            tmp_file.write(file_content)
-            tmp_file_path = tmp_file.name
 
-        import_id = None
+@celery_app.task(name="app.tasks.parsing_tasks.parse_pricelist_task", bind=True)
+def parse_pricelist_task(self, supplier_id: str, filename: str, file_path: str, import_mode: str = None):
+    """
+    Разбор прайс-листа и загрузка товаров в PostgreSQL и Elasticsearch.
+
+    file_path - путь к уже сохранённому файлу в /app/uploads: через брокер
+    передаётся только ссылка, файл читается воркером с диска.
+
+    import_mode - "differential" (в каталоге поставщика обновляются только
+    новые, изменённые и пропавшие товары) или "full" (каждый импорт
+    добавляет полный набор товаров); по умолчанию PARSING_IMPORT_MODE.
+
+    Задача выполняется в loop'е процесса воркера (async_runtime) в одной
+    сессии: запись импорта и поставщик загружаются один раз, итог импорта
+    фиксируется одним коммитом.
+    """
+    mode = import_mode or settings.PARSING_IMPORT_MODE
+    differential = mode == "differential"
+
+    async def async_parse(session):
+        import_record = None
+        snapshot = None
+        layout_hints = []
+        legacy = []
 
         try:
             # Ищем существующую запись
-            async for session in db_manager.get_session():
-                result = await session.execute(
-                    select(ProductImport)
-                    .where(
-                        ProductImport.supplier_id == supplier_id,
-                        ProductImport.file_name == filename,
-                        ProductImport.status == "pending"
-                    )
-                    .order_by(ProductImport.created_at.desc())
-                    .limit(1)
+            result = await session.execute(
+                select(ProductImport)
+                .where(
+                    ProductImport.supplier_id == supplier_id,
+                    ProductImport.file_name == filename,
+                    ProductImport.status == "pending"
+                )
+                .order_by(ProductImport.created_at.desc())
+                .limit(1)
+            )
+            import_record = result.scalar_one_or_none()
+
+            if import_record:
+                import_record.status = ImportStatus.PROCESSING
+                import_record.file_format = os.path.splitext(filename)[1]
+                logger.info(f"Using existing import record {import_record.id}")
+            else:
+                import_record = ProductImport(
+                    supplier_id=supplier_id,
+                    file_name=filename,
+                    file_url=file_path,
+                    file_size=os.path.getsize(file_path) if os.path.exists(file_path) else None,
+                    file_format=os.path.splitext(filename)[1],
+                    status=ImportStatus.PROCESSING
                 )
-                import_record = result.scalar_one_or_none()
+                session.add(import_record)
+                logger.info(f"Created new import record (fallback)")
+
+            await session.commit()
+            import_id = import_record.id
+            logger.info(f"Processing import record {import_id} for supplier {supplier_id}")
+
+            supplier = await session.get(Supplier, import_record.supplier_id)
+            supplier_fields = _supplier_fields(supplier)
+
+            if settings.PARSING_LAYOUT_CACHE_ENABLED:
+                layout_hints = await _load_layout_hints(session, supplier_id)
+
+            diff = None
+            if differential:
+                diff, legacy = await _load_catalog_diff(session, supplier_id, import_id)
+
+            # Дальше сессия держит соединение только на время записи порций
+            await session.commit()
+
+            # Большой файл полного импорта делится на шарды для нескольких воркеров.
+            # Дифференциальный импорт сравнивает файл со всем каталогом и остаётся целым
+            if (
+                not differential
+                and settings.PARSING_SHARD_ROWS > 0
+                and price_list_parser.supports_sharding(filename)
+            ):
+                plan = await price_list_parser.plan_shards(
+                    file_path, filename, settings.PARSING_SHARD_ROWS, layout_hints=layout_hints
+                )
+                if plan and len(plan["shards"]) > 1:
+                    return await _dispatch_shards(session, import_record, plan, filename, file_path)
 
-                if import_record:
-                    import_record.status = ImportStatus.PROCESSING
-                    import_record.file_size = len(file_content)
-                    import_record.file_format = os.path.splitext(filename)[1]
-                    logger.info(f"Using existing import record {import_record.id}")
-                else:
-                    import_record = ProductImport(
-                        supplier_id=supplier_id,
-                        file_name=filename,
-                        file_size=len(file_content),
-                        file_format=os.path.splitext(filename)[1],
-                        status=ImportStatus.PROCESSING
+            if differential and legacy:
+                logger.info(f"Supplier {supplier_id} has products from full imports, reindexing its catalog")
+
+            use_streaming = (
+                settings.PARSING_STREAMING_ENABLED
+                and price_list_parser.supports_streaming(filename)
+            )
+
+            if settings.PARSING_SNAPSHOTS_ENABLED:
+                snapshot = SnapshotWriter(snapshot_dir(file_path, import_id))
+
+            async def write_batch(batch, offset):
+                if differential:
+                    return await _write_diff_batch(
+                        session, batch, diff, supplier_id, import_id, offset + 1, snapshot
                     )
-                    session.add(import_record)
-                    logger.info(f"Created new import record (fallback)")
 
-                await session.commit()
-                import_id = import_record.id
-                logger.info(f"Processing import record {import_id} for supplier {supplier_id}")
+                return await _write_full_batch(session, batch, offset + 1, supplier_id, import_id, snapshot)
 
-            # Парсим файл
-            parse_result = await price_list_parser.parse_file(tmp_file_path, filename)
+            async def index_batch(payload, offset):
+                if not differential:
+                    return await _index_full_batch(payload, offset, supplier_id, supplier_fields)
 
-            if not parse_result.get("success"):
-                async for session in db_manager.get_session():
-                    result = await session.execute(
-                        select(ProductImport).where(ProductImport.id == import_id)
+                for product_data in payload.values():
+                    product_data.update(supplier_fields)
+                batch_result = await es_manager.index_products_by_id(payload)
+                return batch_result.get("success", 0)
+
+            # Разбор, запись в PostgreSQL и индексация в ES идут параллельно
+            pipeline = ImportPipeline(write_batch, index_batch)
+            async with pipeline:
+                if use_streaming:
+                    parse_result = await price_list_parser.parse_file_streaming(
+                        file_path, filename, pipeline.submit, layout_hints=layout_hints
                     )
-                    import_record = result.scalar_one()
-                    import_record.status = ImportStatus.FAILED
-                    import_record.error_message = parse_result.get("error", "Unknown error")
-                    await session.commit()
+                else:
+                    parse_result = await price_list_parser.parse_file(
+                        file_path, filename, layout_hints=layout_hints
+                    )
+                    products = parse_result.pop("products", None) or []
+                    if parse_result.get("success") and products:
+                        logger.info(f"Saving {len(products)} products to PostgreSQL and Elasticsearch...")
+                        batch_size = settings.PARSING_STREAMING_CHUNK_SIZE
+                        for start in range(0, len(products), batch_size):
+                            await pipeline.submit(products[start:start + batch_size])
+
+            if not parse_result.get("success"):
+                if snapshot is not None:
+                    snapshot.abort()
+                import_record.status = ImportStatus.FAILED
+                import_record.error_message = parse_result.get("error", "Unknown error")
+                await session.commit()
 
                 return {
                     "status": "failed",
@@ -85,122 +455,96 @@ def parse_pricelist_task(self, supplier_id: str, filename: str, file_content: by
                     "import_id": str(import_id)
                 }
 
-            # Обновляем запись импорта
-            async for session in db_manager.get_session():
-                result = await session.execute(
-                    select(ProductImport).where(ProductImport.id == import_id)
-                )
-                import_record = result.scalar_one()
-
-                import_record.total_rows = parse_result.get("total_rows", 0)
-                import_record.processed_rows = parse_result.get("products_count", 0)
-                import_record.successful_rows = parse_result.get("products_count", 0)
-
-                detected_cols = parse_result.get("detected_columns", {})
-                import_record.detected_columns = json.loads(
-                    json.dumps(detected_cols, default=str).replace(': NaN', ': null')
+            saved = pipeline.saved
+            es_result = {"success": pipeline.indexed}
+            logger.info(f"✓ Saved {saved} products to PostgreSQL, indexed {pipeline.indexed} to Elasticsearch")
+
+            removed_count = 0
+            # Пустой разбор не должен стирать каталог
+            if differential and saved:
+                removed_count = await _remove_products(session, diff.removed_ids())
+                logger.info(
+                    f"✓ Catalog diff: {diff.added} added, {diff.changed} changed, "
+                    f"{removed_count} removed, {diff.unchanged} unchanged"
                 )
 
-                tags = parse_result.get("tags", [])
-                import_record.generated_tags = [str(t) for t in tags if t and str(t) != 'nan']
-
-                await session.commit()
-
-            # Сохранение товаров
-            products_data = parse_result.get("products", [])
-
-            if products_data:
-                logger.info(f"Saving {len(products_data)} products to PostgreSQL...")
-
-                async for session in db_manager.get_session():
-                    db_products = []
-                    for idx, product_data in enumerate(products_data):
-                        product = Product(
-                            supplier_id=supplier_id,
-                            import_id=import_id,
-                            sku=product_data.get("sku"),
-                            name=product_data.get("name"),
-                            brand=product_data.get("brand"),
-                            category=product_data.get("category"),
-                            price=product_data.get("price"),
-                            unit=product_data.get("unit"),
-                            stock=product_data.get("stock"),
-                            raw_text=product_data.get("raw_text"),
-                            row_number=idx + 1
-                        )
-                        db_products.append(product)
-
-                    session.add_all(db_products)
-                    await session.commit()
-                    logger.info(f"✓ Saved {len(db_products)} products to PostgreSQL")
-
-            # Индексация в Elasticsearch
-            products = parse_result.get("products", [])
-            if products:
-                async for session in db_manager.get_session():
-                    result = await session.execute(
-                        select(Supplier).where(Supplier.id == supplier_id)
-                    )
-                    supplier = result.scalar_one()
-
-                    for product in products:
-                        product["supplier_id"] = str(supplier_id)
-                        product["supplier_name"] = supplier.name
-                        product["supplier_inn"] = supplier.inn
-
-                es_result = await es_manager.bulk_index_products(products, supplier_id)
+            # Итог импорта и теги поставщика - одним коммитом
+            import_record.total_rows = parse_result.get("total_rows", 0)
+            import_record.processed_rows = parse_result.get("products_count", 0)
+            import_record.successful_rows = parse_result.get("products_count", 0)
+            # Товары, у которых цену или остаток не удалось разобрать
+            import_record.failed_rows = parse_result.get("failed_rows", 0)
+
+            _store_layout(import_record, parse_result)
+
+            tags = parse_result.get("tags", [])
+            import_record.generated_tags = [str(t) for t in tags if t and str(t) != 'nan']
+
+            if saved:
+                import_record.status = ImportStatus.COMPLETED
+                import_record.indexed_to_es = True
+                import_record.es_indexed_count = es_result.get("success", 0)
+                import_record.import_mode = mode
+                if differential:
+                    import_record.added_products = diff.added
+                    import_record.changed_products = diff.changed
+                    import_record.removed_products = removed_count
+                else:
+                    import_record.added_products = saved
 
-                async for session in db_manager.get_session():
-                    result = await session.execute(
-                        select(ProductImport).where(ProductImport.id == import_id)
-                    )
-                    import_record = result.scalar_one()
+                _merge_supplier_tags(supplier, parse_result.get("tags", []))
 
-                    import_record.status = ImportStatus.COMPLETED
-                    import_record.indexed_to_es = True
-                    import_record.es_indexed_count = es_result.get("success", 0)
+                if snapshot is not None and snapshot.close():
+                    import_record.snapshot_path = snapshot.directory
+                    if differential:
+                        await _drop_superseded_snapshots(session, supplier_id, import_id)
+            else:
+                import_record.status = ImportStatus.FAILED
+                import_record.error_message = NO_PRODUCTS_ERROR
+                if snapshot is not None:
+                    snapshot.abort()
 
-                    await session.commit()
+            await session.commit()
 
-                async for session in db_manager.get_session():
-                    result = await session.execute(
-                        select(Supplier).where(Supplier.id == supplier_id)
-                    )
-                    supplier = result.scalar_one()
-                    # ИСПРАВЛЕНИЕ: Добавляем новые теги к существующим (без дублей)
-                    existing_tags = set(supplier.tags_array or [])
-                    new_tags = set(parse_result.get("tags", []))
-                    supplier.tags_array = list(existing_tags | new_tags)
-                    await session.commit()
+            if saved and legacy:
+                # Каталог уже проиндексирован под id товаров - документы полных
+                # импортов больше не нужны
+                await es_manager.delete_products_by_id(legacy)
 
-            logger.info(f"Successfully parsed and indexed {len(products)} products for supplier {supplier_id}")
+            products_count = parse_result.get("products_count", 0)
+            logger.info(f"Successfully parsed and indexed {products_count} products for supplier {supplier_id}")
 
             return {
-                "status": "success",
+                "status": "success" if saved else "failed",
                 "supplier_id": supplier_id,
                 "import_id": str(import_id),
-                "products_count": len(products),
-                "indexed_count": es_result.get("success", 0) if "es_result" in locals() else 0,
+                "products_count": products_count,
+                "indexed_count": es_result.get("success", 0),
                 "tags_count": len(parse_result.get("tags", [])),
-                "column_mapping": parse_result.get("detected_columns", {})
+                "column_mapping": parse_result.get("detected_columns", {}),
+                "import_mode": mode,
+                "diff": {
+                    "added": diff.added,
+                    "changed": diff.changed,
+                    "removed": removed_count,
+                    "unchanged": diff.unchanged
+                } if differential else None
             }
 
         except Exception as e:
             logger.error(f"Error parsing pricelist: {e}", exc_info=True)
+            if snapshot is not None:
+                snapshot.abort()
 
+            import_id = import_record.id if import_record is not None else None
             if import_id:
-                async for session in db_manager.get_session():
-                    try:
-                        result = await session.execute(
-                            select(ProductImport).where(ProductImport.id == import_id)
-                        )
-                        import_record = result.scalar_one_or_none()
-                        if import_record:
-                            import_record.status = ImportStatus.FAILED
-                            import_record.error_message = str(e)
-                            await session.commit()
-                    except:
-                        pass
+                try:
+                    await session.rollback()
+                    import_record.status = ImportStatus.FAILED
+                    import_record.error_message = str(e)
+                    await session.commit()
+                except:
+                    pass
 
             return {
                 "status": "failed",
@@ -208,11 +552,190 @@ def parse_pricelist_task(self, supplier_id: str, filename: str, file_content: by
                 "import_id": str(import_id) if import_id else None
             }
 
-        finally:
-            try:
-                os.unlink(tmp_file_path)
-            except:
-                pass
+    return async_runtime.run(_run_in_session(async_parse))
+
+
+@celery_app.task(name="app.tasks.parsing_tasks.parse_pricelist_shard_task", bind=True)
+def parse_pricelist_shard_task(
+    self,
+    import_id: str,
+    supplier_id: str,
+    filename: str,
+    file_path: str,
+    plan: dict,
+    start: int,
+    stop: int = None
+):
+    """
+    Разбор одного диапазона строк большого прайс-листа (полный импорт).
+
+    plan - заголовок и маппинг колонок из price_list_parser.plan_shards.
+    Ошибка не пробрасывается, а возвращается в результате, чтобы chord
+    дошёл до finalize_pricelist_import_task. Товары шарда пишутся в свою
+    часть снимка импорта.
+    """
+    async def parse_shard(session):
+        snapshot = None
+        try:
+            supplier = await session.get(Supplier, supplier_id)
+            supplier_fields = _supplier_fields(supplier)
+            await session.commit()
+
+            if settings.PARSING_SNAPSHOTS_ENABLED:
+                snapshot = SnapshotWriter(snapshot_dir(file_path, import_id), part=start)
+
+            # Номера строк и id документов ES шарда начинаются с его первой строки
+            async def write_batch(batch, offset):
+                return await _write_full_batch(
+                    session, batch, start + offset + 1, supplier_id, import_id, snapshot
+                )
+
+            async def index_batch(batch, offset):
+                return await _index_full_batch(batch, start + offset, supplier_id, supplier_fields)
+
+            pipeline = ImportPipeline(write_batch, index_batch)
+            async with pipeline:
+                result = await price_list_parser.parse_shard(
+                    file_path, filename, plan, start, stop, pipeline.submit
+                )
+
+            result.update({"start": start, "saved": pipeline.saved, "indexed": pipeline.indexed})
+            if snapshot is not None:
+                if result.get("success"):
+                    snapshot.close()
+                    result["snapshot_path"] = snapshot.directory
+                else:
+                    snapshot.abort()
+            return result
+
+        except Exception as e:
+            logger.error(f"Error in shard [{start}, {stop}) of import {import_id}: {e}", exc_info=True)
+            if snapshot is not None:
+                snapshot.abort()
+            await session.rollback()
+            return {"success": False, "error": str(e), "start": start, "saved": 0, "indexed": 0}
+
+    return async_runtime.run(_run_in_session(parse_shard))
+
+
+@celery_app.task(name="app.tasks.parsing_tasks.finalize_pricelist_import_task", bind=True)
+def finalize_pricelist_import_task(self, shard_results: list, import_id: str):
+    """Сводит результаты шардов в запись ProductImport и теги поставщика."""
+    async def finalize(session):
+        import_record = await session.get(ProductImport, import_id)
+        supplier = await session.get(Supplier, import_record.supplier_id)
+
+        saved = sum(result.get("saved", 0) for result in shard_results)
+        indexed = sum(result.get("indexed", 0) for result in shard_results)
+        products_count = sum(result.get("products_count", 0) for result in shard_results)
+        tag_counts = Counter()
+        for result in shard_results:
+            tag_counts.update(result.get("tag_counts") or {})
+        tags = tag_extractor.top(tag_counts)
+
+        import_record.total_rows = sum(result.get("total_rows", 0) for result in shard_results)
+        import_record.processed_rows = products_count
+        import_record.successful_rows = products_count
+        import_record.failed_rows = sum(result.get("failed_rows", 0) for result in shard_results)
+        import_record.generated_tags = tags
+        import_record.added_products = saved
+        import_record.es_indexed_count = indexed
+
+        snapshot_paths = {result["snapshot_path"] for result in shard_results if result.get("snapshot_path")}
+
+        failed = [result for result in shard_results if not result.get("success")]
+        if failed:
+            import_record.status = ImportStatus.FAILED
+            import_record.error_message = "; ".join(
+                f"rows from {result.get('start')}: {result.get('error')}" for result in failed
+            )
+            # Снимок без частей упавших шардов не описывает импорт
+            for path in snapshot_paths:
+                remove_snapshot(path)
+        elif saved:
+            import_record.status = ImportStatus.COMPLETED
+            import_record.indexed_to_es = True
+            import_record.snapshot_path = next(iter(snapshot_paths), None)
+            _merge_supplier_tags(supplier, tags)
+        else:
+            # Ни одного товара: импорт не должен остаться в PROCESSING
+            import_record.status = ImportStatus.FAILED
+            import_record.error_message = NO_PRODUCTS_ERROR
+            for path in snapshot_paths:
+                remove_snapshot(path)
+
+        await session.commit()
+        logger.info(
+            f"Import {import_id} finalized from {len(shard_results)} shards: "
+            f"{saved} saved, {indexed} indexed, {len(failed)} failed"
+        )
+
+        return {
+            "status": "failed" if failed else "success",
+            "supplier_id": str(import_record.supplier_id),
+            "import_id": import_id,
+            "products_count": products_count,
+            "indexed_count": indexed,
+            "tags_count": len(tags),
+            "shards": len(shard_results),
+            "failed_shards": len(failed),
+            "import_mode": "full"
+        }
+
+    return async_runtime.run(_run_in_session(finalize))
+
+
+# Сколько товаров поставщика читается из PostgreSQL за раз при пересчёте тегов
+TAG_COMPACTION_BATCH_SIZE = 10000
+
+
+@celery_app.task(name="app.tasks.parsing_tasks.compact_supplier_tags_task", bind=True)
+def compact_supplier_tags_task(self, limit: int = None):
+    """
+    Сжимает tags_array поставщиков, у которых тегов больше лимита.
+
+    Теги пересчитываются по текущим товарам поставщика тем же частотным
+    отбором, что и при импорте; у поставщика без товаров остаются первые
+    limit тегов без стоп-слов. limit по умолчанию - PARSING_MAX_TAGS_PER_SUPPLIER.
+    Товары читаются из снимков каталога, а если их нет - из PostgreSQL.
+    """
+    limit = limit or settings.PARSING_MAX_TAGS_PER_SUPPLIER
+
+    async def compact(session):
+        result = await session.execute(
+            select(Supplier).where(func.cardinality(Supplier.tags_array) > limit)
+        )
+        suppliers = result.scalars().all()
+
+        compacted = 0
+        for supplier in suppliers:
+            before = len(supplier.tags_array)
+            chain = await supplier_snapshot_chain(session, supplier.id) if settings.PARSING_SNAPSHOTS_ENABLED else None
+            if chain:
+                tag_counts = await asyncio.to_thread(
+                    _count_snapshot_tags, [import_record.snapshot_path for import_record in chain]
+                )
+            else:
+                stream = await session.stream(
+                    select(Product.name, Product.brand, Product.category)
+                    .where(Product.supplier_id == supplier.id)
+                    .execution_options(yield_per=TAG_COMPACTION_BATCH_SIZE)
+                )
+                tag_counts = Counter()
+                async for rows in stream.partitions():
+                    tag_counts.update(tag_extractor.count(row._mapping for row in rows))
+
+            if tag_counts:
+                supplier.tags_array = tag_extractor.top(tag_counts, limit)
+            else:
+                supplier.tags_array = tag_extractor.merge(
+                    [], (tag for tag in supplier.tags_array if tag.lower() not in TAG_STOPWORDS), limit
+                )
+            await session.commit()
+
+            compacted += 1
+            logger.info(f"Supplier {supplier.id}: tags compacted from {before} to {len(supplier.tags_array)}")
+
+        return {"status": "completed", "suppliers_compacted": compacted, "limit": limit}
 
-    # ИСПРАВЛЕНИЕ: Используем существующий loop вместо asyncio.run()
-    return loop.run_until_complete(async_parse())
+    return async_runtime.run(_run_in_session(compact))
@@ -1,10 +1,104 @@
 from app.tasks.celery_app import celery_app
+from app.tasks.async_runtime import async_runtime
+from app.core.database import db_manager
+from app.core.elasticsearch import es_manager
+from app.core.config import settings
+from app.models.supplier import Supplier
+from app.services.catalog_snapshot import SNAPSHOT_PRODUCT_FIELDS, iter_products, supplier_snapshot_chain
+from sqlalchemy import select
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+async def _reindex_snapshot(path: str, supplier_fields: dict) -> int:
+    """Индексирует товары снимка под их прежними id документов."""
+    batches = iter_products(path, columns=["doc_id", *SNAPSHOT_PRODUCT_FIELDS])
+    indexed = 0
+    while True:
+        # Чтение и декодирование Parquet - в потоке, запись в ES - в loop'е
+        products = await asyncio.to_thread(next, batches, None)
+        if products is None:
+            break
+        documents = {}
+        for product_data in products:
+            doc_id = product_data.pop("doc_id")
+            product_data.update(supplier_fields)
+            documents[doc_id] = product_data
+        result = await es_manager.index_products_by_id(documents)
+        indexed += result.get("success", 0)
+    return indexed
+
+
 @celery_app.task(name="app.tasks.search_tasks.full_reindex")
-def full_reindex():
+def full_reindex(supplier_id: str = None):
+    """
+    Переиндексирует каталоги поставщиков в Elasticsearch из снимков импортов.
+
+    Товары берутся из Parquet-снимков (catalog_snapshot), без повторного
+    разбора файлов и выборок из PostgreSQL, и пишутся под теми же id
+    документов, что и при импорте, - документы перезаписываются на месте.
+    Поставщики без снимков (каталог загружен до их появления) пропускаются
+    и перечисляются в результате: их каталог обновит следующий импорт.
+
+    По расписанию beat (в 02:00) задача идёт только при
+    INDEX_FULL_REINDEX_ENABLED, иначе запускается вручную; при
+    PARSING_SNAPSHOTS_ENABLED=false не делает ничего:
+        celery -A app.tasks.celery_app call app.tasks.search_tasks.full_reindex
+    """
+    if not settings.PARSING_SNAPSHOTS_ENABLED:
+        logger.warning("Catalog snapshots are disabled, full reindex skipped")
+        return {"status": "skipped", "reason": "PARSING_SNAPSHOTS_ENABLED is false"}
+
     logger.info("Starting full Elasticsearch reindex")
-    # Reindex logic here
-    return {"status": "completed"}
+
+    async def reindex():
+        async with db_manager.async_session_master() as session:
+            query = select(Supplier.id, Supplier.name, Supplier.inn)
+            if supplier_id:
+                query = query.where(Supplier.id == supplier_id)
+            suppliers = (await session.execute(query)).all()
+
+            indexed = 0
+            skipped = []
+            for supplier in suppliers:
+                chain = await supplier_snapshot_chain(session, supplier.id)
+                if not chain:
+                    skipped.append(str(supplier.id))
+                    continue
+
+                supplier_fields = {
+                    "supplier_id": str(supplier.id),
+                    "supplier_name": supplier.name,
+                    "supplier_inn": supplier.inn,
+                }
+                supplier_indexed = 0
+                for import_record in chain:
+                    supplier_indexed += await _reindex_snapshot(import_record.snapshot_path, supplier_fields)
+                indexed += supplier_indexed
+                logger.info(f"Reindexed {supplier_indexed} products of supplier {supplier.id} from snapshots")
+
+        if skipped:
+            logger.warning(f"No catalog snapshots for {len(skipped)} suppliers, skipped")
+        return {
+            "status": "completed",
+            "suppliers_reindexed": len(suppliers) - len(skipped),
+            "products_indexed": indexed,
+            "skipped_suppliers": skipped,
+        }
+
+    return async_runtime.run(reindex())
+
+
+@celery_app.task(name="app.tasks.search_tasks.migrate_products_index")
+def migrate_products_index():
+    """
+    Переносит индекс товаров на текущую версию маппинга.
+
+    Запускается вручную после обновления, если при старте приложения в лог
+    попало предупреждение о версии индекса:
+        celery -A app.tasks.celery_app call app.tasks.search_tasks.migrate_products_index
+    """
+    logger.info("Starting products index migration")
+    return async_runtime.run(es_manager.migrate_products_index())
@@ -0,0 +1,70 @@
+"""
+Потоковое сохранение загруженных файлов на диск
+"""
+from typing import BinaryIO, Tuple
+import hashlib
+import logging
+import os
+
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class FileTooLargeError(Exception):
+    """Файл превышает STORAGE_MAX_FILE_SIZE."""
+
+
+def _copy_stream(source: BinaryIO, path: str, max_size: int) -> Tuple[str, int]:
+    """Копирует source в path порциями, считая sha256 и размер по ходу."""
+    file_hash = hashlib.sha256()
+    size = 0
+    try:
+        with open(path, "wb") as target:
+            for chunk in iter(lambda: source.read(UPLOAD_CHUNK_SIZE), b""):
+                size += len(chunk)
+                if size > max_size:
+                    raise FileTooLargeError(path)
+                file_hash.update(chunk)
+                target.write(chunk)
+    except BaseException:
+        # Недописанный файл не оставляем
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        raise
+    return file_hash.hexdigest(), size
+
+
+async def save_upload(upload: UploadFile, path: str, max_size: int = None) -> Tuple[str, int]:
+    """
+    Сохраняет UploadFile в path и возвращает (sha256, размер в байтах).
+
+    Файл копируется порциями по UPLOAD_CHUNK_SIZE в пуле потоков, поэтому
+    память API не растёт с размером и числом одновременных загрузок.
+    Файл больше max_size (по умолчанию STORAGE_MAX_FILE_SIZE) отклоняется
+    с HTTP 413 - по заявленному размеру сразу, иначе на первой лишней порции.
+    Тело запроса целиком ограничивает UploadSizeLimitMiddleware ещё до того,
+    как Starlette сохранит файлы формы.
+    """
+    max_size = max_size or settings.STORAGE_MAX_FILE_SIZE
+    too_large = HTTPException(
+        status_code=413,
+        detail=f"Файл {upload.filename} больше допустимых {max_size // (1024 * 1024)} МБ"
+    )
+
+    if upload.size is not None and upload.size > max_size:
+        raise too_large
+
+    await upload.seek(0)
+    try:
+        return await run_in_threadpool(_copy_stream, upload.file, path, max_size)
+    except FileTooLargeError:
+        logger.warning(f"Rejected upload {upload.filename}: larger than {max_size} bytes")
+        raise too_large
@@ -0,0 +1,183 @@
+"""
+Векторный разбор цен и остатков из ячеек прайс-листов
+"""
+from typing import Tuple
+import numpy as np
+import pandas as pd
+
+# Цены, которых в прайсе нет намеренно - это не ошибка разбора
+PRICE_ON_REQUEST_RE = (
+    r"(?:цена\s*)?(?:по\s*запросу|договорн[а-яё]*|звоните|уточняйте|запрос|"
+    r"call|n/?a|-+|—|–|\?)"
+)
+RUBLES_RE = r"(?:руб(?:лей|ля|ль)?\.?|р\.?)"
+CURRENCY_RE = r"(?:руб(?:лей|ля|ль)?\.?|р\.?|₽|rub\.?|rur\.?|\$|€|usd|eur)"
+# "100 руб. 50 коп." - копейки становятся дробной частью: 100.50, "5 коп." - .05.
+# Копейки без рублей не разбираются - такая ячейка отмечается ошибкой
+KOPECKS_RE = r"(\d)\s*" + RUBLES_RE + r"\s*(\d{{{digits}}})\s*коп(?:еек|ейки|ейка)?\.?$"
+
+# Остатки словами: "нет" - ноль, "есть"/"под заказ" - количество неизвестно
+STOCK_NONE_RE = r"(?:нет|нет\s*в\s*наличии|отсутствует|закончил[а-яё]*)"
+STOCK_UNKNOWN_RE = (
+    r"(?:есть|да|в\s*наличии|много|достаточно|\++|под\s*заказ|по\s*запросу|"
+    r"ожидается|в\s*пути|уточняйте|-+|—|–|\?)"
+)
+STOCK_PREFIX_RE = r"^(?:>=?|<=?|≥|≤|более|больше|свыше|менее|меньше|до|от|около|~)"
+STOCK_SUFFIX_RE = r"(?:\+|шт\.?|штук[а-яё]*|ед\.?|упак\.?|уп\.?|компл\.?|пар[а-яё]*|кг|м)$"
+
+NUMBER_RE = r"-?\d+(?:\.\d+)?"
+
+STOCK_MAX = 2 ** 31 - 1
+
+
+def as_text(series: pd.Series) -> pd.Series:
+    """
+    Колонка как строки для .str-операций.
+
+    Строковые колонки (string[pyarrow]) остаются в Arrow - .str-операции над
+    ними выполняет pyarrow.compute без Python-строки на ячейку; пустые ячейки
+    становятся "", маски пустых строятся по исходной колонке. Остальные
+    колонки (числа и даты из Excel) приводятся через astype(str).
+    """
+    if isinstance(series.dtype, pd.StringDtype):
+        return series.fillna("")
+    return series.astype(str)
+
+
+def _blank_mask(series: pd.Series, text: pd.Series) -> np.ndarray:
+    """Пустые ячейки: NaN/None, пустая строка, строка "nan"."""
+    return (series.isna() | text.isin(("", "nan", "none", "null"))).to_numpy(dtype=bool)
+
+
+def _normalize_separators(text: pd.Series) -> pd.Series:
+    """
+    Приводит число к виду 1234.56.
+
+    Пробелы (в том числе неразрывные) и апострофы - разделители тысяч. Если
+    есть и точка, и запятая, десятичный разделитель - тот, что правее. Одна
+    запятая - десятичная ("1234,5"), несколько запятых или точек - разделители
+    тысяч ("1,234,567", "1.234.567").
+    """
+    # Неразрывные пробелы - литералами: строки pyarrow разбирает RE2 без \u-escape
+    text = text.str.replace("[\\s\u00a0\u202f']", "", regex=True)
+
+    commas = text.str.count(",").to_numpy(dtype=np.int64)
+    dots = text.str.count(r"\.").to_numpy(dtype=np.int64)
+    comma_last = (text.str.rfind(",") > text.str.rfind(".")).to_numpy(dtype=bool)
+
+    no_dots = text.str.replace(".", "", regex=False)
+    no_commas = text.str.replace(",", "", regex=False)
+
+    both = (commas > 0) & (dots > 0)
+    result = np.where(
+        both & comma_last, no_dots.str.replace(",", ".", regex=False),
+        np.where(
+            both, no_commas,
+            np.where(
+                commas == 1, text.str.replace(",", ".", regex=False),
+                np.where(commas > 1, no_commas, np.where(dots > 1, no_dots, text))
+            )
+        )
+    )
+    return pd.Series(result, index=text.index, dtype=object)
+
+
+def _to_float(text: pd.Series) -> np.ndarray:
+    """Строки вида 1234.56 в float, остальное - NaN."""
+    matched = text.str.fullmatch(NUMBER_RE).fillna(False).to_numpy(dtype=bool)
+    values = np.full(len(text), np.nan)
+    if matched.any():
+        values[matched] = text[matched].astype(float).to_numpy()
+    return values
+
+
+def parse_price_column(series: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Разбирает колонку цен.
+
+    Понимает "1 234,50", "1 234 руб.", "1.234,5", "от 990 р.",
+    "100 руб. 50 коп.", числа из Excel. "По запросу", "договорная", прочерк - цены нет, без ошибки.
+
+    Returns:
+        (значения: float или None, маска ячеек, которые не удалось разобрать)
+    """
+    # Для строк Arrow to_numeric возвращает Float64 с NA вместо NaN
+    values = pd.to_numeric(series, errors="coerce").to_numpy(dtype=float, na_value=np.nan, copy=True)
+    text = as_text(series).str.strip().str.lower()
+    blank = _blank_mask(series, text)
+
+    # Строки разбираются только там, где не сработало прямое приведение
+    pending = np.isnan(values) & ~blank
+    if pending.any():
+        subset = text[pending]
+        on_request = subset.str.fullmatch(PRICE_ON_REQUEST_RE).fillna(False).to_numpy(dtype=bool)
+
+        cleaned = (
+            subset
+            .str.replace(r"^(?:цена|от|from)\s*:?", "", regex=True)
+            .str.replace(KOPECKS_RE.format(digits=2), r"\1,\2", regex=True)
+            .str.replace(KOPECKS_RE.format(digits=1), r"\1,0\2", regex=True)
+            .str.replace(CURRENCY_RE, "", regex=True)
+        )
+        parsed = _to_float(_normalize_separators(cleaned))
+        parsed[on_request] = np.nan
+        values[pending] = parsed
+        pending[pending] = ~on_request
+
+    failed = pending & np.isnan(values)
+    # Отрицательная цена - ошибка в данных, а не скидка
+    negative = np.isfinite(values) & (values < 0)
+    failed |= negative
+    values[negative | ~np.isfinite(values)] = np.nan
+
+    result = np.empty(len(values), dtype=object)
+    result[:] = None
+    finite = np.isfinite(values)
+    result[finite] = np.round(values[finite], 2).tolist()
+    return result, failed
+
+
+def parse_stock_column(series: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Разбирает колонку остатков в целые числа.
+
+    Понимает "1 000", ">100", "более 50", "20 шт.", "100+"; "нет" - ноль;
+    "есть", "в наличии", "под заказ" - количество неизвестно, без ошибки.
+
+    Returns:
+        (значения: int или None, маска ячеек, которые не удалось разобрать)
+    """
+    # Для строк Arrow to_numeric возвращает Float64 с NA вместо NaN
+    values = pd.to_numeric(series, errors="coerce").to_numpy(dtype=float, na_value=np.nan, copy=True)
+    text = as_text(series).str.strip().str.lower()
+    blank = _blank_mask(series, text)
+
+    pending = np.isnan(values) & ~blank
+    if pending.any():
+        subset = text[pending]
+        none_left = subset.str.fullmatch(STOCK_NONE_RE).fillna(False).to_numpy(dtype=bool)
+        unknown = subset.str.fullmatch(STOCK_UNKNOWN_RE).fillna(False).to_numpy(dtype=bool)
+
+        cleaned = (
+            subset
+            .str.replace(STOCK_PREFIX_RE, "", regex=True)
+            .str.replace(STOCK_SUFFIX_RE, "", regex=True)
+            .str.strip()
+        )
+        parsed = _to_float(_normalize_separators(cleaned))
+        parsed[none_left] = 0
+        parsed[unknown] = np.nan
+        values[pending] = parsed
+        pending[pending] = ~unknown
+
+    failed = pending & np.isnan(values)
+    # products.stock - integer: большее число - ошибка в данных
+    overflow = np.isfinite(values) & (np.abs(values) > STOCK_MAX)
+    failed |= overflow
+    values[overflow] = np.nan
+
+    result = np.empty(len(values), dtype=object)
+    result[:] = None
+    finite = np.isfinite(values)
+    result[finite] = np.trunc(values[finite]).astype(np.int64).tolist()
+    return result, failed
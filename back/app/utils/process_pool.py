@@ -0,0 +1,94 @@
+"""
+Пул процессов для CPU-тяжёлого разбора файлов (листы Excel, страницы PDF)
+"""
+from contextlib import contextmanager
+from typing import Any, Callable, Iterable, Iterator, List
+import os
+import signal
+import threading
+
+from billiard import Pool
+
+from app.core.config import settings
+
+
+def default_workers() -> int:
+    """
+    Размер пула одной задачи по умолчанию.
+
+    В parsing-воркере Celery CELERY_PARSING_CONCURRENCY процессов, и каждый
+    может запустить свой пул, поэтому ядра делятся между ними: всего
+    процессов разбора не больше, чем ядер.
+    """
+    return max(1, (os.cpu_count() or 1) // max(1, settings.CELERY_PARSING_CONCURRENCY))
+
+
+def map_in_processes(
+    func: Callable[[Any], Any],
+    items: Iterable[Any],
+    max_workers: int = None
+) -> List[Any]:
+    """
+    Применяет func к каждому элементу в пуле процессов, порядок сохраняется.
+
+    func и элементы должны сериализоваться pickle (функция уровня модуля).
+    Пул - billiard (форк multiprocessing из зависимостей Celery): в отличие
+    от multiprocessing, он запускается и из дочерних процессов
+    prefork-воркера, которые являются демонами. Один элемент обрабатывается
+    в текущем процессе.
+    """
+    return list(imap_in_processes(func, items, max_workers))
+
+
+def imap_in_processes(
+    func: Callable[[Any], Any],
+    items: Iterable[Any],
+    max_workers: int = None
+) -> Iterator[Any]:
+    """
+    Ленивый вариант map_in_processes: результаты отдаются по мере готовности.
+
+    Порядок сохраняется - результат элемента отдаётся, как только готовы он
+    и все предыдущие, так что потребитель начинает работу, не дожидаясь
+    окончания всего пула. Если потребитель прекращает итерацию, ещё не
+    начатые задания отменяются.
+    """
+    items = list(items)
+    max_workers = min(max_workers or default_workers(), len(items))
+
+    if max_workers <= 1:
+        for item in items:
+            yield func(item)
+        return
+
+    pool = Pool(processes=max_workers)
+    try:
+        yield from pool.imap(func, items)
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+@contextmanager
+def time_limit(seconds: float):
+    """
+    Ограничивает время выполнения блока, по истечении - TimeoutError.
+
+    Работает через SIGALRM, поэтому только в главном потоке процесса (так
+    выполняются задания пула и задачи prefork-воркера); в остальных случаях
+    и при seconds <= 0 блок выполняется без ограничения.
+    """
+    if not seconds or seconds <= 0 or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def _on_timeout(signum, frame):
+        raise TimeoutError(f"Time limit of {seconds}s exceeded")
+
+    previous = signal.signal(signal.SIGALRM, _on_timeout)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
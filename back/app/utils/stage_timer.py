@@ -0,0 +1,41 @@
+"""
+Замер времени стадий обработки
+"""
+from contextlib import contextmanager
+from typing import Dict, Iterator, Mapping
+import time
+
+
+class StageTimer:
+    """
+    Накопительные тайминги именованных стадий.
+
+        timer = StageTimer()
+        with timer("read"):
+            df = read(...)
+
+    Повторный вход в стадию прибавляет время к уже набранному.
+    """
+
+    def __init__(self):
+        self._stages: Dict[str, float] = {}
+
+    @contextmanager
+    def __call__(self, stage: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - started)
+
+    def add(self, stage: str, seconds: float):
+        self._stages[stage] = self._stages.get(stage, 0.0) + seconds
+
+    def merge(self, stages: Mapping[str, float]):
+        """Добавляет тайминги другого замера (например, листа из пула процессов)."""
+        for stage, seconds in stages.items():
+            self.add(stage, seconds)
+
+    def as_dict(self) -> Dict[str, float]:
+        """Секунды по стадиям в порядке первого входа."""
+        return {stage: round(seconds, 4) for stage, seconds in self._stages.items()}
@@ -0,0 +1,5 @@
+"""
+Benchmarks
+Замеры производительности парсинга и индексации. Запуск из каталога back/:
+    python -m benchmarks.<имя_модуля>
+"""
@@ -0,0 +1,90 @@
+"""
+Benchmark: снимки каталога
+Сравнивает повторный разбор прайс-листа (PriceListParser.parse_file) с
+чтением Parquet-снимка тех же товаров: полное чтение для переиндексации,
+колонки ключей для сравнения каталога и колонки тегов.
+
+    python -m benchmarks.bench_catalog_snapshot [--rows 100000,1000000] [--format csv]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Dict, List
+
+from app.services.catalog_snapshot import SNAPSHOT_PRODUCT_FIELDS, SnapshotWriter, iter_products, read_columns
+from app.services.price_list_parser import price_list_parser
+from benchmarks.pricelist_generator import write_price_list
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, round(time.perf_counter() - started, 3)
+
+
+def write_snapshot(directory: str, products: List[Dict]) -> str:
+    writer = SnapshotWriter(directory)
+    batch_size = price_list_parser.streaming_chunk_size
+    for start in range(0, len(products), batch_size):
+        batch = products[start:start + batch_size]
+        writer.write(batch, start + 1, [f"doc-{start + i}" for i in range(len(batch))])
+    writer.close()
+    return writer.path
+
+
+def count_rows(batches) -> int:
+    return sum(len(batch) for batch in batches)
+
+
+def run(rows_list: List[int], file_format: str) -> List[Dict]:
+    results = []
+    price_list_parser.max_rows = max(rows_list) + 10
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in rows_list:
+            path = os.path.join(tmp, f"price_{rows}.{file_format}")
+            write_price_list(path, file_format, rows)
+
+            parsed, parse_sec = timed(lambda: asyncio.run(price_list_parser.parse_file(path, os.path.basename(path))))
+            products = parsed["products"]
+
+            directory = os.path.join(tmp, f"snapshot_{rows}")
+            part, write_sec = timed(write_snapshot, directory, products)
+
+            _, full_sec = timed(lambda: count_rows(iter_products(directory, columns=["doc_id", *SNAPSHOT_PRODUCT_FIELDS])))
+            _, keys_sec = timed(read_columns, directory, ["row_number", "doc_id", "sku", "name", "content_hash"])
+            _, tags_sec = timed(lambda: count_rows(iter_products(directory, columns=["name", "brand", "category"])))
+
+            result = {
+                "rows": rows,
+                "format": file_format,
+                "file_mb": round(os.path.getsize(path) / 1024 / 1024, 2),
+                "snapshot_mb": round(os.path.getsize(part) / 1024 / 1024, 2),
+                "parse_sec": parse_sec,
+                "snapshot_write_sec": write_sec,
+                "reindex_read_sec": full_sec,
+                "diff_keys_read_sec": keys_sec,
+                "tag_columns_read_sec": tags_sec,
+                "speedup_reindex": round(parse_sec / full_sec, 1) if full_sec else None,
+            }
+            results.append(result)
+            print(json.dumps(result, ensure_ascii=False))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", default="100000,1000000")
+    parser.add_argument("--format", default="csv", choices=("xlsx", "csv", "txt"))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    run([int(r) for r in args.rows.split(",")], args.format)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark: чтение CSV
+Сравнивает однопроходное чтение PriceListParser._parse_csv (определение
+кодировки и разделителя по образцу, pyarrow при наличии) с прежним
+_parse_csv на 100k/1M строк.
+
+    python -m benchmarks.bench_csv_ingest [--rows 100000,1000000] [--encoding utf-8]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Dict, List
+
+import pandas as pd
+
+from app.services.price_list_parser import _HAS_PYARROW, price_list_parser
+
+
+def write_csv(path: str, rows: int, encoding: str):
+    """Синтетический прайс: заголовок и данные через ';'."""
+    brands = ["Bosch", "Makita", "DeWalt", "Зубр", "Интерскол"]
+    with open(path, "w", encoding=encoding, newline="") as f:
+        f.write("Артикул;Наименование;Цена;Бренд;Ед. изм.;Остаток\n")
+        for i in range(rows):
+            f.write(
+                f"A-{i:07d};Товар {i}, модель {i % 97};{i % 5000},50;"
+                f"{brands[i % len(brands)]};шт;{i % 500}\n"
+            )
+
+
+def parse_csv_legacy(file_path: str) -> pd.DataFrame:
+    """Прежняя реализация _parse_csv (эталон для сравнения)."""
+    with open(file_path, 'r', encoding=price_list_parser.default_encoding, errors='ignore') as f:
+        first_line = f.readline()
+        delimiter = ',' if ',' in first_line else ';' if ';' in first_line else '\t'
+
+    df = pd.read_csv(
+        file_path,
+        delimiter=delimiter,
+        encoding=price_list_parser.default_encoding,
+        nrows=price_list_parser.max_rows,
+        on_bad_lines='skip'
+    )
+    return df.dropna(how='all')
+
+
+def timed(func, *args) -> Dict:
+    started = time.perf_counter()
+    df = func(*args)
+    return {"sec": round(time.perf_counter() - started, 3), "rows": len(df)}
+
+
+def run(rows_list: List[int], encoding: str) -> List[Dict]:
+    results = []
+    price_list_parser.max_rows = max(rows_list) + 10
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in rows_list:
+            path = os.path.join(tmp, f"price_{rows}.csv")
+            write_csv(path, rows, encoding)
+
+            result = {
+                "rows": rows,
+                "encoding": encoding,
+                "size_mb": round(os.path.getsize(path) / 1024 / 1024, 1),
+                "pyarrow": _HAS_PYARROW,
+            }
+
+            single_pass = timed(lambda p: asyncio.run(price_list_parser._parse_csv(p)), path)
+            result["single_pass_sec"] = single_pass["sec"]
+            result["single_pass_rows"] = single_pass["rows"]
+
+            # Прежний вариант читает только в PARSING_DEFAULT_ENCODING
+            try:
+                legacy = timed(parse_csv_legacy, path)
+                result["legacy_sec"] = legacy["sec"]
+                result["legacy_rows"] = legacy["rows"]
+                result["speedup"] = round(legacy["sec"] / single_pass["sec"], 1) if single_pass["sec"] else None
+            except UnicodeDecodeError as e:
+                result["legacy_error"] = str(e)
+
+            results.append(result)
+            print(json.dumps(result, ensure_ascii=False))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", default="100000,1000000")
+    parser.add_argument("--encoding", default="utf-8")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    run([int(r) for r in args.rows.split(",")], args.encoding)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark: память DataFrame прайс-листа
+Сравнивает представление ячеек в парсере: строки Arrow (PARSING_ARROW_STRINGS=
+true) и Python-объекты (false). Для каждого файла - размер таблицы после
+чтения (memory_usage(deep=True)), время чтения и извлечения товаров и пиковый
+RSS процесса.
+
+Каждый прогон идёт в отдельном процессе: настройка читается при импорте
+парсера, а пиковый RSS не должен накапливаться между прогонами.
+
+    python -m benchmarks.bench_dataframe_memory [--rows 100000,1000000] [--format csv]
+"""
+import argparse
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from benchmarks.pricelist_generator import write_price_list
+
+# Каталог back/: дочерние процессы запускаются из него
+BACK_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_case(path: str, file_format: str) -> Dict:
+    """Чтение и извлечение товаров одного файла (вызывается в дочернем процессе)."""
+    import pandas as pd
+
+    from app.services.price_list_parser import price_list_parser
+
+    price_list_parser.max_rows = 10 ** 7
+
+    started = time.perf_counter()
+    if file_format == "xlsx":
+        raw = pd.read_excel(path, header=None)
+        raw = price_list_parser._compact_frame(raw.dropna(how="all"))
+    else:
+        raw = price_list_parser._read_delimited(path, price_list_parser._sniff_text_file(path))
+    df, _, _ = price_list_parser._locate_header(raw, None)
+    read_sec = time.perf_counter() - started
+    frame_mb = df.memory_usage(deep=True).sum() / 1024 / 1024
+
+    detected_columns, _, _ = price_list_parser._resolve_columns(df, None)
+    df = df.rename(columns={label: col_type for col_type, label in detected_columns.items()})
+
+    started = time.perf_counter()
+    products = price_list_parser._extract_products(df, detected_columns)
+    extract_sec = time.perf_counter() - started
+
+    return {
+        "products": len(products),
+        "frame_mb": round(frame_mb, 1),
+        "read_sec": round(read_sec, 3),
+        "extract_sec": round(extract_sec, 3),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def run_in_subprocess(path: str, file_format: str, arrow_strings: bool) -> Dict:
+    command = [
+        sys.executable, "-m", "benchmarks.bench_dataframe_memory",
+        "--case", json.dumps({"path": path, "format": file_format}),
+    ]
+    env = {**os.environ, "PARSING_ARROW_STRINGS": "true" if arrow_strings else "false"}
+    completed = subprocess.run(command, capture_output=True, text=True, cwd=BACK_DIR, env=env)
+    if completed.returncode != 0:
+        return {"error": completed.stderr.strip().splitlines()[-1:]}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run(rows_list: List[int], file_format: str, seed: int) -> List[Dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in rows_list:
+            path = os.path.join(tmp, f"price_{rows}.{file_format}")
+            write_price_list(path, file_format, rows, seed=seed)
+
+            cases = {arrow: run_in_subprocess(path, file_format, arrow) for arrow in (False, True)}
+            os.unlink(path)
+
+            objects, arrow = cases[False], cases[True]
+            result = {"rows": rows, "format": file_format, "objects": objects, "arrow": arrow}
+            if "error" not in objects and "error" not in arrow:
+                result["frame_ratio"] = round(objects["frame_mb"] / arrow["frame_mb"], 1) if arrow["frame_mb"] else None
+                result["peak_rss_saved_mb"] = round(objects["peak_rss_mb"] - arrow["peak_rss_mb"], 1)
+            results.append(result)
+            print(json.dumps(result, ensure_ascii=False), flush=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", default="100000,1000000")
+    parser.add_argument("--format", default="csv", choices=("xlsx", "csv", "txt"))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.case:
+        case = json.loads(args.case)
+        print(json.dumps(run_case(case["path"], case["format"]), ensure_ascii=False))
+        return
+
+    run([int(r) for r in args.rows.split(",")], args.format, args.seed)
+
+
+if __name__ == "__main__":
+    main()
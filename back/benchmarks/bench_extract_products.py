@@ -0,0 +1,156 @@
+"""
+Benchmark: извлечение товаров из DataFrame
+Сравнивает векторную PriceListParser._extract_products с прежним циклом
+по df.iterrows() на 10k/100k/1M строк.
+
+    python -m benchmarks.bench_extract_products [--rows 10000,100000,1000000]
+"""
+import argparse
+import json
+import logging
+import time
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from app.services.price_list_parser import price_list_parser
+
+DETECTED_COLUMNS = {
+    "sku": "Артикул",
+    "name": "Наименование",
+    "brand": "Бренд",
+    "category": "Категория",
+    "unit": "Ед. изм.",
+    "stock": "Остаток",
+}
+
+
+def make_frame(rows: int, seed: int = 42) -> pd.DataFrame:
+    """Синтетический прайс с пропусками, как после _parse_excel."""
+    rng = np.random.default_rng(seed)
+    brands = np.array(["Bosch", "Makita", "DeWalt", " Зубр ", "Интерскол", None], dtype=object)
+    categories = np.array(["Инструмент", "Крепёж", "Электрика", None], dtype=object)
+    units = np.array(["шт", "упак", "м", "кг"], dtype=object)
+
+    sku = np.array([f"A-{i:07d}" for i in range(rows)], dtype=object)
+    sku[rng.random(rows) < 0.02] = None
+    name = np.array([f"Товар  {i}, модель {i % 97}" for i in range(rows)], dtype=object)
+    name[rng.random(rows) < 0.01] = None
+    stock = rng.integers(0, 500, rows).astype(object)
+    stock[rng.random(rows) < 0.05] = "под заказ"
+
+    df = pd.DataFrame({
+        "Артикул": sku,
+        "Наименование": name,
+        "Бренд": brands[rng.integers(0, len(brands), rows)],
+        "Категория": categories[rng.integers(0, len(categories), rows)],
+        "Ед. изм.": units[rng.integers(0, len(units), rows)],
+        "Остаток": stock,
+    }, dtype=object)
+    return df.rename(columns={v: k for k, v in DETECTED_COLUMNS.items()})
+
+
+def extract_products_iterrows(df: pd.DataFrame, detected_columns: Dict[str, str]) -> List[Dict]:
+    """Прежняя построчная реализация _extract_products (эталон для сравнения)."""
+    products = []
+
+    for idx, row in df.iterrows():
+        try:
+            product = {}
+
+            if 'sku' in detected_columns:
+                sku = row.get('sku')
+                if pd.isna(sku) or str(sku).strip() == '':
+                    continue
+                product['sku'] = str(sku).strip()
+
+            if 'name' in detected_columns:
+                name = row.get('name')
+                if pd.isna(name) or str(name).strip() == '' or str(name).lower() == 'nan':
+                    continue
+                product['name'] = price_list_parser._normalize_text(name)
+            else:
+                continue
+
+            if 'brand' in detected_columns:
+                brand = row.get('brand')
+                if not pd.isna(brand):
+                    product['brand'] = str(brand).strip().lower()
+
+            if 'category' in detected_columns:
+                category = row.get('category')
+                if not pd.isna(category):
+                    product['category'] = str(category).strip().lower()
+
+            if 'unit' in detected_columns:
+                unit = row.get('unit')
+                if not pd.isna(unit):
+                    product['unit'] = str(unit).strip()
+
+            if 'stock' in detected_columns:
+                stock = row.get('stock')
+                try:
+                    product['stock'] = int(float(stock))
+                except:
+                    pass
+
+            product['raw_text'] = ' '.join([
+                str(v) for v in row.values if not pd.isna(v) and str(v).lower() != 'nan'
+            ])
+
+            products.append(product)
+
+        except Exception:
+            continue
+
+    return products
+
+
+def run(rows_list: List[int], legacy_limit: int) -> List[Dict]:
+    results = []
+    for rows in rows_list:
+        df = make_frame(rows)
+
+        started = time.perf_counter()
+        vectorized = price_list_parser._extract_products(df, DETECTED_COLUMNS)
+        vectorized_sec = time.perf_counter() - started
+
+        result = {
+            "rows": rows,
+            "products": len(vectorized),
+            "vectorized_sec": round(vectorized_sec, 3),
+            "iterrows_sec": None,
+            "speedup": None,
+            "identical": None,
+        }
+
+        # Построчный вариант на 1M строк идёт минутами, поэтому его можно ограничить
+        if rows <= legacy_limit:
+            started = time.perf_counter()
+            legacy = extract_products_iterrows(df, DETECTED_COLUMNS)
+            legacy_sec = time.perf_counter() - started
+            result["iterrows_sec"] = round(legacy_sec, 3)
+            result["speedup"] = round(legacy_sec / vectorized_sec, 1) if vectorized_sec else None
+            result["identical"] = legacy == vectorized
+
+        results.append(result)
+        print(json.dumps(result, ensure_ascii=False))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", default="10000,100000,1000000")
+    parser.add_argument(
+        "--legacy-limit", type=int, default=1000000,
+        help="не запускать iterrows-вариант на файлах больше этого размера"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    run([int(r) for r in args.rows.split(",")], args.legacy_limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Benchmark: разбор прайс-листов целиком
+Генерирует синтетические прайсы (benchmarks.pricelist_generator) в xlsx/csv/
+txt/pdf на 1k-1M строк и прогоняет их через PriceListParser.parse_file.
+Для каждого файла - rows/sec, пиковый RSS, время стадий (read, header,
+columns, extract, tags) и совпадение маппинга ColumnDetector с ожидаемым.
+
+Каждый прогон идёт в отдельном процессе, чтобы пиковый RSS не
+накапливался между файлами. Результаты - JSON по строке на прогон и
+(--output) итоговый JSON с окружением для сравнения между версиями.
+
+    python -m benchmarks.bench_parser [--rows 1000,100000,1000000] [--formats xlsx,csv,txt,pdf]
+        [--sheets 3] [--pdf-limit 5000] [--output results.json]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import pandas as pd
+
+from benchmarks.pricelist_generator import FORMATS, write_price_list
+
+# Каталог back/: дочерние процессы запускаются из него
+BACK_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_case(path: str, file_format: str, expected_columns: List[Dict[str, str]]) -> Dict:
+    """Один прогон parse_file (вызывается в дочернем процессе)."""
+    from app.services.price_list_parser import price_list_parser
+
+    # Лимит строк не должен обрезать большие файлы
+    price_list_parser.max_rows = 10 ** 7
+    result = asyncio.run(price_list_parser.parse_file(path, f"bench.{file_format}"))
+    if not result.get("success"):
+        return {"success": False, "error": result.get("error")}
+
+    if result.get("sheets"):
+        detected = [sheet["detected_columns"] for sheet in result["sheets"]]
+    else:
+        detected = [result["detected_columns"]]
+    detected = [{column: str(label) for column, label in columns.items()} for columns in detected]
+
+    return {
+        "success": True,
+        "products": result["products_count"],
+        "failed_rows": result.get("failed_rows", 0),
+        "columns_correct": detected == expected_columns,
+        "layout_header_row": result["layout"]["header_row"],
+        **result["stats"],
+        # Листы xlsx и страницы PDF разбираются в пуле процессов - их память отдельно
+        "children_peak_rss_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+    }
+
+
+def run_in_subprocess(path: str, file_format: str, expected_columns: List[Dict[str, str]]) -> Dict:
+    command = [
+        sys.executable, "-m", "benchmarks.bench_parser",
+        "--case", json.dumps({"path": path, "format": file_format, "expected": expected_columns}),
+    ]
+    completed = subprocess.run(command, capture_output=True, text=True, cwd=BACK_DIR)
+    if completed.returncode != 0:
+        return {"success": False, "error": completed.stderr.strip().splitlines()[-1:]}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run(rows_list: List[int], formats: List[str], sheets: int, pdf_limit: int, seed: int) -> List[Dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for file_format in formats:
+            for rows in rows_list:
+                # pdfplumber разбирает ~сотню строк в секунду на процесс
+                if file_format == "pdf" and rows > pdf_limit:
+                    continue
+
+                path = os.path.join(tmp, f"price_{rows}.{file_format}")
+                started = time.perf_counter()
+                specs = write_price_list(
+                    path, file_format, rows, seed=seed,
+                    sheets=sheets if file_format == "xlsx" else 1
+                )
+                generate_sec = time.perf_counter() - started
+
+                result = {
+                    "format": file_format,
+                    "rows": rows,
+                    "sheets": len(specs),
+                    "size_mb": round(os.path.getsize(path) / 1024 / 1024, 2),
+                    "generate_sec": round(generate_sec, 3),
+                }
+                result.update(run_in_subprocess(path, file_format, [spec.expected_columns for spec in specs]))
+                os.unlink(path)
+
+                results.append(result)
+                print(json.dumps(result, ensure_ascii=False), flush=True)
+    return results
+
+
+def environment() -> Dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=BACK_DIR
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "cpu_count": os.cpu_count(),
+        "machine": platform.machine(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", default="1000,100000,1000000")
+    parser.add_argument("--formats", default=",".join(FORMATS))
+    parser.add_argument("--sheets", type=int, default=3, help="число листов xlsx")
+    parser.add_argument(
+        "--pdf-limit", type=int, default=5000,
+        help="не генерировать PDF больше этого числа строк"
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="записать итоговый JSON в файл")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.case:
+        case = json.loads(args.case)
+        print(json.dumps(run_case(case["path"], case["format"], case["expected"]), ensure_ascii=False))
+        return
+
+    formats = [f for f in args.formats.split(",") if f]
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        parser.error(f"unknown formats: {', '.join(sorted(unknown))}")
+
+    results = run([int(r) for r in args.rows.split(",")], formats, args.sheets, args.pdf_limit, args.seed)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment(), "results": results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
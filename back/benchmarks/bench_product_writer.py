@@ -0,0 +1,120 @@
+"""
+Benchmark: запись товаров в PostgreSQL
+Сравнивает ProductWriter.copy_products (COPY) с прежней записью через ORM
+(Product + session.add_all) на 100k/1M строк.
+
+Нужна доступная база из настроек (DATABASE_URL). Запись идёт во временную
+таблицу products (LIKE public.products), которая на время соединения
+перекрывает настоящую, так что данные и внешние ключи не затрагиваются.
+
+    python -m benchmarks.bench_product_writer [--rows 100000,1000000] [--orm-limit 1000000]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import resource
+import time
+import uuid
+from typing import Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import db_manager
+from app.models.product import Product
+from app.services.price_list_parser import price_list_parser
+from app.services.product_writer import product_writer
+from benchmarks.bench_extract_products import DETECTED_COLUMNS, make_frame
+
+
+def peak_rss_mb() -> float:
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+async def write_orm(connection, products: List[Dict], supplier_id, import_id) -> float:
+    """Прежний путь parse_pricelist_task: объект Product на строку и add_all."""
+    started = time.perf_counter()
+    session = AsyncSession(bind=connection)
+    session.add_all([
+        Product(
+            supplier_id=supplier_id,
+            import_id=import_id,
+            sku=product_data.get("sku"),
+            name=product_data.get("name"),
+            brand=product_data.get("brand"),
+            category=product_data.get("category"),
+            price=product_data.get("price"),
+            unit=product_data.get("unit"),
+            stock=product_data.get("stock"),
+            raw_text=product_data.get("raw_text"),
+            row_number=idx + 1
+        )
+        for idx, product_data in enumerate(products)
+    ])
+    await session.flush()
+    elapsed = time.perf_counter() - started
+    session.expunge_all()
+    return elapsed
+
+
+async def write_copy(connection, products: List[Dict], supplier_id, import_id) -> float:
+    started = time.perf_counter()
+    await product_writer.copy_products(
+        ((idx + 1, product_data) for idx, product_data in enumerate(products)),
+        supplier_id, import_id, connection=connection
+    )
+    return time.perf_counter() - started
+
+
+async def run(rows_list: List[int], orm_limit: int) -> List[Dict]:
+    results = []
+    supplier_id = uuid.uuid4()
+    import_id = uuid.uuid4()
+
+    async with db_manager.engine_master.connect() as connection:
+        await connection.execute(text(
+            "CREATE TEMP TABLE products (LIKE public.products INCLUDING DEFAULTS INCLUDING INDEXES)"
+        ))
+
+        for rows in rows_list:
+            products = price_list_parser._extract_products(make_frame(rows), DETECTED_COLUMNS)
+            result = {"rows": rows, "products": len(products)}
+
+            # COPY первым: пиковая память ORM-пути иначе скрыла бы его RSS
+            result["copy_sec"] = round(await write_copy(connection, products, supplier_id, import_id), 3)
+            result["copy_peak_rss_mb"] = peak_rss_mb()
+            await connection.execute(text("TRUNCATE products"))
+
+            result.update({"orm_sec": None, "orm_peak_rss_mb": None, "speedup": None})
+            # ORM-путь на 1M строк требует несколько ГБ памяти, его можно ограничить
+            if rows <= orm_limit:
+                result["orm_sec"] = round(await write_orm(connection, products, supplier_id, import_id), 3)
+                result["orm_peak_rss_mb"] = peak_rss_mb()
+                await connection.execute(text("TRUNCATE products"))
+                result["speedup"] = round(result["orm_sec"] / result["copy_sec"], 1) if result["copy_sec"] else None
+
+            results.append(result)
+            print(json.dumps(result, ensure_ascii=False))
+
+        await connection.rollback()
+
+    await db_manager.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", default="100000,1000000")
+    parser.add_argument(
+        "--orm-limit", type=int, default=1000000,
+        help="не запускать ORM-вариант на объёмах больше этого"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(run([int(r) for r in args.rows.split(",")], args.orm_limit))
+
+
+if __name__ == "__main__":
+    main()
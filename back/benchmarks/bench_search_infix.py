@@ -0,0 +1,156 @@
+"""
+Benchmark: поиск по части названия
+Сравнивает прежний clause 10 search_products - wildcard *query* по name - с
+match по триграммам name.infix на синтетическом каталоге в Elasticsearch.
+
+Создаёт временный индекс с маппингом products (es_manager), заполняет его
+товарами из benchmarks.pricelist_generator, прогоняет одни и те же подстроки
+названий обоими запросами и выводит took (время в ES) и время ответа:
+p50/p95/p99 и среднее число найденных товаров. Нужен доступный ES
+(ELASTICSEARCH_URL из настроек); индекс удаляется после прогона.
+
+    python -m benchmarks.bench_search_infix [--docs 1000000] [--queries 200] [--keep]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import statistics
+import time
+from typing import Dict, Iterator, List
+
+from elasticsearch.helpers import async_bulk
+
+from app.core.config import settings
+from app.core.elasticsearch import es_manager
+from benchmarks.pricelist_generator import (
+    BRANDS, COLUMN_TYPES, MATERIALS, PRODUCT_TYPES, PriceListSpec, generate_rows
+)
+
+BENCH_INDEX = "bench_products_infix"
+
+
+def iter_documents(docs: int, seed: int) -> Iterator[Dict]:
+    rng = random.Random(seed)
+    spec = PriceListSpec(headers=list(COLUMN_TYPES), columns=list(COLUMN_TYPES), junk_rows=[])
+    for i, row in enumerate(generate_rows(spec, docs, rng)):
+        product = {column: value for column, value in zip(COLUMN_TYPES, row) if value is not None}
+        yield {
+            "_index": BENCH_INDEX,
+            "_id": str(i),
+            "_source": {
+                "supplier_id": f"supplier-{i % 50}",
+                "sku": product["sku"],
+                "name": product["name"],
+                "brand": product.get("brand"),
+                "category": product["category"],
+                "unit": product["unit"],
+            },
+        }
+
+
+def make_queries(count: int, seed: int) -> List[str]:
+    """Подстроки слов из названий: середины слов, как их набирают в поиске."""
+    rng = random.Random(seed)
+    words = [
+        word for phrase in PRODUCT_TYPES + BRANDS + MATERIALS
+        for word in phrase.split() if len(word) >= 5
+    ]
+    queries = []
+    for _ in range(count):
+        word = rng.choice(words)
+        length = rng.randint(3, min(8, len(word) - 1))
+        start = rng.randint(1, len(word) - length)
+        queries.append(word[start:start + length])
+    return queries
+
+
+async def create_index(docs: int, seed: int):
+    body = es_manager._products_index_body()
+    index_settings = {**body["settings"], "number_of_shards": 1, "number_of_replicas": 0, "refresh_interval": "-1"}
+    if await es_manager.client.indices.exists(index=BENCH_INDEX):
+        await es_manager.client.indices.delete(index=BENCH_INDEX)
+    await es_manager.client.indices.create(index=BENCH_INDEX, mappings=body["mappings"], settings=index_settings)
+
+    started = time.perf_counter()
+    await async_bulk(
+        es_manager.client, iter_documents(docs, seed),
+        chunk_size=settings.ES_BULK_SIZE, request_timeout=settings.ES_BULK_TIMEOUT
+    )
+    await es_manager.client.indices.refresh(index=BENCH_INDEX)
+    await es_manager.client.options(request_timeout=600).indices.forcemerge(index=BENCH_INDEX, max_num_segments=1)
+    return round(time.perf_counter() - started, 1)
+
+
+def wildcard_query(query: str) -> Dict:
+    return {"wildcard": {"name": {"value": f"*{query.lower()}*"}}}
+
+
+def infix_query(query: str) -> Dict:
+    return {"match": {"name.infix": {"query": query, "operator": "and"}}}
+
+
+def percentile(values: List[float], share: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+async def measure(build_query, queries: List[str]) -> Dict:
+    took, wall, hits = [], [], []
+    for query in queries:
+        started = time.perf_counter()
+        response = await es_manager.client.search(
+            index=BENCH_INDEX,
+            query=build_query(query),
+            size=20,
+            track_total_hits=True,
+            request_cache=False,
+        )
+        wall.append((time.perf_counter() - started) * 1000)
+        took.append(response["took"])
+        hits.append(response["hits"]["total"]["value"])
+    return {
+        "took_p50_ms": percentile(took, 0.5),
+        "took_p95_ms": percentile(took, 0.95),
+        "took_p99_ms": percentile(took, 0.99),
+        "wall_p50_ms": round(percentile(wall, 0.5), 1),
+        "wall_p95_ms": round(percentile(wall, 0.95), 1),
+        "mean_hits": round(statistics.mean(hits), 1),
+    }
+
+
+async def run(docs: int, query_count: int, seed: int, keep: bool) -> Dict:
+    try:
+        index_sec = await create_index(docs, seed)
+        queries = make_queries(query_count, seed)
+
+        results = {"docs": docs, "queries": query_count, "index_sec": index_sec}
+        for name, build_query in (("wildcard", wildcard_query), ("infix", infix_query)):
+            # Прогрев: кэши сегментов и файловой системы
+            await measure(build_query, queries[:20])
+            results[name] = await measure(build_query, queries)
+        if results["infix"]["took_p50_ms"]:
+            results["speedup_p50"] = round(results["wildcard"]["took_p50_ms"] / results["infix"]["took_p50_ms"], 1)
+        return results
+    finally:
+        if not keep:
+            await es_manager.client.indices.delete(index=BENCH_INDEX, ignore_unavailable=True)
+        await es_manager.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=1000000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep", action="store_true", help="не удалять индекс после прогона")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    results = asyncio.run(run(args.docs, args.queries, args.seed, args.keep))
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""
+Генератор синтетических прайс-листов для бенчмарков
+Русские заголовки из COLUMN_SYNONYMS_MAP, служебные строки над шапкой,
+несколько листов; форматы xlsx, csv, txt и pdf.
+
+    python -m benchmarks.pricelist_generator --rows 10000 --format xlsx --out /tmp/price.xlsx
+"""
+import argparse
+import csv
+import random
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+from openpyxl import Workbook
+
+from app.core.config import settings
+
+FORMATS = ("xlsx", "csv", "txt", "pdf")
+
+# Колонки в порядке, типичном для прайсов; sku и name есть всегда
+COLUMN_TYPES = ("sku", "name", "brand", "category", "unit", "price", "stock")
+OPTIONAL_COLUMNS = ("brand", "category", "unit", "price", "stock")
+# Колонки, которые парсер не должен ни с чем сопоставить
+EXTRA_HEADERS = ("Примечание", "Страна происхождения", "Гарантия, мес.")
+
+PRODUCT_TYPES = (
+    "Дрель ударная", "Шуруповёрт аккумуляторный", "Перфоратор", "Болгарка",
+    "Болт с шестигранной головкой", "Гайка самоконтрящаяся", "Шайба пружинная",
+    "Саморез по дереву", "Анкер клиновой", "Кабель силовой", "Автомат дифференциальный",
+    "Розетка накладная", "Выключатель двухклавишный", "Светильник светодиодный",
+    "Труба полипропиленовая", "Кран шаровой", "Смеситель для кухни", "Герметик силиконовый",
+    "Краска фасадная", "Грунтовка глубокого проникновения", "Перчатки нитриловые",
+    "Респиратор", "Лента малярная", "Уровень строительный", "Рулетка измерительная",
+)
+BRANDS = (
+    "Bosch", "Makita", "DeWalt", "Зубр", "Интерскол", "Kraftool", "Legrand",
+    "Schneider Electric", "IEK", "Valtec", "Tytan", "Церезит", "Stayer", "3M",
+)
+CATEGORIES = (
+    "Электроинструмент", "Крепёж", "Электрика", "Освещение", "Сантехника",
+    "Лакокрасочные материалы", "Средства защиты", "Измерительный инструмент",
+)
+MATERIALS = ("оцинкованный", "нержавеющий", "латунный", "чёрный", "белый", "усиленный")
+SIZES = ("М6", "М8", "М10", "М12", "1/2\"", "3/4\"", "20 мм", "25 мм", "3x2,5", "5 л", "10 м")
+UNITS = ("шт", "шт.", "упак", "м", "кг", "компл", "пара", "л")
+STOCK_WORDS = ("нет", "под заказ", "в наличии", ">100", "более 50", "много")
+PRICE_WORDS = ("по запросу", "договорная")
+
+_CYRILLIC_RE = re.compile("[а-яё]")
+
+JUNK_ROWS = (
+    ["ООО «ТехСнаб»"],
+    ["ИНН 7701234567, г. Москва, ул. Складская, д. 5"],
+    ["Тел.: +7 (495) 123-45-67, e-mail: sales@techsnab.ru"],
+    [],
+    ["Прайс-лист действителен на 01.10.2026. Цены указаны с НДС."],
+)
+
+
+@dataclass
+class PriceListSpec:
+    """Раскладка синтетического прайса и правильный маппинг колонок."""
+    headers: List[str]
+    columns: List[Optional[str]]
+    junk_rows: List[List[str]]
+    expected_columns: Dict[str, str] = field(default_factory=dict)
+
+
+def make_spec(rng: random.Random, junk_rows: Optional[int] = None) -> PriceListSpec:
+    """
+    Случайная раскладка: синоним заголовка для каждой колонки, набор
+    необязательных колонок, лишняя колонка и служебные строки над шапкой.
+    """
+    synonyms = settings.COLUMN_SYNONYMS_MAP
+    present = [column for column in COLUMN_TYPES if column not in OPTIONAL_COLUMNS or rng.random() < 0.8]
+    columns: List[Optional[str]] = list(present)
+    columns.insert(rng.randrange(2, len(columns) + 1), None)
+
+    headers = []
+    expected = {}
+    for column in columns:
+        if column is None:
+            headers.append(rng.choice(EXTRA_HEADERS))
+            continue
+        # Английские синонимы тоже есть в словаре, но прайсы в основном русские
+        russian = [synonym for synonym in synonyms[column] if _CYRILLIC_RE.search(synonym)]
+        header = rng.choice(russian or synonyms[column])
+        header = header[:1].upper() + header[1:]
+        headers.append(header)
+        expected[column] = header
+
+    if junk_rows is None:
+        junk_rows = rng.randint(0, len(JUNK_ROWS))
+    return PriceListSpec(
+        headers=headers,
+        columns=columns,
+        junk_rows=[list(row) for row in JUNK_ROWS[:junk_rows]],
+        expected_columns=expected,
+    )
+
+
+def format_price(rng: random.Random, price: float) -> object:
+    """Цена числом или строкой в русском формате, изредка словами."""
+    roll = rng.random()
+    if roll < 0.5:
+        return round(price, 2)
+    if roll < 0.97:
+        whole, fraction = f"{price:.2f}".split(".")
+        whole = f"{int(whole):,}".replace(",", " ")
+        text = f"{whole},{fraction}"
+        return f"{text} руб." if roll < 0.75 else text
+    return rng.choice(PRICE_WORDS)
+
+
+def format_stock(rng: random.Random) -> object:
+    roll = rng.random()
+    if roll < 0.8:
+        return rng.randint(0, 2000)
+    if roll < 0.9:
+        return f"{rng.randint(1, 500)} шт."
+    return rng.choice(STOCK_WORDS)
+
+
+def generate_rows(spec: PriceListSpec, rows: int, rng: random.Random, start: int = 0) -> Iterator[List]:
+    """Строки товаров по раскладке spec; пустые ячейки - None."""
+    for i in range(start, start + rows):
+        product_type = rng.choice(PRODUCT_TYPES)
+        brand = rng.choice(BRANDS)
+        values = {
+            "sku": f"{brand[:3].upper()}-{i:07d}",
+            "name": f"{product_type} {brand} {rng.choice(MATERIALS)} {rng.choice(SIZES)}",
+            "brand": brand if rng.random() > 0.03 else None,
+            "category": rng.choice(CATEGORIES),
+            "unit": rng.choice(UNITS),
+            "price": format_price(rng, rng.uniform(5, 150000)),
+            "stock": format_stock(rng),
+            None: "" if rng.random() < 0.7 else "Россия",
+        }
+        yield [values[column] for column in spec.columns]
+
+
+def write_xlsx(path: str, rows: int, rng: random.Random, sheets: int = 1) -> List[PriceListSpec]:
+    """xlsx с rows строками, поровну разложенными по sheets листам (у каждого своя шапка)."""
+    workbook = Workbook(write_only=True)
+    specs = []
+    per_sheet = max(rows // sheets, 1)
+    written = 0
+    for index in range(sheets):
+        sheet_rows = rows - written if index == sheets - 1 else per_sheet
+        spec = make_spec(rng)
+        sheet = workbook.create_sheet(title=rng.choice(CATEGORIES)[:20] + f" {index + 1}")
+        for row in spec.junk_rows:
+            sheet.append(row)
+        sheet.append(spec.headers)
+        for row in generate_rows(spec, sheet_rows, rng, start=written):
+            sheet.append(row)
+        written += sheet_rows
+        specs.append(spec)
+    workbook.save(path)
+    return specs
+
+
+def write_delimited(path: str, rows: int, rng: random.Random, delimiter: str, encoding: str) -> List[PriceListSpec]:
+    """CSV/TXT со служебными строками над шапкой."""
+    spec = make_spec(rng)
+    with open(path, "w", encoding=encoding, errors="replace", newline="") as f:
+        writer = csv.writer(f, delimiter=delimiter)
+        for row in spec.junk_rows:
+            writer.writerow(row)
+        writer.writerow(spec.headers)
+        for row in generate_rows(spec, rows, rng):
+            writer.writerow(["" if value is None else value for value in row])
+    return [spec]
+
+
+# PDF пишется вручную, без внешних библиотек. Кириллица кодируется в cp1251,
+# а /Differences шрифта сопоставляет байтам имена глифов (afii...), по
+# которым pdfplumber восстанавливает Unicode
+_CYRILLIC_GLYPHS = (
+    [f"/afii{code}" for code in range(10017, 10023)] + [f"/afii{code}" for code in range(10024, 10050)]
+    + [f"/afii{code}" for code in range(10065, 10071)] + [f"/afii{code}" for code in range(10072, 10098)]
+)
+_PDF_FONT_DIFFERENCES = "168 /afii10023 184 /afii10071 185 /afii61352 192 " + " ".join(_CYRILLIC_GLYPHS)
+_PDF_PAGE_WIDTH, _PDF_PAGE_HEIGHT = 842, 595
+_PDF_MARGIN = 20
+_PDF_ROW_HEIGHT = 11
+_PDF_FONT_SIZE = 6
+_PDF_CHAR_WIDTH = 0.5 * _PDF_FONT_SIZE
+
+
+def _pdf_text(value: object) -> str:
+    data = str(value).encode("cp1251", errors="replace")
+    return "".join(
+        chr(byte) if 32 <= byte < 127 and byte not in b"()\\" else f"\\{byte:03o}"
+        for byte in data
+    )
+
+
+def _pdf_page(header: List[str], rows: List[List], title: Optional[str]) -> bytes:
+    """Содержимое страницы: заголовок документа, сетка таблицы и текст ячеек."""
+    width = _PDF_PAGE_WIDTH - 2 * _PDF_MARGIN
+    weights = [3 if index == 1 else 1 for index in range(len(header))]
+    edges = [_PDF_MARGIN]
+    for weight in weights:
+        edges.append(edges[-1] + width * weight / sum(weights))
+
+    top = _PDF_PAGE_HEIGHT - _PDF_MARGIN
+    ops = []
+    if title:
+        ops.append(f"BT /F1 9 Tf {_PDF_MARGIN} {top - 9} Td ({_pdf_text(title)}) Tj ET")
+        top -= 20
+
+    table = [header] + rows
+    bottom = top - _PDF_ROW_HEIGHT * len(table)
+    ops.append("0.5 w")
+    for row_index in range(len(table) + 1):
+        y = top - row_index * _PDF_ROW_HEIGHT
+        ops.append(f"{edges[0]:.1f} {y} m {edges[-1]:.1f} {y} l S")
+    for x in edges:
+        ops.append(f"{x:.1f} {top} m {x:.1f} {bottom} l S")
+
+    for row_index, row in enumerate(table):
+        y = top - (row_index + 1) * _PDF_ROW_HEIGHT + 3
+        for column, value in enumerate(row):
+            if value is None or value == "":
+                continue
+            max_chars = int((edges[column + 1] - edges[column] - 4) / _PDF_CHAR_WIDTH)
+            text = _pdf_text(str(value)[:max_chars])
+            ops.append(f"BT /F1 {_PDF_FONT_SIZE} Tf {edges[column] + 2:.1f} {y} Td ({text}) Tj ET")
+    return "\n".join(ops).encode("latin-1")
+
+
+def write_pdf(path: str, rows: int, rng: random.Random) -> List[PriceListSpec]:
+    """PDF с таблицей на каждой странице; шапка таблицы повторяется на страницах."""
+    spec = make_spec(rng, junk_rows=0)
+    rows_per_page = (_PDF_PAGE_HEIGHT - 2 * _PDF_MARGIN - 20) // _PDF_ROW_HEIGHT - 1
+    data = list(generate_rows(spec, rows, rng))
+    pages = [data[start:start + rows_per_page] for start in range(0, len(data), rows_per_page)] or [[]]
+
+    width = _PDF_CHAR_WIDTH * 1000 / _PDF_FONT_SIZE
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        (
+            "<< /Type /Font /Subtype /Type1 /BaseFont /PriceListSans /FontDescriptor 4 0 R /FirstChar 32 /LastChar 255 "
+            f"/Widths [{' '.join([f'{width:.0f}'] * 224)}] "
+            f"/Encoding << /Type /Encoding /BaseEncoding /WinAnsiEncoding /Differences [{_PDF_FONT_DIFFERENCES}] >> >>"
+        ).encode("latin-1"),
+        (
+            b"<< /Type /FontDescriptor /FontName /PriceListSans /Flags 32 /FontBBox [-166 -225 1000 931] "
+            b"/ItalicAngle 0 /Ascent 718 /Descent -207 /CapHeight 718 /StemV 88 >>"
+        ),
+    ]
+    page_ids = []
+    for index, page_rows in enumerate(pages):
+        title = JUNK_ROWS[0][0] + " - прайс-лист" if index == 0 else None
+        content = _pdf_page(spec.headers, page_rows, title)
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+        content_id = len(objects)
+        objects.append((
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {_PDF_PAGE_WIDTH} {_PDF_PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode("latin-1"))
+        page_ids.append(len(objects))
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode("latin-1")
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return [spec]
+
+
+def write_price_list(path: str, file_format: str, rows: int, seed: int = 42, sheets: int = 1) -> List[PriceListSpec]:
+    """
+    Пишет синтетический прайс в path и возвращает раскладки (по листу на
+    элемент) с правильным маппингом колонок. CSV - ';' в cp1251, TXT - табы в UTF-8.
+    """
+    rng = random.Random(seed)
+    if file_format == "xlsx":
+        return write_xlsx(path, rows, rng, sheets)
+    if file_format == "csv":
+        return write_delimited(path, rows, rng, ";", "cp1251")
+    if file_format == "txt":
+        return write_delimited(path, rows, rng, "\t", "utf-8")
+    if file_format == "pdf":
+        return write_pdf(path, rows, rng)
+    raise ValueError(f"Unknown format: {file_format}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--format", choices=FORMATS, default="xlsx")
+    parser.add_argument("--sheets", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+
+    for spec in write_price_list(args.out, args.format, args.rows, args.seed, args.sheets):
+        print(spec.expected_columns)
+
+
+if __name__ == "__main__":
+    main()
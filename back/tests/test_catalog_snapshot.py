@@ -0,0 +1,65 @@
+"""
+Цепочка снимков каталога поставщика (supplier_snapshot_chain)
+"""
+import uuid
+
+import pytest
+
+from app.models.product_import import ProductImport
+from app.services.catalog_snapshot import supplier_snapshot_chain
+
+
+class _Result:
+    def __init__(self, records):
+        self._records = records
+
+    def scalars(self):
+        return iter(self._records)
+
+
+class _Session:
+    """Сессия, отдающая импорты поставщика от новых к старым, как запрос в БД."""
+
+    def __init__(self, records):
+        self._records = records
+
+    async def execute(self, query):
+        return _Result(self._records)
+
+
+def _import(status, mode, snapshot_path):
+    # status в БД - String(50), из сессии приходит обычная строка
+    return ProductImport(
+        id=uuid.uuid4(), status=status, import_mode=mode, snapshot_path=str(snapshot_path)
+    )
+
+
+@pytest.mark.asyncio
+async def test_chain_is_last_completed_differential_import(tmp_path):
+    completed = _import("completed", "differential", tmp_path)
+
+    chain = await supplier_snapshot_chain(_Session([completed]), uuid.uuid4())
+
+    assert chain == [completed]
+
+
+@pytest.mark.asyncio
+async def test_failed_import_after_differential_disables_snapshots(tmp_path):
+    records = [
+        _import("failed", "differential", tmp_path),
+        _import("completed", "differential", tmp_path),
+    ]
+
+    assert await supplier_snapshot_chain(_Session(records), uuid.uuid4()) is None
+
+
+@pytest.mark.asyncio
+async def test_current_import_is_excluded(tmp_path):
+    current = _import("processing", "differential", tmp_path)
+    completed = _import("completed", "differential", tmp_path)
+
+    chain = await supplier_snapshot_chain(
+        _Session([current, completed]), uuid.uuid4(), exclude_import_id=current.id
+    )
+
+    assert chain == [completed]